@@ -1,15 +1,184 @@
 # src/backtest/costs.py
 from __future__ import annotations
+
+import numpy as np
 import pandas as pd
+
+from src.backtest.matrix import to_panel
+from src.backtest.risk import liquidity_slippage_array
 from src.config.settings import BACKTEST_SETTINGS
+from src.data.loader import load_universe_closes
+
+
+COST_MODELS = ("bps", "tiered", "sqrt")
+
+
+# -------------------------------------------------
+# Inputs: liquidity / volatility panels
+# -------------------------------------------------
+def liquidity_panels(
+    close: pd.DataFrame,
+    volume: pd.DataFrame,
+    window: int = 20,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    (adv, vol) DATE x SYMBOL panels: `window`-day average traded value
+    (volume * close) and `window`-day std of daily returns.
+    """
+    adv = (volume * close).rolling(window, min_periods=1).mean()
+    vol = close.pct_change(fill_method=None).rolling(window, min_periods=2).std()
+    return adv, vol
+
+
+def load_liquidity_panels(window: int = 20) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """`liquidity_panels` from the continuous futures files (adj_close, volume)."""
+    universe = load_universe_closes(extra_cols=("volume",))
+    return liquidity_panels(to_panel(universe, "adj_close"), to_panel(universe, "volume"), window)
+
+
+# -------------------------------------------------
+# Positions: no-trade band
+# -------------------------------------------------
+def no_trade_band(weights: np.ndarray, band: float) -> np.ndarray:
+    """
+    Held weights when a position is only resized once it drifts at least
+    `band` from its target (exits to zero always trade). The band makes
+    holdings path-dependent, so this steps through dates with whole-row
+    ops; every other cost step is a single matrix op.
+    """
+    W = np.asarray(weights, dtype=np.float64)
+    if band <= 0:
+        return W.copy()
+
+    held = np.empty_like(W)
+    prev = np.zeros(W.shape[1:])
+
+    for t in range(len(W)):
+        trade = (np.abs(W[t] - prev) >= band) | (W[t] == 0)
+        prev = np.where(trade, W[t], prev)
+        held[t] = prev
+
+    return held
+
+
+def turnover_matrix(held: np.ndarray) -> np.ndarray:
+    """Per-symbol |w_t - w_t-1| (the first day trades in from cash)."""
+    held = np.asarray(held, dtype=np.float64)
+    prev = np.zeros_like(held)
+    prev[1:] = held[:-1]
+    return np.abs(held - prev)
+
+
+# -------------------------------------------------
+# Cost stage
+# -------------------------------------------------
+def transaction_costs(
+    weights: np.ndarray,
+    model: str = "bps",
+    cost_bps: float | None = None,
+    trdval: np.ndarray | None = None,
+    adv: np.ndarray | None = None,
+    vol: np.ndarray | None = None,
+    band: float = 0.0,
+    capital: float = BACKTEST_SETTINGS.capital,
+    impact_coef: float = BACKTEST_SETTINGS.impact_coef,
+) -> dict[str, np.ndarray]:
+    """
+    Costs of trading into a (T, N) weight matrix, computed per symbol from
+    day-over-day weight changes:
 
+      bps    : cost_bps (default slippage + brokerage) on every unit traded
+      tiered : risk.liquidity_slippage tier of each symbol's traded value
+               (`trdval` panel) on every unit traded
+      sqrt   : square-root impact, per unit traded
+                 slippage_bps + impact_coef * vol * sqrt(traded notional / adv)
+               with traded notional = |dw| * capital; symbols without
+               adv / vol fall back to the widest slippage tier
+
+    `band` > 0 applies a no-trade band first (see `no_trade_band`).
+
+    Returns dict: held (T, N) weights actually held, turnover (T, N),
+    rate (T, N) cost per unit traded, cost (T, N), total (T,) per day.
+    """
+    if model not in COST_MODELS:
+        raise ValueError(f"model must be one of {COST_MODELS}, got {model!r}")
+
+    held = no_trade_band(weights, band)
+    turnover = turnover_matrix(held)
+
+    if model == "bps":
+        if cost_bps is None:
+            cost_bps = BACKTEST_SETTINGS.slippage_bps + BACKTEST_SETTINGS.brokerage_per_turnover_bps
+        rate = np.full(turnover.shape, cost_bps / 10000.0)
+
+    elif model == "tiered":
+        if trdval is None:
+            raise ValueError("tiered costs need a trdval panel")
+        rate = liquidity_slippage_array(trdval)
+
+    else:
+        if adv is None or vol is None:
+            raise ValueError("sqrt costs need adv and vol panels")
+        adv = np.asarray(adv, dtype=np.float64)
+        vol = np.asarray(vol, dtype=np.float64)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            impact = impact_coef * vol * np.sqrt(turnover * capital / adv)
+
+        # no liquidity data -> same 25 bps as an unknown trdval tier
+        rate = np.where(
+            np.isfinite(impact),
+            BACKTEST_SETTINGS.slippage_bps / 10000.0 + impact,
+            liquidity_slippage_array(np.nan),
+        )
+
+    cost = turnover * rate
+
+    return {
+        "held": held,
+        "turnover": turnover,
+        "rate": rate,
+        "cost": cost,
+        "total": cost.sum(axis=1),
+    }
+
+
+# -------------------------------------------------
+# Long-frame helper
+# -------------------------------------------------
 def apply_costs(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    # For now, assume cost per trade on notional = slippage + brokerage
-    cost_bps = BACKTEST_SETTINGS.slippage_bps + BACKTEST_SETTINGS.brokerage_per_turnover_bps
-    # Approximate turnover = |weight| (1x capital) * |ret| ?
-    # Very rough; we can refine later.
-    df["turnover"] = df["weight"].abs()
-    df["trading_cost"] = df["turnover"] * (cost_bps / 10000.0)
-    df["net_pnl"] = df["gross_pnl"] - df["trading_cost"]
-    return df
+    """
+    Add turnover, trading_cost and net_pnl to a long frame with DATE,
+    SYMBOL, weight, gross_pnl. Turnover is the per-symbol day-over-day
+    weight change (a symbol missing on a day is not held), charged
+    slippage + brokerage bps.
+
+    Exits from a symbol with no row on the exit day get their own row
+    (weight 0, gross_pnl 0) so their cost is charged too. Returned sorted
+    by DATE, SYMBOL.
+    """
+    weights = df.pivot(index="DATE", columns="SYMBOL", values="weight").sort_index().fillna(0.0)
+    tc = transaction_costs(weights.to_numpy(), model="bps")
+
+    costs = pd.DataFrame(
+        {
+            "turnover": tc["turnover"].ravel(),
+            "trading_cost": tc["cost"].ravel(),
+        },
+        index=pd.MultiIndex.from_product([weights.index, weights.columns], names=["DATE", "SYMBOL"]),
+    )
+
+    rows = pd.MultiIndex.from_frame(df[["DATE", "SYMBOL"]])
+    matched = costs.reindex(rows)
+    exits = costs.loc[~costs.index.isin(rows) & (costs["turnover"] > 0)]
+
+    out = df.copy()
+    out["turnover"] = matched["turnover"].to_numpy()
+    out["trading_cost"] = matched["trading_cost"].to_numpy()
+
+    out = pd.concat(
+        [out, exits.reset_index().assign(weight=0.0, gross_pnl=0.0)],
+        ignore_index=True,
+    )
+    out["net_pnl"] = out["gross_pnl"] - out["trading_cost"]
+    return out.sort_values(["DATE", "SYMBOL"], kind="stable").reset_index(drop=True)
@@ -0,0 +1,286 @@
+# src/backtest/cv.py
+from __future__ import annotations
+
+import itertools
+import json
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.sweep import mean_daily_ic
+from src.backtest.walkforward_ml import _clean_xy, make_model, score_accuracy
+from src.data.date_slices import DateSlicer
+from src.models.base import fit_model
+from src.utils.parallel import attach_arrays, run_in_pool, share_arrays, threads_per_worker
+
+
+# -------------------------------------------------
+# Splits: row index arrays over a (DATE, SYMBOL) index sorted by DATE
+# -------------------------------------------------
+@dataclass
+class CVSplit:
+    split_id: int
+    test_groups: tuple[int, ...]
+    train: np.ndarray        # row positions
+    test: np.ndarray         # row positions
+
+
+def _date_groups(n_dates: int, n_groups: int) -> list[np.ndarray]:
+    """Contiguous, near-equal blocks of date positions."""
+    if n_groups < 2 or n_groups > n_dates:
+        raise ValueError(f"need 2 <= n_groups <= {n_dates}, got {n_groups}")
+    return np.array_split(np.arange(n_dates), n_groups)
+
+
+def _train_dates(
+    n_dates: int,
+    test_dates: np.ndarray,
+    label_horizon: int,
+    embargo_days: int,
+) -> np.ndarray:
+    """
+    Boolean mask of training dates for a (possibly non-contiguous) test set.
+
+    For every contiguous test block [s, e] (date positions) a train date p
+    is dropped when its label window [p, p + h] overlaps the test labels
+    [s, e + h] (purge), and for `embargo_days` further dates after that
+    (embargo against serial correlation leaking back into training).
+    """
+    train = np.ones(n_dates, dtype=bool)
+    train[test_dates] = False
+
+    breaks = np.flatnonzero(np.diff(test_dates) > 1)
+    block_starts = test_dates[np.r_[0, breaks + 1]]
+    block_ends = test_dates[np.r_[breaks, len(test_dates) - 1]]
+
+    for s, e in zip(block_starts, block_ends):
+        lo = max(0, s - label_horizon)
+        hi = min(n_dates, e + label_horizon + embargo_days + 1)
+        train[lo:hi] = False
+
+    return train
+
+
+def _build_splits(
+    index: pd.Index,
+    n_groups: int,
+    test_group_sets: list[tuple[int, ...]],
+    label_horizon: int,
+    embargo_days: int,
+) -> list[CVSplit]:
+    slicer = DateSlicer(index)
+    n_dates = len(slicer.dates)
+    rows_per_date = slicer.ends - slicer.starts
+    groups = _date_groups(n_dates, n_groups)
+
+    splits: list[CVSplit] = []
+    for split_id, test_groups in enumerate(test_group_sets):
+        test_dates = np.concatenate([groups[g] for g in test_groups])
+
+        train_mask = _train_dates(n_dates, test_dates, label_horizon, embargo_days)
+        test_mask = np.zeros(n_dates, dtype=bool)
+        test_mask[test_dates] = True
+
+        splits.append(
+            CVSplit(
+                split_id=split_id,
+                test_groups=tuple(test_groups),
+                train=np.flatnonzero(np.repeat(train_mask, rows_per_date)),
+                test=np.flatnonzero(np.repeat(test_mask, rows_per_date)),
+            )
+        )
+
+    return splits
+
+
+def purged_kfold(
+    index: pd.Index,
+    n_splits: int = 5,
+    label_horizon: int = 1,
+    embargo_days: int = 5,
+) -> list[CVSplit]:
+    """
+    Purged K-fold over dates: K contiguous date blocks, each the test set
+    once; training uses every other date minus the purge / embargo zone
+    around the test block. `label_horizon` and `embargo_days` are in
+    trading days (label_horizon=1 for next_ret).
+    """
+    return _build_splits(
+        index, n_splits, [(k,) for k in range(n_splits)], label_horizon, embargo_days
+    )
+
+
+def combinatorial_purged_splits(
+    index: pd.Index,
+    n_groups: int = 6,
+    n_test_groups: int = 2,
+    label_horizon: int = 1,
+    embargo_days: int = 5,
+) -> list[CVSplit]:
+    """
+    Combinatorial purged CV: N date blocks, every choice of k of them is a
+    test set -> C(N, k) splits, each block tested C(N-1, k-1) times.
+    Purge / embargo are applied around every contiguous test block.
+    """
+    combos = list(itertools.combinations(range(n_groups), n_test_groups))
+    return _build_splits(index, n_groups, combos, label_horizon, embargo_days)
+
+
+# -------------------------------------------------
+# Persist / reuse splits
+# -------------------------------------------------
+SPLITS_META = "splits.json"
+
+
+def save_splits(splits: list[CVSplit], out_dir: Path) -> dict[str, Path]:
+    """
+    Write every split's train / test row arrays as .npy files (plus a
+    small splits.json) so the same splits can be memory-mapped by workers
+    and reloaded later to evaluate more models on identical folds.
+    """
+    paths = share_arrays(
+        {
+            f"{part}_{s.split_id}": getattr(s, part)
+            for s in splits
+            for part in ("train", "test")
+        },
+        out_dir,
+    )
+
+    with open(out_dir / SPLITS_META, "w", encoding="utf-8") as fh:
+        json.dump({str(s.split_id): list(s.test_groups) for s in splits}, fh, indent=2)
+
+    return paths
+
+
+def load_splits(out_dir: Path) -> list[CVSplit]:
+    """Memory-map splits written by `save_splits`."""
+    with open(out_dir / SPLITS_META, encoding="utf-8") as fh:
+        meta = json.load(fh)
+
+    return [
+        CVSplit(
+            split_id=int(split_id),
+            test_groups=tuple(groups),
+            train=np.load(out_dir / f"train_{split_id}.npy", mmap_mode="r"),
+            test=np.load(out_dir / f"test_{split_id}.npy", mmap_mode="r"),
+        )
+        for split_id, groups in meta.items()
+    ]
+
+
+# -------------------------------------------------
+# Parallel evaluation: (model, split) tasks over shared arrays
+# -------------------------------------------------
+_WORKER: dict = {}
+
+
+def _init_cv_worker(
+    data_paths: dict,
+    split_dir: Path,
+    columns: list[str],
+    models: dict[str, tuple[str, dict]],
+    nthread: int,
+) -> None:
+    arrays = attach_arrays(data_paths)
+
+    index = pd.MultiIndex.from_arrays(
+        [arrays["dates"], arrays["symbols"]],
+        names=["DATE", "SYMBOL"],
+    )
+
+    _WORKER.update(
+        features=pd.DataFrame(arrays["X"], index=index, columns=columns, copy=False),
+        labels=pd.Series(arrays["y"], index=index, name="next_ret", copy=False),
+        splits={s.split_id: s for s in load_splits(split_dir)},
+        models=models,
+        nthread=nthread,
+    )
+
+
+def _cv_worker(task: tuple[str, int]) -> dict:
+    name, split_id = task
+    split = _WORKER["splits"][split_id]
+    features, labels = _WORKER["features"], _WORKER["labels"]
+
+    X_train, y_train = _clean_xy(features.iloc[split.train], labels.iloc[split.train])
+    X_test, y_test = _clean_xy(features.iloc[split.test], labels.iloc[split.test])
+
+    engine, model_kwargs = _WORKER["models"][name]
+    model = make_model(engine, nthread=_WORKER["nthread"], model_kwargs=model_kwargs)
+
+    t0 = time.perf_counter()
+    fit_model(model, X_train, y_train)
+    train_seconds = time.perf_counter() - t0
+
+    scores = model.predict(X_test)
+    df_scores = scores.reset_index().assign(next_ret=y_test.values)
+
+    return {
+        "MODEL": name,
+        "SPLIT": split_id,
+        "TEST_GROUPS": "-".join(map(str, split.test_groups)),
+        "train_rows": len(y_train),
+        "test_rows": len(y_test),
+        "train_seconds": train_seconds,
+        **score_accuracy(scores, y_test),
+        "Daily_IC": mean_daily_ic(df_scores),
+    }
+
+
+def cross_validate(
+    features: pd.DataFrame,
+    labels: pd.Series,
+    splits: list[CVSplit],
+    models: dict[str, tuple[str, dict]] | None = None,
+    n_jobs: int = 4,
+) -> pd.DataFrame:
+    """
+    Evaluate every model on every split across `n_jobs` processes.
+
+    `models` maps a name to (engine, model_kwargs) as understood by
+    walkforward_ml.make_model, e.g.
+        {"xgb_d4": ("xgb", {"params": {"max_depth": 4}}),
+         "ridge":  ("ridge", {"alpha": 10.0})}
+    Features, labels and the split index arrays are written once and
+    memory-mapped by every worker. Returns one row per (model, split).
+    """
+    models = models or {"xgb": ("xgb", {})}
+    nthread = threads_per_worker(n_jobs)
+
+    with tempfile.TemporaryDirectory(prefix="cv_") as tmp:
+        tmp = Path(tmp)
+        data_paths = share_arrays(
+            {
+                "X": features.to_numpy(dtype=np.float64),
+                "y": labels.to_numpy(dtype=np.float64),
+                "dates": features.index.get_level_values("DATE").values,
+                "symbols": features.index.get_level_values("SYMBOL").values,
+            },
+            tmp / "data",
+        )
+        save_splits(splits, tmp / "splits")
+
+        tasks = [(name, s.split_id) for name in models for s in splits]
+        rows = run_in_pool(
+            _cv_worker,
+            tasks,
+            n_jobs=n_jobs,
+            nthread=nthread,
+            initializer=_init_cv_worker,
+            initargs=(data_paths, tmp / "splits", list(features.columns), models, nthread),
+        )
+
+    results = pd.DataFrame(rows)
+
+    summary = results.groupby("MODEL")[["IC", "Daily_IC", "Hit_Rate", "RMSE", "train_seconds"]].agg(
+        ["mean", "std"]
+    )
+    print("\n📊 PURGED CV SUMMARY")
+    print(summary.to_string())
+
+    return results
@@ -0,0 +1,204 @@
+# src/backtest/grid.py
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config.paths import REPORTS_DIR
+from src.backtest.engine import compute_metrics
+from src.backtest.matrix import holding_returns, to_panel, topk_weight_panel
+from src.backtest.risk import volatility_targeting_array
+from src.backtest.run_backtest import load_with_returns
+from src.backtest.sweep import config_key, param_grid
+from src.signals.regime import align_regime, load_regime_exposure
+from src.utils.parallel import attach_arrays, iter_in_pool, share_arrays
+
+
+GRID_RESULTS = REPORTS_DIR / "backtest_grid_results.csv"
+
+# engine.compute_metrics keys (missing when a combo has no valid day)
+METRIC_COLS = ("CAGR", "Volatility", "Sharpe", "Max_Drawdown", "Win_Rate")
+
+# 3 x 3 x 3 x 2 x 3 = 162 combinations
+DEFAULT_GRID = {
+    "top_n": [3, 5, 10],
+    "cost_bps": [0.0, 3.5, 10.0],
+    "regime": ["none", "ema_trend", "majority"],
+    "vol_target": [None, 0.15],
+    "hold": [1, 3, 5],
+}
+
+
+# -------------------------------------------------
+# Shared inputs: score / return panels + regime exposures
+# -------------------------------------------------
+def prepare_inputs(
+    df: pd.DataFrame,
+    regimes: list[str],
+    score_col: str = "RANK",
+) -> dict[str, np.ndarray]:
+    """
+    DATE x SYMBOL panels of `score_col` and next_ret from a long frame, plus
+    one exposure row per regime model ("none" = always fully invested).
+    """
+    scores = to_panel(df, score_col)
+    rets = to_panel(df, "next_ret").reindex_like(scores)
+
+    exposure = []
+    for name in regimes:
+        if name == "none":
+            exposure.append(np.ones(len(scores)))
+            continue
+        exposure.append(align_regime(load_regime_exposure(name), scores.index).astype(float))
+
+    return {
+        "scores": scores.to_numpy(dtype=np.float64),
+        "returns": rets.to_numpy(dtype=np.float64),
+        "exposure": np.vstack(exposure),
+    }
+
+
+# -------------------------------------------------
+# Worker: one parameter combination on the memmapped panels
+# -------------------------------------------------
+_WORKER: dict = {}
+
+
+def _init_grid_worker(paths: dict, regimes: list[str], largest: bool) -> None:
+    _WORKER.update(attach_arrays(paths), regimes=regimes, largest=largest)
+
+
+def evaluate_combo(
+    config: dict,
+    scores: np.ndarray,
+    returns: np.ndarray,
+    exposure: np.ndarray,
+    largest: bool = False,
+) -> dict:
+    """
+    Top-N book (equal weight), zeroed on risk-off days, optionally vol
+    targeted, held `hold` days, charged `cost_bps` per unit turnover.
+    """
+    W = topk_weight_panel(scores, config["top_n"], largest)
+
+    leverage = exposure.copy()
+    if config.get("vol_target") is not None:
+        # Same rule as run_backtest: std of the day's valid pick returns
+        std = pd.DataFrame(np.where(W > 0, returns, np.nan)).std(axis=1).to_numpy()
+        leverage = leverage * volatility_targeting_array(std, target_vol=config["vol_target"])
+
+    W = W * (exposure > 0)[:, None]
+    res = holding_returns(W, returns, config["hold"], config["cost_bps"], leverage=leverage)
+
+    net = pd.Series(res["net"]).dropna()
+    stats = compute_metrics(net) if len(net) else {}
+
+    return {
+        "config_key": config_key(config),
+        **config,
+        **stats,
+        "Turnover": float(np.mean(res["turnover"])),
+        "n_days": len(net),
+    }
+
+
+def _grid_worker(config: dict) -> dict:
+    w = _WORKER
+    exposure = w["exposure"][w["regimes"].index(config["regime"])]
+    return evaluate_combo(config, w["scores"], w["returns"], exposure, w["largest"])
+
+
+# -------------------------------------------------
+# Runner (process pool, resumable)
+# -------------------------------------------------
+def load_results(path: Path = GRID_RESULTS) -> pd.DataFrame:
+    if not path.exists():
+        return pd.DataFrame()
+    return pd.read_csv(path)
+
+
+def result_columns(configs: list[dict]) -> list[str]:
+    """Fixed column order of the results file (every key of every config)."""
+    params = dict.fromkeys(k for c in configs for k in c)
+    return ["config_key", *params, *METRIC_COLS, "Turnover", "n_days"]
+
+
+def run_grid(
+    df: pd.DataFrame,
+    configs: list[dict],
+    n_jobs: int = 4,
+    score_col: str = "RANK",
+    largest: bool = False,
+    out_path: Path = GRID_RESULTS,
+) -> pd.DataFrame:
+    """
+    Evaluate every config on the same panels. The panels are written once
+    as memmapped .npy files and attached read-only by each worker process;
+    each finished config is appended to `out_path` immediately and configs
+    already in it are skipped, so an interrupted run resumes.
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    done = load_results(out_path)
+    done_keys = set(done["config_key"]) if not done.empty else set()
+
+    todo = [c for c in configs if config_key(c) not in done_keys]
+
+    # Rows are appended one by one: write every row against the same header
+    columns = list(done.columns) if not done.empty else result_columns(configs)
+    print(f"🔎 Grid: {len(configs)} configs, {len(configs) - len(todo)} already done")
+
+    if todo:
+        regimes = sorted({c["regime"] for c in todo})
+        inputs = prepare_inputs(df, regimes, score_col)
+        t0 = time.perf_counter()
+
+        with tempfile.TemporaryDirectory(prefix="grid_") as tmp:
+            paths = share_arrays(inputs, Path(tmp))
+
+            for i, row in enumerate(
+                iter_in_pool(
+                    _grid_worker,
+                    todo,
+                    n_jobs=n_jobs,
+                    nthread=1,
+                    initializer=_init_grid_worker,
+                    initargs=(paths, regimes, largest),
+                ),
+                start=1,
+            ):
+                pd.DataFrame([row]).reindex(columns=columns).to_csv(
+                    out_path,
+                    mode="a",
+                    header=not out_path.exists(),
+                    index=False,
+                )
+                if i % 25 == 0 or i == len(todo):
+                    print(f"✅ {i}/{len(todo)} configs ({time.perf_counter() - t0:.1f}s)")
+
+    results = load_results(out_path)
+    return results.sort_values("Sharpe", ascending=False).reset_index(drop=True)
+
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Parameter-grid backtest over the ranking history.")
+    parser.add_argument("--n-jobs", type=int, default=4)
+    args = parser.parse_args()
+
+    df = load_with_returns()
+    results = run_grid(df, param_grid(DEFAULT_GRID), n_jobs=args.n_jobs)
+
+    print("\n📊 TOP CONFIGS (by Sharpe)")
+    print(results.head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# src/backtest/ic.py
+from __future__ import annotations
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from src.config.paths import REPORTS_DIR
+
+
+HORIZONS = (1, 2, 5, 10, 20)
+METHODS = ("spearman", "pearson")
+
+
+# -------------------------------------------------
+# Forward returns at several horizons
+# -------------------------------------------------
+def forward_returns(
+    df: pd.DataFrame,
+    horizons: tuple[int, ...] = HORIZONS,
+    price_col: str = "adj_close",
+) -> pd.DataFrame:
+    """
+    h-day forward return per symbol for every h: columns 1, 2, 5, ...
+    aligned with df. Rows must be in date order within each SYMBOL.
+    """
+    px = df[price_col]
+    g = px.groupby(df["SYMBOL"])
+    return pd.DataFrame({h: g.shift(-h) / px - 1.0 for h in horizons}, index=df.index)
+
+
+# -------------------------------------------------
+# Date x symbol panels
+# -------------------------------------------------
+def _row_ranks(a: np.ndarray) -> np.ndarray:
+    """
+    Average ranks (1..n) along each row, NaN left as NaN — same as
+    pandas rank(method="average") per date, for every date at once.
+    """
+    n_rows, n_cols = a.shape
+    order = np.argsort(a, axis=1)  # NaN sorts last
+    s = np.take_along_axis(a, order, axis=1)
+
+    # Tie groups: a new group wherever the sorted value changes (and at
+    # every row start); each group gets the mean of its 1-based positions
+    new = np.ones(s.shape, dtype=bool)
+    new[:, 1:] = s[:, 1:] != s[:, :-1]
+    gid = np.cumsum(new.ravel()) - 1
+    pos = np.tile(np.arange(1, n_cols + 1, dtype=np.float64), n_rows)
+    avg = np.bincount(gid, weights=pos) / np.bincount(gid)
+
+    ranks = np.empty_like(s)
+    np.put_along_axis(ranks, order, avg[gid].reshape(n_rows, n_cols), axis=1)
+    ranks[np.isnan(a)] = np.nan
+    return ranks
+
+
+def _masked_ranks(a: np.ndarray, ranked: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    Ranks of `a` over `mask` only. `ranked` (ranks over a's own non-NaN
+    entries) is reused on every row the mask leaves intact; only rows
+    where the mask drops a valid entry are re-ranked.
+    """
+    out = np.where(mask, ranked, np.nan)
+    redo = (~np.isnan(a) & ~mask).any(axis=1) & mask.any(axis=1)
+    if redo.any():
+        out[redo] = _row_ranks(np.where(mask[redo], a[redo], np.nan))
+    return out
+
+
+def _row_corr(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Per-row Pearson over entries where both x and y are present."""
+    m = ~np.isnan(x) & ~np.isnan(y)
+    n = m.sum(axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        xc = np.where(m, x - (np.where(m, x, 0.0).sum(axis=1) / n)[:, None], 0.0)
+        yc = np.where(m, y - (np.where(m, y, 0.0).sum(axis=1) / n)[:, None], 0.0)
+        ic = (xc * yc).sum(axis=1) / np.sqrt((xc * xc).sum(axis=1) * (yc * yc).sum(axis=1))
+
+    ic[~np.isfinite(ic) | (n < 2)] = np.nan
+    return ic
+
+
+# -------------------------------------------------
+# Daily cross-sectional IC
+# -------------------------------------------------
+def daily_ic(
+    df: pd.DataFrame,
+    signals: list[str],
+    returns: pd.DataFrame,
+    method: str = "spearman",
+) -> pd.DataFrame:
+    """
+    Cross-sectional IC of every signal vs every forward-return column
+    (`returns`, aligned with df), for every DATE at once.
+
+    The long frame is laid out as date x symbol panels (one row per
+    (DATE, SYMBOL) expected). Each signal and each return column is ranked
+    once; for a (signal, horizon) pair only the dates where the other side
+    is missing some symbols are re-ranked, so Spearman is exact (ranks over
+    the rows where both exist) without a grouped rank per pair.
+
+    Returns DATE x (signal, horizon) columns.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+
+    d_codes, dates = pd.factorize(df["DATE"], sort=True)
+    s_codes, symbols = pd.factorize(df["SYMBOL"])
+
+    def to_panel(values) -> np.ndarray:
+        panel = np.full((len(dates), len(symbols)), np.nan)
+        panel[d_codes, s_codes] = np.asarray(values, dtype=np.float64)
+        return panel
+
+    spearman = method == "spearman"
+
+    rets = {}
+    for h in returns.columns:
+        r = to_panel(returns[h])
+        rets[h] = (r, _row_ranks(r) if spearman else r)
+
+    out = {}
+    for s in signals:
+        x = to_panel(df[s])
+        x_ranked = _row_ranks(x) if spearman else x
+
+        for h, (r, r_ranked) in rets.items():
+            mask = ~np.isnan(x) & ~np.isnan(r)
+            if spearman:
+                out[(s, h)] = _row_corr(
+                    _masked_ranks(x, x_ranked, mask),
+                    _masked_ranks(r, r_ranked, mask),
+                )
+            else:
+                out[(s, h)] = _row_corr(x, r)
+
+    ic = pd.DataFrame(out, index=pd.DatetimeIndex(dates, name="DATE"))
+    ic.columns.names = ["signal", "horizon"]
+    return ic
+
+
+def ic_panel(
+    df: pd.DataFrame,
+    signals: list[str],
+    horizons: tuple[int, ...] = HORIZONS,
+    price_col: str = "adj_close",
+    method: str = "spearman",
+) -> pd.DataFrame:
+    """Forward returns + `daily_ic` in one call (df: DATE, SYMBOL, price, signals)."""
+    return daily_ic(df, signals, forward_returns(df, horizons, price_col), method)
+
+
+# -------------------------------------------------
+# Summaries: rolling mean, t-stats, decay
+# -------------------------------------------------
+def rolling_ic(ic: pd.DataFrame, window: int = 63) -> pd.DataFrame:
+    """Rolling mean IC per (signal, horizon)."""
+    return ic.rolling(window, min_periods=max(1, window // 2)).mean()
+
+
+def ic_summary(ic: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per (signal, horizon):
+      IC_mean, IC_std, IR (= mean / std), Hit_Rate (share of days IC > 0),
+      n_days, t_stat.
+
+    h-day forward returns overlap, so daily ICs are not independent; the
+    t-stat uses n_days / h effective observations.
+    """
+    n = ic.count()
+    mean = ic.mean()
+    std = ic.std()
+    horizon = pd.Series(ic.columns.get_level_values("horizon"), index=ic.columns)
+
+    summary = pd.DataFrame(
+        {
+            "IC_mean": mean,
+            "IC_std": std,
+            "IR": mean / std,
+            "Hit_Rate": (ic > 0).sum() / n,
+            "n_days": n,
+            "t_stat": mean / std * np.sqrt(n / horizon),
+        }
+    )
+    return summary
+
+
+def ic_decay(ic: pd.DataFrame) -> pd.DataFrame:
+    """Mean IC as signal x horizon: how fast each signal's edge fades."""
+    return ic.mean().unstack("horizon")
+
+
+# -------------------------------------------------
+# CLI: momentum features over the full history
+# -------------------------------------------------
+def main() -> None:
+    from src.features.momentum import add_momentum_features
+    from src.signals.ml_signals import load_all_history
+
+    parser = argparse.ArgumentParser(description="Daily IC / decay of signal columns.")
+    parser.add_argument("--method", choices=METHODS, default="spearman")
+    parser.add_argument("--window", type=int, default=63, help="Rolling IC window (days)")
+    args = parser.parse_args()
+
+    df = add_momentum_features(load_all_history())
+    signals = [c for c in df.columns if c.startswith("mom_")]
+
+    ic = ic_panel(df, signals, method=args.method)
+    summary = ic_summary(ic)
+    decay = ic_decay(ic)
+
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    summary.to_csv(REPORTS_DIR / "ic_summary.csv")
+    decay.to_csv(REPORTS_DIR / "ic_decay.csv")
+    rolling_ic(ic, args.window).to_csv(REPORTS_DIR / "ic_rolling.csv")
+
+    print("\n📊 IC SUMMARY")
+    print(summary.round(4).to_string())
+    print("\n📉 IC DECAY (mean IC by horizon)")
+    print(decay.round(4).to_string())
+    print(f"💾 Saved -> {REPORTS_DIR}")
+
+
+if __name__ == "__main__":
+    main()
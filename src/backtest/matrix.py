@@ -0,0 +1,207 @@
+# src/backtest/matrix.py
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from src.utils.topk import topk_by_group, topk_panel
+
+
+# -------------------------------------------------
+# Long frame <-> date x symbol panels
+# -------------------------------------------------
+def to_panel(df: pd.DataFrame, value_col: str) -> pd.DataFrame:
+    """DATE x SYMBOL panel of one column (one row per (DATE, SYMBOL))."""
+    return df.pivot(index="DATE", columns="SYMBOL", values=value_col).sort_index()
+
+
+def topk_weights(
+    df: pd.DataFrame,
+    score_col: str,
+    k: int,
+    largest: bool = True,
+) -> pd.DataFrame:
+    """
+    Equal-weight top-k book per DATE as a DATE x SYMBOL weight panel:
+    1/k on each pick (1/#picks on days with fewer candidates), 0 elsewhere.
+    Only dates with at least one pick get a row.
+    """
+    picks = df.iloc[topk_by_group(df, score_col, k, largest=largest)]
+    n = picks.groupby("DATE")["SYMBOL"].transform("size")
+
+    return (
+        picks.assign(_w=1.0 / n)
+        .pivot(index="DATE", columns="SYMBOL", values="_w")
+        .sort_index()
+        .fillna(0.0)
+    )
+
+
+def topk_weight_panel(scores: np.ndarray, k: int, largest: bool = True) -> np.ndarray:
+    """
+    Equal-weight top-k book for every row of a (T, N) score panel (NaN
+    never picked, ties -> lower column), as a (T, N) weight array.
+    """
+    picks = topk_panel(scores, k, largest)
+    rows, slots = np.nonzero(picks >= 0)
+    n = (picks >= 0).sum(axis=1)
+
+    W = np.zeros(np.shape(scores))
+    W[rows, picks[rows, slots]] = 1.0 / n[rows]
+    return W
+
+
+# -------------------------------------------------
+# Core: weights x returns -> returns, turnover, costs
+# -------------------------------------------------
+def portfolio_returns(
+    weights: np.ndarray,
+    returns: np.ndarray,
+    cost_bps: float = 0.0,
+    fixed_cost: np.ndarray | float = 0.0,
+    leverage: np.ndarray | float = 1.0,
+) -> dict[str, np.ndarray]:
+    """
+    Array-only backtest of (..., T, N) weights against (..., T, N) returns
+    (weights[t] earns returns[t], i.e. pass next-day returns). Any leading
+    dimensions are independent strategy variants.
+
+    - a position whose return is NaN is dropped and the rest of the book
+      is rescaled to the same gross exposure (equal weights -> mean of the
+      valid picks)
+    - a day with weights but no valid return is NaN (callers skip it);
+      a day with no weights at all is flat and returns 0
+    - turnover = sum |held_t - held_t-1|; cost = turnover * cost_bps
+      + fixed_cost (per-day drag, e.g. liquidity slippage)
+    - net = gross * leverage - cost (leverage: per-day scale such as vol
+      targeting or regime exposure)
+
+    Returns dict of (..., T) arrays: gross, turnover, cost, net.
+    """
+    W = np.asarray(weights, dtype=np.float64)
+    R = np.asarray(returns, dtype=np.float64)
+
+    valid = (W != 0) & ~np.isnan(R)
+    book = np.abs(W).sum(axis=-1)
+    live = np.where(valid, np.abs(W), 0.0).sum(axis=-1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        held = np.where(valid, W, 0.0) * np.where(live > 0, book / live, 0.0)[..., None]
+
+    gross = np.where(valid, held * np.where(valid, R, 0.0), 0.0).sum(axis=-1)
+    gross = np.where(book == 0, 0.0, np.where(live > 0, gross, np.nan))
+
+    prev = np.zeros_like(held)
+    prev[..., 1:, :] = held[..., :-1, :]
+    turnover = np.abs(held - prev).sum(axis=-1)
+
+    cost = turnover * (cost_bps / 10000.0) + fixed_cost
+    net = gross * leverage - cost
+
+    return {"gross": gross, "turnover": turnover, "cost": cost, "net": net}
+
+
+def _pnl_frame(dates: pd.Index, res: dict[str, np.ndarray]) -> pd.DataFrame:
+    pnl = pd.DataFrame(
+        {
+            "DATE": dates,
+            "gross_return": res["gross"],
+            "turnover": res["turnover"],
+            "cost": res["cost"],
+            "portfolio_return": res["net"],
+        }
+    )
+    pnl = pnl.dropna(subset=["portfolio_return"]).reset_index(drop=True)
+    pnl["equity"] = (1.0 + pnl["portfolio_return"]).cumprod()
+    return pnl
+
+
+def matrix_backtest(
+    weights: pd.DataFrame,
+    returns: pd.DataFrame,
+    cost_bps: float = 0.0,
+    fixed_cost: np.ndarray | float = 0.0,
+    leverage: np.ndarray | float = 1.0,
+) -> pd.DataFrame:
+    """
+    `portfolio_returns` on DATE x SYMBOL panels (returns aligned to the
+    weights). Days without a valid return are dropped before compounding.
+
+    Columns: DATE, gross_return, turnover, cost, portfolio_return, equity.
+    """
+    returns = returns.reindex(index=weights.index, columns=weights.columns)
+    res = portfolio_returns(weights.to_numpy(), returns.to_numpy(), cost_bps, fixed_cost, leverage)
+    return _pnl_frame(weights.index, res)
+
+
+# -------------------------------------------------
+# Overlapping H-day holding periods
+# -------------------------------------------------
+def staggered_weights(weights: np.ndarray, horizon: int) -> np.ndarray:
+    """
+    (H, T, N) books of the H staggered sub-portfolios: sub-portfolio j
+    rebalances on days t with t % H == j and holds that target book until
+    its next rebalance (cash before its first one).
+    """
+    W = np.asarray(weights, dtype=np.float64)
+    T = W.shape[0]
+
+    t = np.arange(T)
+    j = np.arange(horizon)[:, None]
+    last = t - (t - j) % horizon          # (H, T) last rebalance day <= t
+
+    padded = np.concatenate([np.zeros((1,) + W.shape[1:]), W])
+    return padded[np.where(last >= 0, last + 1, 0)]
+
+
+def holding_returns(
+    weights: np.ndarray,
+    returns: np.ndarray,
+    horizon: int,
+    cost_bps: float = 0.0,
+    fixed_cost: np.ndarray | float = 0.0,
+    leverage: np.ndarray | float = 1.0,
+) -> dict[str, np.ndarray]:
+    """
+    `portfolio_returns` for an H-day holding period: the H staggered
+    sub-portfolios run as variants and are averaged per day (return over
+    the sub-portfolios with a valid return, turnover / cost over all).
+    """
+    res = portfolio_returns(staggered_weights(weights, horizon), returns, cost_bps, fixed_cost, leverage)
+
+    n_live = (~np.isnan(res["net"])).sum(axis=0)
+    live = np.where(n_live > 0, n_live, np.nan)
+
+    return {
+        "gross": np.nansum(res["gross"], axis=0) / live,
+        "net": np.nansum(res["net"], axis=0) / live,
+        "turnover": res["turnover"].mean(axis=0),
+        "cost": res["cost"].mean(axis=0),
+    }
+
+
+def holding_period_backtest(
+    weights: pd.DataFrame,
+    returns: pd.DataFrame,
+    horizons: tuple[int, ...] = (1, 3, 5),
+    cost_bps: float = 0.0,
+    fixed_cost: np.ndarray | float = 0.0,
+    leverage: np.ndarray | float = 1.0,
+) -> dict[int, pd.DataFrame]:
+    """
+    H-day holding periods as H overlapping staggered sub-portfolios, each
+    rebalanced every H days; the portfolio return is the average of the
+    sub-portfolios with a valid return that day (H = 1 is the daily
+    `matrix_backtest`). `weights` are daily target books and `returns`
+    next-day returns; both panels are aligned once and shared by every H.
+
+    Returns {H: pnl frame} with the `matrix_backtest` columns; turnover and
+    cost are averaged over the sub-portfolios (each holds 1/H of capital).
+    """
+    R = returns.reindex(index=weights.index, columns=weights.columns).to_numpy(dtype=np.float64)
+    W = weights.to_numpy(dtype=np.float64)
+
+    return {
+        h: _pnl_frame(weights.index, holding_returns(W, R, h, cost_bps, fixed_cost, leverage))
+        for h in horizons
+    }
@@ -33,3 +33,27 @@ def liquidity_slippage(trdval: float) -> float:
         return 0.0015
     else:
         return 0.0010
+
+
+# -------------------------------------------------
+# Vectorized versions (one value per day)
+# -------------------------------------------------
+def volatility_targeting_array(
+    daily_std: np.ndarray,
+    target_vol: float = 0.15,
+    min_vol: float = 0.05,
+) -> np.ndarray:
+    """`volatility_targeting` from per-day return std (NaN -> 1.0)."""
+    realized_vol = np.asarray(daily_std, dtype=np.float64) * (252 ** 0.5)
+    scale = np.minimum(target_vol / np.maximum(realized_vol, min_vol), 1.0)
+    return np.where(np.isnan(realized_vol), 1.0, scale)
+
+
+def liquidity_slippage_array(trdval: np.ndarray) -> np.ndarray:
+    """`liquidity_slippage` for an array of traded values."""
+    trdval = np.asarray(trdval, dtype=np.float64)
+    return np.select(
+        [np.isnan(trdval) | (trdval <= 0), trdval < 5e7, trdval < 2e8],
+        [0.0025, 0.0020, 0.0015],
+        default=0.0010,
+    )
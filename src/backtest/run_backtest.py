@@ -1,95 +1,193 @@
 from __future__ import annotations
+import argparse
+
 import pandas as pd
 
-from src.config.paths import PROCESSED_DIR, REPORTS_DIR
+from src.config.paths import REPORTS_DIR
+from src.config.settings import BACKTEST_SETTINGS
+from src.backtest.costs import load_liquidity_panels, transaction_costs
 from src.backtest.engine import compute_metrics
-from src.backtest.risk import volatility_targeting, liquidity_slippage
-from src.data.loader import load_regime_index
-from src.signals.regime import detect_market_regime
+from src.backtest.matrix import holding_period_backtest, matrix_backtest, to_panel, topk_weights
+from src.backtest.risk import liquidity_slippage_array, volatility_targeting_array
+from src.signals.rank_store import load_rank_history
+from src.signals.regime import align_regime, load_regime_exposure
 
 
 
 # -------------------------------------------------
 # Load historical daily rankings
 # -------------------------------------------------
-def load_rankings() -> pd.DataFrame:
-    path = PROCESSED_DIR / "daily_ranking_history.csv"
-    if not path.exists():
-        raise FileNotFoundError(path)
+def load_rankings(
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+) -> pd.DataFrame:
+    """Rank history for [start, end]; only the overlapping month files are read."""
+    df = load_rank_history(start, end)
+
+    # Snapshot / backfilled histories carry CLOSE only
+    if "adj_close" not in df.columns:
+        df["adj_close"] = df["CLOSE"]
+
+    return df
+
+
+def load_with_returns(
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+) -> pd.DataFrame:
+    """
+    Rankings for [start, end] with daily_ret / next_ret. Ranks are read a
+    few days past `end` so its next-day return exists.
+    """
+    load_end = None if end is None else pd.Timestamp(end) + pd.Timedelta(days=10)
+    df = load_rankings(start, load_end)
+    df = df.sort_values(["SYMBOL", "DATE"]).reset_index(drop=True)
 
-    return pd.read_csv(path, parse_dates=["DATE"])
+    df["daily_ret"] = df.groupby("SYMBOL")["adj_close"].pct_change()
+    df["next_ret"] = df.groupby("SYMBOL")["daily_ret"].shift(-1)
+
+    if end is not None:
+        df = df.loc[df["DATE"] <= pd.Timestamp(end)]
+
+    return df
 
 
 # -------------------------------------------------
 # DAILY REBALANCED BACKTEST (HARDENED + REGIME)
 # -------------------------------------------------
-def run_backtest(top_n: int = 5) -> pd.DataFrame:
-    df = load_rankings()
-    df = df.sort_values(["SYMBOL", "DATE"]).reset_index(drop=True)
+def run_backtest(
+    top_n: int = 5,
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+    regime_model: str = "ema_trend",
+    cost_model: str = "flat",
+    band: float = BACKTEST_SETTINGS.no_trade_band,
+) -> pd.DataFrame:
+    """
+    Daily top-N backtest over [start, end] (whole history by default).
+    `regime_model` picks the risk-on filter (see signals.regime); "hmm"
+    scales each day's position by the HMM calm-state probability.
+    `cost_model` "flat" charges the picks' liquidity slippage every day;
+    "bps" / "tiered" / "sqrt" charge per-symbol turnover of the levered
+    book (see costs.transaction_costs), after a `band` no-trade band.
+    """
+    df = load_with_returns(start, end)
 
     # ---------------------------------------------
-    # MARKET REGIME (NIFTY)
+    # MARKET REGIME (cached frame -> exposure per day)
     # ---------------------------------------------
-    from src.data.loader import load_regime_index
-
-    index_df = load_regime_index()
-
-    regime = detect_market_regime(index_df)
-
-    # ---------------------------------------------
-    # Returns
-    # ---------------------------------------------
-    df["daily_ret"] = df.groupby("SYMBOL")["adj_close"].pct_change()
-    df["next_ret"] = df.groupby("SYMBOL")["daily_ret"].shift(-1)
-
-    results = []
-
-    for date, day_df in df.groupby("DATE"):
+    regime = load_regime_exposure(regime_model)
+
+    # Top-N by RANK for every day at once -> equal-weight matrix.
+    # Every date gets a row: days without picks stay flat (0 return)
+    dates = pd.DatetimeIndex(df["DATE"].dropna().unique()).sort_values()
+    weights = topk_weights(df, "RANK", top_n, largest=False).reindex(dates, fill_value=0.0)
+    rets = to_panel(df, "next_ret").reindex_like(weights)
+    picked = rets.where(weights > 0)
+
+    # Exposure per rebalance day (0 = risk off → flat), one vectorized lookup
+    exposure = align_regime(regime, weights.index).astype(float)
+    weights = weights.mul(exposure > 0, axis=0)
+
+    # Vol targeting on the day's valid pick returns
+    vol_scale = volatility_targeting_array(picked.std(axis=1).to_numpy())
+
+    if cost_model == "flat":
+        # Liquidity slippage on the picks' median traded value
+        if "TRDVAL" in df.columns:
+            trdval = to_panel(df, "TRDVAL").reindex_like(weights).where(weights > 0)
+            cost = liquidity_slippage_array(trdval.median(axis=1).to_numpy())
+        else:
+            cost = 0.002
 
-        # ❌ RISK OFF → stay flat
-        if date not in regime.index or not regime.loc[date]:
-            results.append((date, 0.0))
-            continue
+        # Charged only on days that hold a book
+        traded = (weights > 0).any(axis=1).to_numpy()
 
-        picks = (
-            day_df
-            .sort_values("RANK")
-            .head(top_n)
+        pnl = matrix_backtest(
+            weights,
+            rets,
+            fixed_cost=cost * exposure * traded,
+            leverage=vol_scale * exposure,
         )
+    else:
+        # Turnover costs on the book actually traded (leverage folded in)
+        book = weights.mul(vol_scale * exposure, axis=0)
+        panels = {}
+        if cost_model == "tiered":
+            if "TRDVAL" not in df.columns:
+                raise ValueError("tiered costs need TRDVAL in the rank history")
+            panels["trdval"] = to_panel(df, "TRDVAL").reindex_like(book).to_numpy()
+        elif cost_model == "sqrt":
+            adv, vol = load_liquidity_panels()
+            panels["adv"] = adv.reindex_like(book).to_numpy()
+            panels["vol"] = vol.reindex_like(book).to_numpy()
+
+        tc = transaction_costs(book.to_numpy(), cost_model, band=band, **panels)
+        held = pd.DataFrame(tc["held"], index=book.index, columns=book.columns)
+        pnl = matrix_backtest(held, rets, fixed_cost=tc["total"])
+
+    pnl = pnl[["DATE", "portfolio_return", "equity"]]
 
-        rets = picks["next_ret"].dropna()
-        if len(rets) == 0:
-            continue
-
-        raw_ret = rets.mean()
+    return pnl
 
-        # Vol targeting
-        vol_scale = volatility_targeting(rets)
-        scaled_ret = raw_ret * vol_scale
 
-        # Liquidity slippage
-        if "TRDVAL" in picks.columns:
-            cost = liquidity_slippage(picks["TRDVAL"].median())
-        else:
-            cost = 0.002
-
-        net_ret = scaled_ret - cost
-        results.append((date, net_ret))
+# -------------------------------------------------
+# H-DAY HOLDING PERIODS (overlapping sub-portfolios)
+# -------------------------------------------------
+def run_holding_backtests(
+    top_n: int = 5,
+    horizons: tuple[int, ...] = (1, 3, 5),
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+) -> dict[int, pd.DataFrame]:
+    """
+    Top-N by RANK held for H days, for every H in `horizons` from the same
+    weight / return matrices. Turnover is charged slippage + brokerage bps.
+    """
+    df = load_with_returns(start, end)
 
-    pnl = pd.DataFrame(results, columns=["DATE", "portfolio_return"])
-    pnl = pnl.sort_values("DATE").reset_index(drop=True)
-    pnl["equity"] = (1 + pnl["portfolio_return"]).cumprod()
+    weights = topk_weights(df, "RANK", top_n, largest=False)
+    cost_bps = BACKTEST_SETTINGS.slippage_bps + BACKTEST_SETTINGS.brokerage_per_turnover_bps
 
-    return pnl
+    return holding_period_backtest(weights, to_panel(df, "next_ret"), horizons, cost_bps=cost_bps)
 
 
 # -------------------------------------------------
 # Runner
 # -------------------------------------------------
 def main():
+    parser = argparse.ArgumentParser(description="Daily top-N backtest.")
+    parser.add_argument(
+        "--costs",
+        choices=("flat", "bps", "tiered", "sqrt"),
+        default="flat",
+        help="Transaction cost model (see costs.transaction_costs)",
+    )
+    parser.add_argument("--band", type=float, default=BACKTEST_SETTINGS.no_trade_band)
+    parser.add_argument(
+        "--hold",
+        type=int,
+        nargs="+",
+        default=None,
+        help="Holding periods in days (e.g. --hold 1 3 5) -> backtest_hold_<H>d.csv",
+    )
+    args = parser.parse_args()
+
     REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 
-    pnl = run_backtest(top_n=5)
+    if args.hold:
+        for h, pnl in run_holding_backtests(top_n=5, horizons=tuple(args.hold)).items():
+            pnl[["DATE", "portfolio_return", "equity"]].to_csv(
+                REPORTS_DIR / f"backtest_hold_{h}d.csv", index=False
+            )
+            stats = compute_metrics(pnl["portfolio_return"])
+            print(
+                f"📊 HOLD {h}D: CAGR {stats['CAGR']:.4f}  Sharpe {stats['Sharpe']:.4f}  "
+                f"turnover {pnl['turnover'].mean():.3f}/day"
+            )
+        return
+
+    pnl = run_backtest(top_n=5, cost_model=args.costs, band=args.band)
     out = REPORTS_DIR / "backtest_top5_daily_hardened_regime.csv"
     pnl.to_csv(out, index=False)
 
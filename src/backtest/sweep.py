@@ -0,0 +1,276 @@
+# src/backtest/sweep.py
+from __future__ import annotations
+
+import argparse
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config.paths import REPORTS_DIR
+from src.backtest.engine import compute_metrics
+from src.backtest.ic import daily_ic
+from src.backtest.walkforward_ml import build_pnl_from_scores, split_fold
+from src.data.date_slices import DateSlicer
+from src.models.registry import params_hash
+from src.models.xgb_signal_model import FeatureMatrix, XGBSignalModel
+from src.utils.parallel import threads_per_worker
+
+
+SWEEP_RESULTS = REPORTS_DIR / "xgb_sweep_results.csv"
+
+DEFAULT_GRID = {
+    "max_depth": [3, 4, 5, 6],
+    "eta": [0.01, 0.03, 0.1],
+    "max_bin": [64, 256, 512],
+}
+
+# evaluate_config metrics, written after the config's params
+METRIC_COLS = ("IC", "IC_min", "Sharpe", "CAGR", "Max_Drawdown", "train_seconds")
+
+
+# -------------------------------------------------
+# Config generation
+# -------------------------------------------------
+def param_grid(grid: dict[str, list]) -> list[dict]:
+    """Full cartesian grid: {"max_depth": [3, 5], "eta": [0.03]} -> 2 configs."""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+
+def random_configs(space: dict[str, list], n: int, seed: int = 42) -> list[dict]:
+    """`n` distinct configs sampled uniformly from the grid `space`."""
+    configs = param_grid(space)
+    rng = random.Random(seed)
+    return rng.sample(configs, min(n, len(configs)))
+
+
+def config_key(config: dict) -> str:
+    return params_hash(config)
+
+
+# -------------------------------------------------
+# Fold data: built once, shared by every config
+# -------------------------------------------------
+@dataclass
+class SweepFold:
+    """
+    One walk-forward year with its train / test frames.
+
+    Quantized matrices are built lazily once per (max_bin, thread) and
+    reused by every config that thread evaluates on this fold. Threads
+    don't share a matrix: XGBoost keeps lazily built batch caches on the
+    DMatrix and doesn't guarantee concurrent training on one is safe.
+    """
+    year: int
+    X_train: pd.DataFrame
+    y_train: pd.Series
+    X_test: pd.DataFrame
+    y_test: pd.Series
+    returns: pd.DataFrame
+    _matrices: dict = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def matrices(self, max_bin: int) -> tuple[FeatureMatrix, FeatureMatrix]:
+        key = (max_bin, threading.get_ident())
+        if key not in self._matrices:
+            # Only this thread builds / reads its own key
+            builder = XGBSignalModel(params={"max_bin": max_bin})
+            train = builder.build_matrix(self.X_train, self.y_train)
+            test = builder.build_matrix(self.X_test, ref=train)
+            with self._lock:
+                self._matrices[key] = (train, test)
+        return self._matrices[key]
+
+
+def prepare_folds(
+    features: pd.DataFrame,
+    labels: pd.Series,
+    returns: pd.DataFrame,
+    first_year: int = 2022,
+) -> list[SweepFold]:
+    """Split features / labels / returns into yearly expanding-window folds once."""
+    slicer = DateSlicer(features.index)
+    ret_year = returns["DATE"].dt.year
+    folds: list[SweepFold] = []
+
+    for year in sorted(y for y in slicer.dates.year.unique() if y >= first_year):
+        X_train, y_train, X_test, y_test = split_fold(
+            features, labels, slicer.years_before(year), slicer.year(year)
+        )
+        if len(y_train) == 0 or len(y_test) == 0:
+            continue
+
+        folds.append(
+            SweepFold(
+                year=year,
+                X_train=X_train,
+                y_train=y_train,
+                X_test=X_test,
+                y_test=y_test,
+                returns=returns.loc[ret_year == year],
+            )
+        )
+
+    return folds
+
+
+# -------------------------------------------------
+# Evaluation
+# -------------------------------------------------
+def mean_daily_ic(df: pd.DataFrame, score_col: str = "ml_score", ret_col: str = "next_ret") -> float:
+    """Average cross-sectional Spearman IC across dates (see backtest.ic)."""
+    ic = daily_ic(df, [score_col], df[[ret_col]])
+    return float(ic.mean().iloc[0])
+
+
+def evaluate_config(
+    config: dict,
+    folds: list[SweepFold],
+    top_n: int = 5,
+    nthread: int | None = None,
+) -> dict:
+    """
+    Train + score one param config on every fold.
+    Returns mean daily IC, Sharpe of the stitched out-of-sample PnL and
+    total training time. `num_boost_round` may be part of `config`.
+    """
+    params = dict(config)
+    num_boost_round = params.pop("num_boost_round", 300)
+
+    ics: list[float] = []
+    pnls: list[pd.DataFrame] = []
+    t0 = time.perf_counter()
+
+    for fold in folds:
+        model = XGBSignalModel(params=params, num_boost_round=num_boost_round, nthread=nthread)
+        train, test = fold.matrices(model.params["max_bin"])
+
+        model.fit(train)
+        scores = model.predict(test)
+
+        df_scores = scores.reset_index().merge(fold.returns, on=["DATE", "SYMBOL"], how="left")
+
+        ics.append(mean_daily_ic(df_scores))
+        pnls.append(build_pnl_from_scores(df_scores, top_n=top_n))
+
+    pnl = pd.concat(pnls, ignore_index=True)
+    stats = compute_metrics(pnl["portfolio_return"])
+
+    return {
+        "config_key": config_key(config),
+        **config,
+        "IC": float(np.mean(ics)),
+        "IC_min": float(np.min(ics)),
+        "Sharpe": stats["Sharpe"],
+        "CAGR": stats["CAGR"],
+        "Max_Drawdown": stats["Max_Drawdown"],
+        "train_seconds": time.perf_counter() - t0,
+    }
+
+
+# -------------------------------------------------
+# Sweep runner (parallel, resumable)
+# -------------------------------------------------
+def load_results(path: Path = SWEEP_RESULTS) -> pd.DataFrame:
+    if not path.exists():
+        return pd.DataFrame()
+    return pd.read_csv(path)
+
+
+def result_columns(configs: list[dict]) -> list[str]:
+    """Fixed column order of the results file (every key of every config)."""
+    params = dict.fromkeys(k for c in configs for k in c)
+    return ["config_key", *params, *METRIC_COLS]
+
+
+def run_sweep(
+    folds: list[SweepFold],
+    configs: list[dict],
+    n_jobs: int = 4,
+    top_n: int = 5,
+    out_path: Path = SWEEP_RESULTS,
+) -> pd.DataFrame:
+    """
+    Evaluate `configs` on pre-built `folds` with `n_jobs` threads.
+
+    XGBoost releases the GIL, so threads train concurrently; each thread
+    reuses its own quantized fold matrices across the configs it runs (see
+    `SweepFold`) and gets an even share of the thread budget. Every
+    finished config is appended to `out_path` immediately, and configs
+    already in that file are skipped, so an interrupted sweep resumes
+    where it stopped.
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    done = load_results(out_path)
+    done_keys = set(done["config_key"]) if not done.empty else set()
+
+    todo = [c for c in configs if config_key(c) not in done_keys]
+
+    # Rows are appended one by one: write every row against the same header
+    columns = list(done.columns) if not done.empty else result_columns(configs)
+    print(f"🔎 Sweep: {len(configs)} configs, {len(configs) - len(todo)} already done")
+
+    nthread = threads_per_worker(n_jobs)
+
+    with ThreadPoolExecutor(max_workers=max(1, n_jobs)) as pool:
+        futures = [
+            pool.submit(evaluate_config, c, folds, top_n, nthread)
+            for c in todo
+        ]
+
+        for fut in as_completed(futures):
+            row = fut.result()
+            pd.DataFrame([row]).reindex(columns=columns).to_csv(
+                out_path,
+                mode="a",
+                header=not out_path.exists(),
+                index=False,
+            )
+            print(f"✅ {row['config_key']}  IC={row['IC']:.4f}  Sharpe={row['Sharpe']:.3f}")
+
+    results = load_results(out_path)
+    return results.sort_values("IC", ascending=False).reset_index(drop=True)
+
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+def main() -> None:
+    from src.signals.ml_signals import build_features_and_labels, load_all_history
+
+    parser = argparse.ArgumentParser(description="XGBoost hyperparameter sweep over walk-forward folds.")
+    parser.add_argument("--n-random", type=int, default=None, help="Sample N configs instead of the full grid")
+    parser.add_argument("--n-jobs", type=int, default=4)
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    df = load_all_history()
+    features, labels = build_features_and_labels(df)
+    returns = features.reset_index()[["DATE", "SYMBOL"]].assign(next_ret=labels.values)
+
+    folds = prepare_folds(features, labels, returns)
+    print(f"✅ Folds prepared: {[f.year for f in folds]}")
+
+    configs = (
+        random_configs(DEFAULT_GRID, args.n_random, seed=args.seed)
+        if args.n_random
+        else param_grid(DEFAULT_GRID)
+    )
+
+    results = run_sweep(folds, configs, n_jobs=args.n_jobs, top_n=args.top_n)
+
+    print("\n📊 TOP CONFIGS (by IC)")
+    print(results.head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,23 +3,31 @@ from __future__ import annotations
 
 import pandas as pd
 
-from src.config.paths import PROCESSED_DIR, REPORTS_DIR
+from src.config.paths import REPORTS_DIR
 from src.backtest.engine import compute_metrics
+from src.backtest.matrix import matrix_backtest, to_panel, topk_weights
+from src.signals.rank_store import load_rank_history
+from src.utils.parallel import run_in_pool
 
 
 # -------------------------------------------------
 # Load historical daily rankings
 # -------------------------------------------------
-def load_rankings() -> pd.DataFrame:
+def load_rankings(
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+) -> pd.DataFrame:
     """
     Load the historical daily rankings produced by:
         python -m src.signals.build_daily_rankings
+    for [start, end]; only the overlapping month partitions are read.
     """
-    path = PROCESSED_DIR / "daily_ranking_history.csv"
-    if not path.exists():
-        raise FileNotFoundError(path)
+    df = load_rank_history(start, end)
+
+    # Snapshot / backfilled histories carry CLOSE only
+    if "adj_close" not in df.columns:
+        df["adj_close"] = df["CLOSE"]
 
-    df = pd.read_csv(path, parse_dates=["DATE"])
     # Make sure sorted properly
     df = df.sort_values(["SYMBOL", "DATE"]).reset_index(drop=True)
     return df
@@ -72,52 +80,48 @@ def build_pnl_for_period(
     if sub.empty:
         return pd.DataFrame(columns=["DATE", "portfolio_return", "equity"])
 
-    results: list[tuple[pd.Timestamp, float]] = []
-
-    for date, day_df in sub.groupby("DATE"):
-        # Take top-N by RANK for that day
-        picks = (
-            day_df
-            .sort_values("RANK")
-            .head(top_n)
-        )
-
-        rets = picks["next_ret"].dropna()
-        if len(rets) == 0:
-            continue
+    # Equal-weight top-N by RANK -> weight matrix -> matrix backtest
+    # (mean of the valid picks; days with no valid return are skipped)
+    weights = topk_weights(sub, "RANK", top_n, largest=False)
+    pnl = matrix_backtest(weights, to_panel(sub, "next_ret"))
 
-        portfolio_ret = rets.mean()
-        results.append((date, portfolio_ret))
+    return pnl[["DATE", "portfolio_return", "equity"]]
 
-    pnl = pd.DataFrame(results, columns=["DATE", "portfolio_return"])
-    pnl = pnl.sort_values("DATE").reset_index(drop=True)
-    pnl["equity"] = (1.0 + pnl["portfolio_return"]).cumprod()
 
-    return pnl
+def _period_worker(task: tuple[pd.DataFrame, int, pd.Timestamp, pd.Timestamp]) -> pd.DataFrame:
+    sub, top_n, start, end = task
+    return build_pnl_for_period(sub, top_n=top_n, start=start, end=end)
 
 
 # -------------------------------------------------
 # Main walk-forward driver
 # -------------------------------------------------
-def main(top_n: int = 5) -> None:
+def main(top_n: int = 5, n_jobs: int = 1, first_year: int = 2022) -> None:
+    """
+    Yearly walk-forward over the ranking history from `first_year` on
+    (earlier partitions are not read).
+    `n_jobs` > 1 builds the yearly periods in a process pool; each worker
+    only receives its own year's rows. Output order is unchanged.
+    """
     REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 
-    df = load_rankings()
+    df = load_rankings(start=pd.Timestamp(year=first_year, month=1, day=1))
     df = prepare_returns(df)
 
     years = sorted(df["DATE"].dt.year.unique().tolist())
 
-    summary_rows: list[dict] = []
-
+    tasks = []
     for year in years:
-        # If you want to skip early years, adjust this
-        if year < 2022:
-            continue
-
         start = pd.Timestamp(year=year, month=1, day=1)
         end = pd.Timestamp(year=year, month=12, day=31)
+        sub = df.loc[df["DATE"].dt.year == year]
+        tasks.append((sub, top_n, start, end))
+
+    pnls = run_in_pool(_period_worker, tasks, n_jobs=n_jobs)
+
+    summary_rows: list[dict] = []
 
-        pnl_year = build_pnl_for_period(df, top_n=top_n, start=start, end=end)
+    for year, pnl_year in zip(years, pnls):
         if pnl_year.empty:
             continue
 
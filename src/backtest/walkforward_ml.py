@@ -1,11 +1,54 @@
 # src/backtest/walkforward_ml.py
 from __future__ import annotations
 
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 
 from src.config.paths import REPORTS_DIR
 from src.backtest.engine import compute_metrics
+from src.backtest.matrix import matrix_backtest, to_panel, topk_weights
+from src.data.date_slices import DateSlicer
+from src.models.base import SignalModel, fit_model
+from src.models.ensemble import SignalEnsemble
+from src.models.linear_ranker import RidgeRanker, rolling_ridge_scores
+from src.models.prediction_store import PredictionStore, feature_version
+from src.models.registry import model_version, params_hash
 from src.models.xgb_signal_model import XGBSignalModel
+from src.utils.parallel import (
+    attach_arrays,
+    run_in_pool,
+    share_arrays,
+    threads_per_worker,
+)
+
+
+TRAINING_MODES = ("full", "incremental", "daily")
+MODEL_ENGINES = ("xgb", "ridge", "ensemble")
+
+
+def make_model(
+    engine: str = "xgb",
+    nthread: int | None = None,
+    model_kwargs: dict | None = None,
+) -> SignalModel:
+    """
+    Fresh scoring model for `engine`:
+      xgb      : XGBSignalModel(nthread=..., **model_kwargs)
+      ridge    : RidgeRanker(params=model_kwargs)  (NumPy speed baseline)
+      ensemble : SignalEnsemble(nthread=..., **model_kwargs)
+                 (members / blend / n_jobs; default 5 seed-varied XGBoost)
+    """
+    if engine == "xgb":
+        return XGBSignalModel(nthread=nthread, **(model_kwargs or {}))
+    if engine == "ridge":
+        return RidgeRanker(params=model_kwargs)
+    if engine == "ensemble":
+        return SignalEnsemble(nthread=nthread, **(model_kwargs or {}))
+    raise ValueError(f"engine must be one of {MODEL_ENGINES}, got {engine!r}")
 
 
 def build_pnl_from_scores(
@@ -16,118 +59,502 @@ def build_pnl_from_scores(
     Build daily PnL using ML scores -> ranks.
     Assumes columns: DATE, SYMBOL, ml_score, next_ret
     """
-    results: list[tuple[pd.Timestamp, float]] = []
+    # Equal-weight top-N by ml_score (ties -> earlier row) as a weight
+    # matrix; days with no valid return are skipped
+    weights = topk_weights(df, "ml_score", top_n)
+    pnl = matrix_backtest(weights, to_panel(df, "next_ret"))
 
-    for date, day_df in df.groupby("DATE"):
-        picks = (
-            day_df
-            .sort_values("ml_score", ascending=False)
-            .head(top_n)
-        )
+    return pnl[["DATE", "portfolio_return", "equity"]]
 
-        rets = picks["next_ret"].dropna()
-        if len(rets) == 0:
-            continue
 
-        results.append((date, rets.mean()))
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+def _clean_xy(
+    X: pd.DataFrame,
+    y: pd.Series,
+) -> tuple[pd.DataFrame, pd.Series]:
+    """Drop rows with a missing label or any missing feature (no copy if none)."""
+    ok = y.notna() & X.notna().all(axis=1)
+    if ok.all():
+        return X, y
+    return X.loc[ok], y.loc[ok]
+
 
-    pnl = pd.DataFrame(results, columns=["DATE", "portfolio_return"])
-    pnl = pnl.sort_values("DATE").reset_index(drop=True)
-    pnl["equity"] = (1.0 + pnl["portfolio_return"]).cumprod()
-    return pnl
+def score_accuracy(scores: pd.Series, y: pd.Series) -> dict:
+    """
+    Out-of-sample accuracy of ML scores against realised next_ret:
+      RMSE     : regression error
+      Hit_Rate : share of rows where sign(score) == sign(next_ret)
+      IC       : Spearman correlation of score vs next_ret
+    """
+    err = scores.values - y.values
 
+    return {
+        "RMSE": float(np.sqrt(np.mean(err ** 2))),
+        "Hit_Rate": float(np.mean(np.sign(scores.values) == np.sign(y.values))),
+        "IC": float(scores.corr(y, method="spearman")),
+    }
 
-def main(
+
+# -------------------------------------------------
+# One fold: split, train, score
+# -------------------------------------------------
+def split_fold(
+    features: pd.DataFrame,
+    labels: pd.Series,
+    train_rows: slice,
+    test_rows: slice,
+) -> tuple[pd.DataFrame, pd.Series, pd.DataFrame, pd.Series]:
+    """
+    TRAIN / TEST split + safety clean.
+    Row ranges come from a DateSlicer, so the splits are positional views.
+    """
+    X_train, y_train = _clean_xy(features.iloc[train_rows], labels.iloc[train_rows])
+    X_test, y_test = _clean_xy(features.iloc[test_rows], labels.iloc[test_rows])
+    return X_train, y_train, X_test, y_test
+
+
+def _n_rows(rows: slice) -> int:
+    return max(0, rows.stop - rows.start)
+
+
+def _score_fold(
+    year: int,
+    scores: pd.Series,
+    y_test: pd.Series,
+    returns: pd.DataFrame,
+    top_n: int,
+) -> dict | None:
+    """Build the PnL / metrics record of the test year's scores."""
+    df_scores = (
+        scores
+        .rename("ml_score")
+        .reset_index()
+    )
+
+    df_scores = df_scores.merge(
+        returns,
+        on=["DATE", "SYMBOL"],
+        how="left",
+    )
+
+    pnl = build_pnl_from_scores(df_scores, top_n=top_n)
+    if pnl.empty:
+        print(f"⚠️ No PnL rows for {year}")
+        return None
+
+    return {
+        "YEAR": year,
+        "pnl": pnl,
+        "stats": compute_metrics(pnl["portfolio_return"]),
+        "accuracy": score_accuracy(scores, y_test),
+    }
+
+
+def run_full_fold(
+    year: int,
     features: pd.DataFrame,
     labels: pd.Series,
     returns: pd.DataFrame,
     top_n: int = 5,
-) -> None:
+    nthread: int | None = None,
+    model_kwargs: dict | None = None,
+    slicer: DateSlicer | None = None,
+    engine: str = "xgb",
+    store: PredictionStore | None = None,
+) -> dict | None:
     """
-    ML walk-forward by calendar year.
+    Train a fresh model on every row before `year`, score `year`.
+    Independent of every other fold, so safe to run in parallel.
+    `model_kwargs` go to the engine's model (see `make_model`).
 
-    Index of `features` and `labels` must be MultiIndex (DATE, SYMBOL).
-    `returns` must have columns: DATE, SYMBOL, next_ret.
+    With a `store`, the fold's scores are cached under the model version
+    (+ model_kwargs hash); a rerun with the same setup skips both training
+    and `predict`.
     """
-    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    print(f"\n🚀 ML WALK-FORWARD — {year} (full, {engine})")
 
-    years = sorted(features.index.get_level_values("DATE").year.unique())
-    summary: list[dict] = []
+    slicer = slicer or DateSlicer(features.index)
+    train_rows = slicer.years_before(year)
+    test_rows = slicer.year(year)
+
+    if _n_rows(train_rows) == 0 or _n_rows(test_rows) == 0:
+        print(f"⚠️ Skipping year {year} — no train/test data")
+        return None
+
+    X_train, y_train, X_test, y_test = split_fold(features, labels, train_rows, test_rows)
+
+    if len(y_train) == 0 or len(y_test) == 0:
+        print(f"⚠️ Skipping year {year} — no valid samples")
+        return None
+
+    print(f"✅ Train samples: {len(y_train)}")
+    print(f"✅ Test samples : {len(y_test)}")
+
+    model = make_model(engine, nthread=nthread, model_kwargs=model_kwargs)
+
+    train_end = X_train.index.get_level_values("DATE")[-1]
+    test_dates = X_test.index.get_level_values("DATE").unique()
+    model_key = f"{model_version(model, train_end)}_{params_hash(model_kwargs or {})}"
+    feature_key = feature_version(features.columns)
+
+    if store is not None and store.has(model_key, feature_key, test_dates):
+        print(f"📦 Cached predictions {model_key}")
+        scores = store.get(model_key, feature_key, test_dates).reindex(X_test.index)
+        train_seconds, n_trees = 0.0, np.nan
+    else:
+        t0 = time.perf_counter()
+        fit_model(model, X_train, y_train)
+        train_seconds = time.perf_counter() - t0
+
+        scores = model.predict(X_test)
+        n_trees = getattr(model, "n_trees", 0)
+        if store is not None:
+            store.put(model_key, feature_key, scores)
+
+    fold = _score_fold(year, scores, y_test, returns, top_n)
+    if fold is None:
+        return None
+
+    fold.update(
+        train_seconds=train_seconds,
+        train_rows=len(y_train),
+        n_trees=n_trees,
+    )
+    return fold
+
+
+# -------------------------------------------------
+# Fold loop (shared by main + mode comparison)
+# -------------------------------------------------
+def _fold_years(features: pd.DataFrame, first_year: int) -> list[int]:
+    years = features.index.get_level_values("DATE").year.unique()
+    return sorted(y for y in years if y >= first_year)
+
+
+def run_folds(
+    features: pd.DataFrame,
+    labels: pd.Series,
+    returns: pd.DataFrame,
+    top_n: int = 5,
+    mode: str = "full",
+    incremental_rounds: int = 100,
+    first_year: int = 2022,
+    model_kwargs: dict | None = None,
+    engine: str = "xgb",
+    store: PredictionStore | None = None,
+) -> list[dict]:
+    """
+    Run the yearly expanding-window folds and return one record per year:
+        YEAR, pnl, stats, accuracy, train_seconds, train_rows, n_trees
+
+    mode="full"        : fresh model on all rows before YEAR (cost grows
+                         quadratically over the walk-forward)
+    mode="incremental" : first fold trains in full, every later fold keeps
+                         boosting the previous booster for
+                         `incremental_rounds` trees on the rows added since
+                         the previous fold only (cost grows linearly);
+                         XGBoost engine only
+    mode="daily"       : ridge refit every date on all earlier dates (see
+                         `run_daily_folds`); ridge engine only
+    `store` caches full-mode fold scores (see `run_full_fold`).
+    """
+    if mode not in TRAINING_MODES:
+        raise ValueError(f"mode must be one of {TRAINING_MODES}, got {mode!r}")
+    if mode == "incremental" and engine != "xgb":
+        raise ValueError("incremental mode needs the xgb engine (warm-started boosting)")
+    if mode == "daily":
+        if engine != "ridge":
+            raise ValueError("daily mode needs the ridge engine (closed-form rolling refits)")
+        return run_daily_folds(features, labels, returns, top_n, first_year, model_kwargs)
+
+    years = _fold_years(features, first_year)
+    slicer = DateSlicer(features.index)
+
+    if mode == "full":
+        folds = [
+            run_full_fold(
+                year, features, labels, returns, top_n,
+                model_kwargs=model_kwargs, slicer=slicer, engine=engine, store=store,
+            )
+            for year in years
+        ]
+        return [f for f in folds if f is not None]
+
+    model: XGBSignalModel | None = None
+    trained_until: int | None = None   # first year NOT yet seen by `model`
+    folds: list[dict] = []
 
     for year in years:
-        if year < 2022:
-            continue
+        print(f"\n🚀 ML WALK-FORWARD — {year} ({mode})")
 
-        print(f"\n🚀 ML WALK-FORWARD — {year}")
+        test_rows = slicer.year(year)
 
-        year_index = features.index.get_level_values("DATE")
-        train_mask = year_index < year
-        test_mask = year_index == year
+        if model is None:
+            train_rows = slicer.years_before(year)
+        else:
+            # Only the rows added since the previous fold
+            train_rows = slice(
+                slicer.years_before(trained_until).stop,
+                slicer.years_before(year).stop,
+            )
 
-        if train_mask.sum() == 0 or test_mask.sum() == 0:
+        if (model is None and _n_rows(train_rows) == 0) or _n_rows(test_rows) == 0:
             print(f"⚠️ Skipping year {year} — no train/test data")
             continue
 
-        # -----------------------------
-        # TRAIN / TEST SPLIT
-        # -----------------------------
-        X_train = features.loc[train_mask]
-        y_train = labels.loc[train_mask]
+        X_train, y_train, X_test, y_test = split_fold(features, labels, train_rows, test_rows)
+
+        if len(y_test) == 0 or (model is None and len(y_train) == 0):
+            print(f"⚠️ Skipping year {year} — no valid samples")
+            continue
+
+        print(f"✅ Train samples: {len(y_train)}")
+        print(f"✅ Test samples : {len(y_test)}")
+
+        t0 = time.perf_counter()
+
+        if model is None:
+            model = XGBSignalModel(**(model_kwargs or {}))
+            fit_model(model, X_train, y_train)
+        elif len(y_train) > 0:
+            # New rows only, quantized once with the model's max_bin
+            model.update(model.build_matrix(X_train, y_train), num_boost_round=incremental_rounds)
+
+        train_seconds = time.perf_counter() - t0
+        trained_until = year
+
+        fold = _score_fold(year, model.predict(X_test), y_test, returns, top_n)
+        if fold is None:
+            continue
+
+        fold.update(
+            train_seconds=train_seconds,
+            train_rows=len(y_train),
+            n_trees=model.n_trees,
+        )
+        folds.append(fold)
 
-        X_test = features.loc[test_mask]
-        y_test = labels.loc[test_mask]
+    return folds
 
-        # -----------------------------
-        # SAFETY CLEAN
-        # -----------------------------
-        train_ok = y_train.notna() & X_train.notna().all(axis=1)
-        test_ok = y_test.notna() & X_test.notna().all(axis=1)
 
-        X_train = X_train.loc[train_ok]
-        y_train = y_train.loc[train_ok]
+def run_daily_folds(
+    features: pd.DataFrame,
+    labels: pd.Series,
+    returns: pd.DataFrame,
+    top_n: int = 5,
+    first_year: int = 2022,
+    model_kwargs: dict | None = None,
+) -> list[dict]:
+    """
+    Ridge walk-forward with a refit on every date: each test date is scored
+    by a RidgeRanker(params=model_kwargs) fitted on all earlier dates. The
+    whole history is solved in one vectorized pass (see
+    linear_ranker.rolling_ridge_scores), then reported per calendar year
+    like `run_folds`; that pass's time is booked on the first fold.
+    """
+    params = RidgeRanker(params=model_kwargs).params
+
+    t0 = time.perf_counter()
+    all_scores = rolling_ridge_scores(features, labels, alpha=params["alpha"], target=params["target"])
+    train_seconds = time.perf_counter() - t0
+
+    slicer = DateSlicer(features.index)
+    folds: list[dict] = []
 
-        X_test = X_test.loc[test_ok]
-        y_test = y_test.loc[test_ok]
+    for year in _fold_years(features, first_year):
+        print(f"\n🚀 ML WALK-FORWARD — {year} (daily, ridge)")
 
-        if len(y_train) == 0 or len(y_test) == 0:
+        test_rows = slicer.year(year)
+        X_test, y_test = features.iloc[test_rows], labels.iloc[test_rows]
+        scores = all_scores.iloc[test_rows]
+
+        # Same safety clean as split_fold, minus dates without enough history
+        ok = y_test.notna() & X_test.notna().all(axis=1) & scores.notna()
+        if not ok.any():
             print(f"⚠️ Skipping year {year} — no valid samples")
             continue
 
-        print(f"✅ Train samples: {len(y_train)}")
-        print(f"✅ Test samples : {len(y_test)}")
+        train_rows = slicer.years_before(year)
+        X_train, y_train = _clean_xy(features.iloc[train_rows], labels.iloc[train_rows])
+
+        fold = _score_fold(year, scores.loc[ok], y_test.loc[ok], returns, top_n)
+        if fold is None:
+            continue
 
-        # -----------------------------
-        # MODEL
-        # -----------------------------
-        model = XGBSignalModel()
-        model.fit(X_train, y_train)
+        fold.update(
+            train_seconds=train_seconds if not folds else 0.0,
+            train_rows=len(y_train),
+            n_trees=0,
+        )
+        folds.append(fold)
 
-        scores = model.predict(X_test)
+    return folds
+
+
+# -------------------------------------------------
+# Parallel folds (full mode): memmapped inputs, one process per fold
+# -------------------------------------------------
+_WORKER: dict = {}
+
+
+def _init_fold_worker(
+    paths: dict,
+    columns: list[str],
+    top_n: int,
+    nthread: int,
+    model_kwargs: dict | None,
+    engine: str,
+    store: PredictionStore | None,
+) -> None:
+    arrays = attach_arrays(paths)
+
+    index = pd.MultiIndex.from_arrays(
+        [arrays["dates"], arrays["symbols"]],
+        names=["DATE", "SYMBOL"],
+    )
 
-        df_scores = (
-            scores
-            .rename("ml_score")
-            .reset_index()
+    _WORKER.update(
+        features=pd.DataFrame(arrays["X"], index=index, columns=columns, copy=False),
+        labels=pd.Series(arrays["y"], index=index, name="next_ret", copy=False),
+        returns=pd.DataFrame(
+            {
+                "DATE": arrays["ret_dates"],
+                "SYMBOL": arrays["ret_symbols"],
+                "next_ret": arrays["ret"],
+            }
+        ),
+        top_n=top_n,
+        nthread=nthread,
+        model_kwargs=model_kwargs,
+        engine=engine,
+        store=store,
+    )
+
+
+def _fold_worker(year: int) -> dict | None:
+    if "slicer" not in _WORKER:
+        _WORKER["slicer"] = DateSlicer(_WORKER["features"].index)
+    return run_full_fold(year, **_WORKER)
+
+
+def run_folds_parallel(
+    features: pd.DataFrame,
+    labels: pd.Series,
+    returns: pd.DataFrame,
+    top_n: int = 5,
+    n_jobs: int = 4,
+    first_year: int = 2022,
+    model_kwargs: dict | None = None,
+    engine: str = "xgb",
+    store: PredictionStore | None = None,
+) -> list[dict]:
+    """
+    Full-retrain folds spread over a process pool.
+
+    The feature matrix, labels and returns are written once as memmapped
+    .npy files and attached read-only by every worker; each worker trains
+    XGBoost with an even share of the thread budget. Results come back in
+    year order, identical to `run_folds(mode="full")`.
+    """
+    years = _fold_years(features, first_year)
+    nthread = threads_per_worker(n_jobs)
+
+    with tempfile.TemporaryDirectory(prefix="wf_ml_") as tmp:
+        paths = share_arrays(
+            {
+                "X": features.to_numpy(dtype=np.float64),
+                "y": labels.to_numpy(dtype=np.float64),
+                "dates": features.index.get_level_values("DATE").values,
+                "symbols": features.index.get_level_values("SYMBOL").values,
+                "ret": returns["next_ret"].to_numpy(dtype=np.float64),
+                "ret_dates": returns["DATE"].values,
+                "ret_symbols": returns["SYMBOL"].values,
+            },
+            Path(tmp),
         )
 
-        df_scores = df_scores.merge(
+        folds = run_in_pool(
+            _fold_worker,
+            years,
+            n_jobs=n_jobs,
+            nthread=nthread,
+            initializer=_init_fold_worker,
+            initargs=(
+                paths, list(features.columns), top_n, nthread, model_kwargs, engine, store,
+            ),
+        )
+
+    return [f for f in folds if f is not None]
+
+
+def main(
+    features: pd.DataFrame,
+    labels: pd.Series,
+    returns: pd.DataFrame,
+    top_n: int = 5,
+    mode: str = "full",
+    incremental_rounds: int = 100,
+    n_jobs: int = 1,
+    model_kwargs: dict | None = None,
+    engine: str = "xgb",
+    store: PredictionStore | None = None,
+) -> None:
+    """
+    ML walk-forward by calendar year.
+
+    Index of `features` and `labels` must be MultiIndex (DATE, SYMBOL).
+    `returns` must have columns: DATE, SYMBOL, next_ret.
+    `mode` selects full retraining or warm-started incremental boosting
+    (see `run_folds`). `n_jobs` > 1 runs full-mode folds in parallel.
+    `engine` picks the model ("xgb" or the NumPy "ridge" baseline);
+    `model_kwargs` go to it, e.g. for xgb
+        {"early_stopping_rounds": 30, "valid_days": 60, "embargo_days": 1}
+    A PredictionStore `store` reuses full-mode fold scores across reruns.
+    """
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+
+    if n_jobs > 1:
+        if mode != "full":
+            raise ValueError(
+                "incremental folds depend on the previous fold; use n_jobs=1"
+            )
+        folds = run_folds_parallel(
+            features,
+            labels,
+            returns,
+            top_n=top_n,
+            n_jobs=n_jobs,
+            model_kwargs=model_kwargs,
+            engine=engine,
+            store=store,
+        )
+    else:
+        folds = run_folds(
+            features,
+            labels,
             returns,
-            on=["DATE", "SYMBOL"],
-            how="left",
+            top_n=top_n,
+            mode=mode,
+            incremental_rounds=incremental_rounds,
+            model_kwargs=model_kwargs,
+            engine=engine,
+            store=store,
         )
 
-        pnl = build_pnl_from_scores(df_scores, top_n=top_n)
-        if pnl.empty:
-            print(f"⚠️ No PnL rows for {year}")
-            continue
+    summary: list[dict] = []
 
-        stats = compute_metrics(pnl["portfolio_return"])
+    for fold in folds:
+        year = fold["YEAR"]
+        stats = fold["stats"]
 
+        print(f"\n📊 {year}")
         print(f"CAGR   : {stats['CAGR']:.3f}")
         print(f"Sharpe : {stats['Sharpe']:.3f}")
         print(f"Max DD : {stats['Max_Drawdown']:.3f}")
 
-        pnl.to_csv(
+        fold["pnl"].to_csv(
             REPORTS_DIR / f"walkforward_ml_{year}.csv",
             index=False,
         )
@@ -138,6 +565,7 @@ def main(
                 "CAGR": stats["CAGR"],
                 "Sharpe": stats["Sharpe"],
                 "Max_Drawdown": stats["Max_Drawdown"],
+                "N_Trees": fold["n_trees"],
             }
         )
 
@@ -147,3 +575,107 @@ def main(
             index=False,
         )
         print("✅ ML walk-forward summary saved.")
+
+
+# -------------------------------------------------
+# Full retraining vs incremental boosting report
+# -------------------------------------------------
+def compare_training_modes(
+    features: pd.DataFrame,
+    labels: pd.Series,
+    returns: pd.DataFrame,
+    top_n: int = 5,
+    incremental_rounds: int = 100,
+) -> pd.DataFrame:
+    """
+    Run the walk-forward in both training modes and report, per year,
+    accuracy (RMSE / Hit_Rate / IC), Sharpe and training time side by side.
+
+    Saved to reports/walkforward_ml_mode_comparison.csv
+    """
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+
+    rows: list[dict] = []
+
+    for mode in ("full", "incremental"):
+        t0 = time.perf_counter()
+        folds = run_folds(
+            features,
+            labels,
+            returns,
+            top_n=top_n,
+            mode=mode,
+            incremental_rounds=incremental_rounds,
+        )
+        total_seconds = time.perf_counter() - t0
+
+        for fold in folds:
+            rows.append(
+                {
+                    "MODE": mode,
+                    "YEAR": fold["YEAR"],
+                    "train_rows": fold["train_rows"],
+                    "train_seconds": fold["train_seconds"],
+                    **fold["accuracy"],
+                    "Sharpe": fold["stats"]["Sharpe"],
+                    "CAGR": fold["stats"]["CAGR"],
+                    "total_seconds": total_seconds,
+                }
+            )
+
+    report = pd.DataFrame(rows)
+
+    out = REPORTS_DIR / "walkforward_ml_mode_comparison.csv"
+    report.to_csv(out, index=False)
+
+    print("\n📊 FULL vs INCREMENTAL")
+    print(report.to_string(index=False))
+    print(f"💾 Saved -> {out}")
+
+    return report
+
+
+# -------------------------------------------------
+# Engine speed / accuracy comparison
+# -------------------------------------------------
+def compare_engines(
+    features: pd.DataFrame,
+    labels: pd.Series,
+    returns: pd.DataFrame,
+    top_n: int = 5,
+    engines: tuple[str, ...] = MODEL_ENGINES,
+) -> pd.DataFrame:
+    """
+    Run the full-retrain walk-forward once per engine and report, per
+    year, accuracy (RMSE / Hit_Rate / IC), Sharpe and training time.
+
+    Saved to reports/walkforward_ml_engine_comparison.csv
+    """
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+
+    rows: list[dict] = []
+
+    for engine in engines:
+        for fold in run_folds(features, labels, returns, top_n=top_n, engine=engine):
+            rows.append(
+                {
+                    "ENGINE": engine,
+                    "YEAR": fold["YEAR"],
+                    "train_rows": fold["train_rows"],
+                    "train_seconds": fold["train_seconds"],
+                    **fold["accuracy"],
+                    "Sharpe": fold["stats"]["Sharpe"],
+                    "CAGR": fold["stats"]["CAGR"],
+                }
+            )
+
+    report = pd.DataFrame(rows)
+
+    out = REPORTS_DIR / "walkforward_ml_engine_comparison.csv"
+    report.to_csv(out, index=False)
+
+    print(f"\n📊 {' vs '.join(e.upper() for e in engines)}")
+    print(report.to_string(index=False))
+    print(f"💾 Saved -> {out}")
+
+    return report
@@ -19,6 +19,9 @@ MASTER_CONT_DIR = CLEANED_HIST_DIR                # *_CONT.csv files
 
 META_DIR = DATA_DIR / "meta"
 PROCESSED_DIR = DATA_DIR / "processed"
+MODELS_DIR = DATA_DIR / "models"                  # versioned model artifacts
+PREDICTIONS_DIR = PROCESSED_DIR / "predictions"   # cached ML scores per model
+RANK_HISTORY_DIR = PROCESSED_DIR / "ranking_history"  # one rank CSV per month
 
 REPORTS_DIR = BASE_DIR / "reports"
 FIGURES_DIR = REPORTS_DIR / "figures"
@@ -32,7 +35,7 @@ def ensure_dirs() -> None:
         DATA_DIR, RAW_DIR, RAW_DAILY_FO_DIR,
         CLEANED_DIR, CLEANED_DAILY_DIR, CLEANED_HIST_DIR,
         MASTER_DIR, MASTER_SYMBOLS_DIR,
-        META_DIR, PROCESSED_DIR,
+        META_DIR, PROCESSED_DIR, MODELS_DIR, PREDICTIONS_DIR, RANK_HISTORY_DIR,
         REPORTS_DIR, FIGURES_DIR,
     ]:
         p.mkdir(parents=True, exist_ok=True)
@@ -1,5 +1,6 @@
 # src/config/settings.py
 from __future__ import annotations
+import os
 from dataclasses import dataclass
 from datetime import timedelta
 
@@ -24,15 +25,57 @@ class BacktestSettings:
     slippage_bps: float = 2.0
     brokerage_per_turnover_bps: float = 1.5
     rollover_days: int = 2   # before expiry
+    impact_coef: float = 0.5  # sqrt impact: coef * daily vol * sqrt(notional / ADV)
+    capital: float = 1e7      # book notional used to size trades vs ADV
+    no_trade_band: float = 0.0  # min |target - held| weight change worth trading
+
+@dataclass
+class RegimeSettings:
+    ema_span: int = 100        # ema_trend: index above its long EMA
+    fast_span: int = 20        # ema_cross: fast EMA above slow EMA
+    slow_span: int = 100
+    vol_ratio_max: float = 1.2 # vol: index vol_10d / vol_20d not spiking
+    breadth_span: int = 50     # breadth: share of symbols above their EMA
+    breadth_min: float = 0.5
+    hmm_min_train: int = 252   # hmm (backtests): first fit after this many days
+    hmm_refit_days: int = 63   # then refit on the expanding history this often
+
+@dataclass
+class BreadthSettings:
+    ema_spans: tuple = (20, 50, 200)   # % of symbols above their N-day EMA
+    hl_windows: tuple = (20, 250)      # new N-day highs / lows
+
+# Bump when feature definitions change: cached ML predictions keyed on the
+# old feature version are then never reused.
+FEATURE_VERSION = 1
 
 FEATURE_SETTINGS = FeatureSettings()
 SIGNAL_SETTINGS = SignalSettings()
 BACKTEST_SETTINGS = BacktestSettings()
+REGIME_SETTINGS = RegimeSettings()
+BREADTH_SETTINGS = BreadthSettings()
+
+# XGBoost hardware profiles. Production boxes are CPU-only, so "cpu" is
+# the default; pick "cuda" explicitly on a GPU workstation.
+XGB_NTHREAD = os.cpu_count() or 1
+
+XGB_PROFILES = {
+    "cpu": {
+        "tree_method": "hist",
+        "device": "cpu",
+        "nthread": XGB_NTHREAD,
+    },
+    "cuda": {
+        "tree_method": "hist",
+        "device": "cuda",
+    },
+}
+
+XGB_PROFILE = "cpu"
 
 XGB_PARAMS = {
     "objective": "binary:logistic",
-    "tree_method": "hist",
-    "device": "cuda",
+    **XGB_PROFILES[XGB_PROFILE],
 
     "max_depth": 4,
     "eta": 0.03,
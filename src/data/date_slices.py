@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+class DateSlicer:
+    """
+    Date -> row-range offset table for a frame sorted by DATE.
+
+    Train / test windows become `slice` objects found by `searchsorted`,
+    so `frame.iloc[slicer.before(as_of)]` is a contiguous zero-copy view
+    instead of a boolean mask over the full MultiIndex plus a `.loc` copy.
+
+    Build it once per feature frame and reuse it for every date / fold.
+    """
+
+    def __init__(self, index: pd.Index, level: str = "DATE"):
+        if isinstance(index, pd.MultiIndex):
+            dates = index.get_level_values(level)
+        else:
+            dates = pd.DatetimeIndex(index)
+
+        if not dates.is_monotonic_increasing:
+            raise ValueError("Rows must be sorted by DATE (call sort_index() first)")
+
+        self._values = dates.values
+        self.n_rows = len(self._values)
+
+        # Offset table: unique dates + first row of each
+        change = np.empty(self.n_rows, dtype=bool)
+        change[:1] = True
+        change[1:] = self._values[1:] != self._values[:-1]
+
+        self.dates = pd.DatetimeIndex(self._values[change])
+        self.starts = np.flatnonzero(change)
+        self.ends = np.append(self.starts[1:], self.n_rows)
+
+    # -------------------------------------------------
+    # Row ranges
+    # -------------------------------------------------
+    def _pos(self, date, side: str = "left") -> int:
+        key = np.datetime64(pd.Timestamp(date)).astype(self._values.dtype)
+        return int(np.searchsorted(self._values, key, side=side))
+
+    def before(self, date) -> slice:
+        """Rows with DATE < date."""
+        return slice(0, self._pos(date, "left"))
+
+    def on(self, date) -> slice:
+        """Rows with DATE == date (empty slice if absent)."""
+        return slice(self._pos(date, "left"), self._pos(date, "right"))
+
+    def between(self, start=None, end=None) -> slice:
+        """Rows with start <= DATE <= end (either bound optional)."""
+        lo = 0 if start is None else self._pos(start, "left")
+        hi = self.n_rows if end is None else self._pos(end, "right")
+        return slice(lo, max(lo, hi))
+
+    def year(self, year: int) -> slice:
+        """Rows in calendar year `year`."""
+        return slice(
+            self._pos(pd.Timestamp(year=year, month=1, day=1), "left"),
+            self._pos(pd.Timestamp(year=year + 1, month=1, day=1), "left"),
+        )
+
+    def years_before(self, year: int) -> slice:
+        """Rows before Jan 1 of `year`."""
+        return self.before(pd.Timestamp(year=year, month=1, day=1))
@@ -3,10 +3,10 @@ import pandas as pd
 from src.config.paths import CLEANED_HIST_DIR
 
 
-def load_regime_index() -> pd.DataFrame:
+def load_universe_closes(extra_cols: tuple[str, ...] = ()) -> pd.DataFrame:
     """
-    Build a synthetic equal-weight index from all continuous futures.
-    Used as market regime proxy.
+    DATE, SYMBOL, adj_close (+ extra_cols, e.g. "oi") for every
+    continuous futures file.
     """
 
     frames = []
@@ -14,21 +14,32 @@ def load_regime_index() -> pd.DataFrame:
     for path in CLEANED_HIST_DIR.glob("*_CONT.csv"):
         symbol = path.stem.replace("_CONT", "")
         df = pd.read_csv(path, parse_dates=["date"])
-        df = df[["date", "adj_close"]].copy()
+        df = df[["date", "adj_close", *extra_cols]].copy()
         df["SYMBOL"] = symbol
         frames.append(df)
 
     if not frames:
         raise FileNotFoundError("No continuous futures data found")
 
-    all_df = pd.concat(frames, ignore_index=True)
+    return (
+        pd.concat(frames, ignore_index=True)
+        .rename(columns={"date": "DATE"})
+    )
+
+
+def load_regime_index(universe: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Build a synthetic equal-weight index from all continuous futures.
+    Used as market regime proxy.
+    """
+
+    all_df = load_universe_closes() if universe is None else universe
 
     index_df = (
         all_df
-        .groupby("date")["adj_close"]
+        .groupby("DATE")["adj_close"]
         .mean()
         .reset_index()
-        .rename(columns={"date": "DATE"})
     )
 
     print("[INFO] Regime index built from universe (equal-weight)")
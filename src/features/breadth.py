@@ -0,0 +1,235 @@
+# src/features/breadth.py
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import asdict
+
+import numpy as np
+import pandas as pd
+
+from src.config.paths import PROCESSED_DIR
+from src.config.settings import BREADTH_SETTINGS, BreadthSettings
+from src.data.loader import load_universe_closes
+
+
+BREADTH_FILE = PROCESSED_DIR / "breadth.csv"
+BREADTH_STATE = PROCESSED_DIR / "breadth_state.json"
+
+
+# -------------------------------------------------
+# Date x symbol panels
+# -------------------------------------------------
+def universe_panels(
+    universe: pd.DataFrame,
+    price_col: str = "adj_close",
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Close (`price_col`) and open-interest panels (DATE x SYMBOL) from the long universe."""
+    universe = universe.drop_duplicates(["DATE", "SYMBOL"], keep="last")
+    close = universe.pivot(index="DATE", columns="SYMBOL", values=price_col).sort_index()
+
+    if "oi" in universe.columns:
+        oi = universe.pivot(index="DATE", columns="SYMBOL", values="oi").reindex_like(close)
+    else:
+        oi = pd.DataFrame(np.nan, index=close.index, columns=close.columns)
+
+    return close, oi
+
+
+def ema_panel(close: pd.DataFrame, span: int, seed: pd.Series | None = None) -> pd.DataFrame:
+    """
+    Per-symbol EMA of every column at once (gaps carried over). `seed` is
+    the EMA row of the previous date, so an extension continues the exact
+    same recursion as a full recompute.
+    """
+    if seed is None:
+        return close.ewm(span=span, adjust=False, ignore_na=True).mean()
+
+    seeded = pd.concat([seed.to_frame().T, close])
+    return seeded.ewm(span=span, adjust=False, ignore_na=True).mean().iloc[1:]
+
+
+# -------------------------------------------------
+# Breadth statistics (all dates in one pass)
+# -------------------------------------------------
+def compute_breadth(
+    close: pd.DataFrame,
+    oi: pd.DataFrame,
+    state: dict | None = None,
+    settings: BreadthSettings = BREADTH_SETTINGS,
+) -> tuple[pd.DataFrame, dict]:
+    """
+    Daily breadth / dispersion across the universe, one row per DATE:
+
+      n_symbols
+      pct_above_ema_<N>      share of symbols above their N-day EMA
+      oi_pct_above_ema_<N>   same, weighted by open interest (first span)
+      advances, declines, ad_ratio, ad_line
+      oi_adv_share           OI-weighted share of advancing symbols
+      new_highs_<W>, new_lows_<W>, hl_pct_<W>   (highs - lows) / n
+      ret_mean, dispersion   cross-sectional mean / std of daily returns
+
+    `state` (from a previous call) holds the last closes, EMA rows and AD
+    line, so only new dates need to be passed in. Returns (stats, state).
+    """
+    state = state or {}
+    tail = state.get("close")
+    n_tail = 0 if tail is None else len(tail)
+
+    symbols = close.columns if tail is None else tail.columns.union(close.columns)
+    close = close.reindex(columns=symbols)
+    oi = oi.reindex(columns=symbols)
+    full = close if tail is None else pd.concat([tail.reindex(columns=symbols), close])
+
+    ret = full.pct_change(fill_method=None).iloc[n_tail:]
+    valid = close.notna()
+    n = valid.sum(axis=1)
+
+    stats = pd.DataFrame(index=close.index)
+    stats["n_symbols"] = n
+
+    ema_state = {}
+    for i, span in enumerate(settings.ema_spans):
+        seed = state.get("ema", {}).get(span)
+        ema = ema_panel(close, span, None if seed is None else seed.reindex(symbols))
+        above = close > ema
+
+        stats[f"pct_above_ema_{span}"] = above.sum(axis=1) / n
+        if i == 0:
+            stats[f"oi_pct_above_ema_{span}"] = (
+                oi.where(above, 0.0).sum(axis=1) / oi.where(valid).sum(axis=1)
+            )
+        ema_state[span] = ema.iloc[-1]
+
+    # Advance / decline
+    adv = (ret > 0).sum(axis=1)
+    dec = (ret < 0).sum(axis=1)
+    stats["advances"] = adv
+    stats["declines"] = dec
+    stats["ad_ratio"] = adv / (adv + dec)
+    stats["ad_line"] = state.get("ad_line", 0) + (adv - dec).cumsum()
+
+    stats["oi_adv_share"] = (
+        oi.where(ret > 0, 0.0).sum(axis=1) / oi.where(ret.notna()).sum(axis=1)
+    )
+
+    # New highs / lows over each window (symbols with a full window only)
+    for w in settings.hl_windows:
+        hi = full.rolling(w, min_periods=w).max().iloc[n_tail:]
+        lo = full.rolling(w, min_periods=w).min().iloc[n_tail:]
+        highs = (close >= hi).sum(axis=1)
+        lows = (close <= lo).sum(axis=1)
+
+        stats[f"new_highs_{w}"] = highs
+        stats[f"new_lows_{w}"] = lows
+        stats[f"hl_pct_{w}"] = (highs - lows) / n
+
+    # Cross-sectional dispersion
+    stats["ret_mean"] = ret.mean(axis=1)
+    stats["dispersion"] = ret.std(axis=1)
+
+    stats = stats.replace([np.inf, -np.inf], np.nan)
+    stats.index.name = "DATE"
+
+    new_state = {
+        "close": full.iloc[-max(settings.hl_windows):],
+        "ema": ema_state,
+        "ad_line": int(stats["ad_line"].iloc[-1]),
+    }
+    return stats, new_state
+
+
+# -------------------------------------------------
+# State persistence (plain JSON)
+# -------------------------------------------------
+def _save_state(state: dict, settings: BreadthSettings) -> None:
+    tail = state["close"]
+    payload = {
+        "settings": asdict(settings),
+        "symbols": list(tail.columns),
+        "dates": [str(d.date()) for d in tail.index],
+        "close": tail.to_numpy().tolist(),
+        "ema": {str(span): row.to_numpy().tolist() for span, row in state["ema"].items()},
+        "ad_line": state["ad_line"],
+    }
+    BREADTH_STATE.parent.mkdir(parents=True, exist_ok=True)
+    with open(BREADTH_STATE, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh)
+
+
+def _load_state(settings: BreadthSettings) -> dict | None:
+    """Saved state, or None when missing or built with other settings."""
+    if not BREADTH_STATE.exists():
+        return None
+
+    with open(BREADTH_STATE, encoding="utf-8") as fh:
+        payload = json.load(fh)
+
+    if payload["settings"] != json.loads(json.dumps(asdict(settings))):
+        return None
+
+    symbols = payload["symbols"]
+    return {
+        "close": pd.DataFrame(
+            np.asarray(payload["close"], dtype=np.float64),
+            index=pd.DatetimeIndex(payload["dates"]),
+            columns=symbols,
+        ),
+        "ema": {
+            int(span): pd.Series(np.asarray(row, dtype=np.float64), index=symbols)
+            for span, row in payload["ema"].items()
+        },
+        "ad_line": payload["ad_line"],
+    }
+
+
+def load_breadth(
+    settings: BreadthSettings = BREADTH_SETTINGS,
+    refresh: bool = False,
+) -> pd.DataFrame:
+    """
+    Breadth history, cached in data/processed/breadth.csv. Dates after the
+    last cached one are computed from the saved state and appended; the
+    full history is rebuilt on refresh or when the settings change.
+    """
+    universe = load_universe_closes(extra_cols=("oi",))
+    close, oi = universe_panels(universe)
+
+    state = None if refresh else _load_state(settings)
+
+    if state is not None and BREADTH_FILE.exists():
+        cached = pd.read_csv(
+            BREADTH_FILE, parse_dates=["DATE"], index_col="DATE",
+            float_precision="round_trip",
+        )
+        last = state["close"].index[-1]
+        new = close.index > last
+
+        if not new.any():
+            return cached
+
+        stats, state = compute_breadth(close.loc[new], oi.loc[new], state, settings)
+        stats.to_csv(BREADTH_FILE, mode="a", header=False)
+        _save_state(state, settings)
+        print(f"📊 Breadth extended by {len(stats)} day(s) -> {stats.index[-1].date()}")
+        return pd.concat([cached, stats])
+
+    stats, state = compute_breadth(close, oi, settings=settings)
+    BREADTH_FILE.parent.mkdir(parents=True, exist_ok=True)
+    stats.to_csv(BREADTH_FILE)
+    _save_state(state, settings)
+    print(f"📊 Breadth built for {len(stats)} days -> {BREADTH_FILE}")
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Market breadth / dispersion history.")
+    parser.add_argument("--refresh", action="store_true", help="Recompute the whole history")
+    args = parser.parse_args()
+
+    stats = load_breadth(refresh=args.refresh)
+    print(stats.tail(5).round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
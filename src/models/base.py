@@ -0,0 +1,49 @@
+# src/models/base.py
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Protocol, runtime_checkable
+
+import pandas as pd
+
+
+@runtime_checkable
+class SignalModel(Protocol):
+    """
+    Common interface for every scoring engine (XGBoost, ridge, ...).
+
+    X is a feature frame indexed by (DATE, SYMBOL); `predict` returns a
+    Series named "ml_score" aligned with X.index. `params` is the dict the
+    registry hashes and stores, and `load(path, params=...)` must rebuild a
+    model that `predict`s identically to the one passed to `save(path)`.
+    """
+
+    params: dict
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> None:
+        ...
+
+    def predict(self, X: pd.DataFrame) -> pd.Series:
+        ...
+
+    def save(self, path: Path) -> None:
+        ...
+
+    @classmethod
+    def load(cls, path: Path, params: dict | None = None) -> "SignalModel":
+        ...
+
+
+def fit_model(model: SignalModel, X: pd.DataFrame, y: pd.Series) -> None:
+    """
+    Fit `model` on one training set. Engines that train on a quantized
+    matrix (XGBoost: `training_matrices`) get it built once here and
+    passed to `fit`, instead of `fit` rebuilding it from the frame.
+    """
+    build = getattr(model, "training_matrices", None)
+    if build is None:
+        model.fit(X, y)
+        return
+
+    train, valid = build(X, y)
+    model.fit(train, valid=valid)
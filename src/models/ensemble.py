@@ -0,0 +1,257 @@
+# src/models/ensemble.py
+from __future__ import annotations
+
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config.settings import XGB_NTHREAD
+from src.models.base import fit_model
+from src.models.linear_ranker import RidgeRanker
+from src.models.xgb_signal_model import XGBSignalModel
+from src.utils.parallel import attach_arrays, run_in_pool, share_arrays, threads_per_worker
+
+
+# Member kinds an ensemble can mix (each implements models.base.SignalModel)
+MEMBER_KINDS = {
+    "xgb": XGBSignalModel,
+    "ridge": RidgeRanker,
+}
+
+BLENDS = ("mean", "rank")
+
+
+def seed_members(
+    n: int,
+    params: dict | None = None,
+    num_boost_round: int = 300,
+    subsamples: tuple[float, ...] | None = None,
+) -> list[dict]:
+    """
+    `n` XGBoost member specs that differ only by seed (and, when given,
+    by row subsample, cycled through `subsamples`).
+    """
+    members: list[dict] = []
+    for i in range(n):
+        member_params = {**(params or {}), "seed": i}
+        if subsamples:
+            member_params["subsample"] = subsamples[i % len(subsamples)]
+        members.append(
+            {"kind": "xgb", "params": member_params, "num_boost_round": num_boost_round}
+        )
+    return members
+
+
+def _build_member(spec: dict, nthread: int | None = None):
+    cls = MEMBER_KINDS[spec["kind"]]
+    if spec["kind"] == "xgb":
+        return cls(
+            params=spec.get("params"),
+            num_boost_round=spec.get("num_boost_round", 300),
+            nthread=nthread,
+        )
+    return cls(params=spec.get("params"))
+
+
+def _load_member(spec: dict, path: Path):
+    cls = MEMBER_KINDS[spec["kind"]]
+    if spec["kind"] == "xgb":
+        return cls.load(
+            path,
+            params=spec.get("params"),
+            num_boost_round=spec.get("num_boost_round", 300),
+        )
+    return cls.load(path, params=spec.get("params"))
+
+
+# -------------------------------------------------
+# Worker: fit one member on the memmapped training set
+# -------------------------------------------------
+_WORKER: dict = {}
+
+
+def _init_member_worker(
+    paths: dict,
+    columns: list[str],
+    members: list[dict],
+    nthread: int,
+    out_dir: Path,
+) -> None:
+    arrays = attach_arrays(paths)
+
+    index = pd.MultiIndex.from_arrays(
+        [arrays["dates"], arrays["symbols"]],
+        names=["DATE", "SYMBOL"],
+    )
+
+    _WORKER.update(
+        X=pd.DataFrame(arrays["X"], index=index, columns=columns, copy=False),
+        y=pd.Series(arrays["y"], index=index, name="next_ret", copy=False),
+        members=members,
+        nthread=nthread,
+        out_dir=out_dir,
+    )
+
+
+def _member_worker(i: int) -> Path:
+    member = _build_member(_WORKER["members"][i], nthread=_WORKER["nthread"])
+    fit_model(member, _WORKER["X"], _WORKER["y"])
+
+    path = _WORKER["out_dir"] / f"member_{i}.json"
+    member.save(path)
+    return path
+
+
+# -------------------------------------------------
+# Ensemble
+# -------------------------------------------------
+class SignalEnsemble:
+    """
+    N scoring models trained on the same data and blended into one score.
+
+    members : specs {"kind": "xgb" | "ridge", "params": {...},
+              "num_boost_round": ...} — see `seed_members`
+    blend   : "mean" -> average of raw member scores
+              "rank" -> average of per-date percentile ranks (robust when
+                        members score on different scales)
+    n_jobs  : members trained concurrently in a process pool; with 1 they
+              are fitted in-process, XGBoost members sharing one
+              quantized matrix per max_bin
+    nthread : total thread budget, split evenly across the n_jobs workers
+
+    Saved as one manifest plus one artifact per member in the same folder,
+    so the registry stores and loads the whole ensemble at once.
+    """
+
+    def __init__(
+        self,
+        members: list[dict] | None = None,
+        blend: str = "mean",
+        n_jobs: int = 1,
+        nthread: int | None = None,
+    ):
+        if blend not in BLENDS:
+            raise ValueError(f"blend must be one of {BLENDS}, got {blend!r}")
+
+        self.params = {
+            "members": members or seed_members(5),
+            "blend": blend,
+        }
+        self.n_jobs = n_jobs
+        self.nthread = nthread or XGB_NTHREAD
+        self.models: list = []
+
+    @property
+    def members(self) -> list[dict]:
+        return self.params["members"]
+
+    def _fit_in_process(self, X: pd.DataFrame, y: pd.Series) -> None:
+        matrices: dict = {}
+        self.models = []
+
+        for spec in self.members:
+            member = _build_member(spec, nthread=self.nthread)
+            build = getattr(member, "training_matrices", None)
+
+            if build is None:
+                member.fit(X, y)
+            else:
+                # Seeds / subsamples don't change the bins: quantize once
+                key = member.params.get("max_bin")
+                if key not in matrices:
+                    matrices[key] = build(X, y)
+                train, valid = matrices[key]
+                member.fit(train, valid=valid)
+
+            self.models.append(member)
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> None:
+        n_jobs = min(self.n_jobs, len(self.members))
+        if n_jobs <= 1:
+            self._fit_in_process(X, y)
+            return
+
+        nthread = threads_per_worker(n_jobs, self.nthread)
+
+        with tempfile.TemporaryDirectory(prefix="ensemble_") as tmp:
+            tmp = Path(tmp)
+            paths = share_arrays(
+                {
+                    "X": X.to_numpy(dtype=np.float64),
+                    "y": y.to_numpy(dtype=np.float64),
+                    "dates": X.index.get_level_values("DATE").values,
+                    "symbols": X.index.get_level_values("SYMBOL").values,
+                },
+                tmp / "data",
+            )
+
+            member_paths = run_in_pool(
+                _member_worker,
+                range(len(self.members)),
+                n_jobs=n_jobs,
+                nthread=nthread,
+                initializer=_init_member_worker,
+                initargs=(paths, list(X.columns), self.members, nthread, tmp),
+            )
+
+            self.models = [
+                _load_member(spec, path)
+                for spec, path in zip(self.members, member_paths)
+            ]
+
+    def predict_members(self, X: pd.DataFrame) -> pd.DataFrame:
+        """One column of scores per member, aligned with X.index."""
+        if not self.models:
+            raise RuntimeError("Model not fitted yet")
+
+        return pd.DataFrame(
+            np.column_stack([m.predict(X).values for m in self.models]),
+            index=X.index,
+            columns=[f"member_{i}" for i in range(len(self.models))],
+        )
+
+    def predict(self, X: pd.DataFrame) -> pd.Series:
+        """Blended score as a Series named ml_score aligned with X.index."""
+        scores = self.predict_members(X)
+
+        if self.params["blend"] == "rank":
+            scores = scores.groupby(level="DATE").rank(pct=True)
+
+        return scores.mean(axis=1).rename("ml_score")
+
+    # -------------------------------------------------
+    # Persistence: manifest + member artifacts side by side
+    # -------------------------------------------------
+    def _member_path(self, path: Path, i: int) -> Path:
+        return path.parent / f"{path.stem}_member_{i}.json"
+
+    def save(self, path: Path) -> None:
+        if not self.models:
+            raise RuntimeError("Model not fitted yet")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        files = []
+        for i, member in enumerate(self.models):
+            member_path = self._member_path(path, i)
+            member.save(member_path)
+            files.append(member_path.name)
+
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({"params": self.params, "files": files}, fh, indent=2)
+
+    @classmethod
+    def load(cls, path: Path, params: dict | None = None) -> "SignalEnsemble":
+        with open(path, encoding="utf-8") as fh:
+            payload = json.load(fh)
+
+        params = params or payload["params"]
+        obj = cls(members=params["members"], blend=params["blend"])
+        obj.models = [
+            _load_member(spec, path.parent / name)
+            for spec, name in zip(obj.members, payload["files"])
+        ]
+        return obj
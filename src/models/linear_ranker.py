@@ -0,0 +1,179 @@
+# src/models/linear_ranker.py
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data.date_slices import DateSlicer
+
+
+def _design(X: np.ndarray) -> np.ndarray:
+    """Prepend an intercept column."""
+    return np.column_stack([np.ones(len(X)), X])
+
+
+def _penalty(n_features: int, alpha: float) -> np.ndarray:
+    """Ridge penalty on the slopes only (intercept unpenalized)."""
+    pen = np.eye(n_features + 1) * alpha
+    pen[0, 0] = 0.0
+    return pen
+
+
+def cross_sectional_rank_target(y: pd.Series) -> pd.Series:
+    """Per-DATE percentile rank of y, centred on 0 (rank-regression target)."""
+    return y.groupby(level="DATE").rank(pct=True) - 0.5
+
+
+class RidgeRanker:
+    """
+    Closed-form ridge regression in pure NumPy.
+
+    A second scoring engine next to XGBoost: one (k+1)x(k+1) solve per fit,
+    so it refits in milliseconds.
+
+    params:
+      alpha  : L2 penalty on the slopes (intercept is not penalized)
+      target : "raw"  -> regress next_ret
+               "rank" -> regress the per-date percentile rank of next_ret
+                         (rank regression, robust to return outliers)
+    """
+
+    def __init__(self, params: dict | None = None):
+        default_params = {
+            "alpha": 1.0,
+            "target": "raw",
+        }
+        self.params = {**default_params, **(params or {})}
+        self.coef_: np.ndarray | None = None      # [intercept, slopes...]
+        self.features_: list[str] | None = None
+
+    def _target(self, y: pd.Series) -> pd.Series:
+        if self.params["target"] == "rank":
+            return cross_sectional_rank_target(y)
+        return y
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> None:
+        """Solve (Z'Z + alpha*I) w = Z'y with Z = [1, X]."""
+        y = self._target(y)
+        ok = y.notna().values & X.notna().all(axis=1).values
+
+        Z = _design(X.values[ok])
+        t = y.values[ok]
+
+        A = Z.T @ Z + _penalty(X.shape[1], self.params["alpha"])
+        self.coef_ = np.linalg.solve(A, Z.T @ t)
+        self.features_ = list(X.columns)
+
+    def predict(self, X: pd.DataFrame) -> pd.Series:
+        """Return scores as a Series aligned with X.index."""
+        if self.coef_ is None:
+            raise RuntimeError("Model not fitted yet")
+
+        preds = self.coef_[0] + X[self.features_].values @ self.coef_[1:]
+        return pd.Series(preds, index=X.index, name="ml_score")
+
+    # -------------------------------------------------
+    # Persistence (plain JSON)
+    # -------------------------------------------------
+    def save(self, path: Path) -> None:
+        if self.coef_ is None:
+            raise RuntimeError("Model not fitted yet")
+
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(
+                {
+                    "params": self.params,
+                    "features": self.features_,
+                    "coef": self.coef_.tolist(),
+                },
+                fh,
+                indent=2,
+            )
+
+    @classmethod
+    def load(cls, path: Path, params: dict | None = None) -> "RidgeRanker":
+        with open(path, encoding="utf-8") as fh:
+            payload = json.load(fh)
+
+        obj = cls(params=params or payload["params"])
+        obj.features_ = payload["features"]
+        obj.coef_ = np.asarray(payload["coef"])
+        return obj
+
+
+def date_sufficient_stats(
+    X: np.ndarray,
+    t: np.ndarray,
+    starts: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Per-date ridge statistics for rows grouped by date (`starts` = first
+    row of each date, as in DateSlicer.starts):
+        zz : (T, k+1, k+1) Z'Z with Z = [1, X]
+        zy : (T, k+1)      Z't
+    Rows with a NaN feature or target contribute nothing.
+    """
+    ok = ~np.isnan(t) & ~np.isnan(X).any(axis=1)
+
+    Z = _design(np.where(ok[:, None], X, 0.0))
+    Zw = Z * ok[:, None]
+
+    zz = np.add.reduceat(Zw[:, :, None] * Z[:, None, :], starts, axis=0)
+    zy = np.add.reduceat(Zw * np.where(ok, t, 0.0)[:, None], starts, axis=0)
+    return zz, zy
+
+
+# -------------------------------------------------
+# Rolling daily refits over the whole history
+# -------------------------------------------------
+def rolling_ridge_scores(
+    features: pd.DataFrame,
+    labels: pd.Series,
+    alpha: float = 1.0,
+    target: str = "raw",
+    window_days: int | None = None,
+    min_train_days: int = 60,
+) -> pd.Series:
+    """
+    Refit the ridge every date on all earlier dates (or the last
+    `window_days` dates) and score that date — for the whole history in
+    one vectorized pass.
+
+    Per-date sufficient statistics Z'Z and Z'y are summed once; cumulative
+    sums give each date's training window and a batched solve returns every
+    date's coefficients together. Equivalent to calling RidgeRanker.fit on
+    rows with DATE < d for every d, but in milliseconds.
+
+    `features` / `labels` must be sorted by DATE. Returns ml_score aligned
+    with features.index (NaN until `min_train_days` dates are available).
+    """
+    slicer = DateSlicer(features.index)
+
+    y = cross_sectional_rank_target(labels) if target == "rank" else labels
+    X = features.values
+    zz, zy = date_sufficient_stats(X, y.values, slicer.starts)
+
+    # Stats of dates strictly before each date
+    zz_cum = np.concatenate([np.zeros_like(zz[:1]), np.cumsum(zz, axis=0)])
+    zy_cum = np.concatenate([np.zeros_like(zy[:1]), np.cumsum(zy, axis=0)])
+
+    n_dates = len(slicer.dates)
+    hi = np.arange(n_dates)
+    lo = np.zeros(n_dates, dtype=int) if window_days is None else np.maximum(hi - window_days, 0)
+
+    A = zz_cum[hi] - zz_cum[lo] + _penalty(X.shape[1], alpha)
+    b = zy_cum[hi] - zy_cum[lo]
+
+    trainable = (hi - lo) >= min_train_days
+    coef = np.full((n_dates, X.shape[1] + 1), np.nan)
+    if trainable.any():
+        coef[trainable] = np.linalg.solve(A[trainable], b[trainable][..., None])[..., 0]
+
+    # Each row scored with its own date's coefficients
+    row_date = np.repeat(np.arange(n_dates), slicer.ends - slicer.starts)
+    preds = np.einsum("ij,ij->i", _design(X), coef[row_date])
+
+    return pd.Series(preds, index=features.index, name="ml_score")
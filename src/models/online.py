@@ -0,0 +1,162 @@
+# src/models/online.py
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config.paths import MODELS_DIR
+from src.data.date_slices import DateSlicer
+from src.models.linear_ranker import (
+    _penalty,
+    cross_sectional_rank_target,
+    date_sufficient_stats,
+)
+
+
+ONLINE_STATE = MODELS_DIR / "online_ridge_state.json"
+
+
+class OnlineRidge:
+    """
+    Recursive least squares (information form) with exponential forgetting.
+
+    State is just the decayed Z'Z / Z'y sums plus the last absorbed date,
+    so `partial_fit` with one new labelled cross-section costs the same
+    whatever the history length:
+        A <- lam * A + Z_d'Z_d,   b <- lam * b + Z_d'y_d,
+        w  = (A + alpha*I)^-1 b
+
+    params:
+      alpha  : L2 penalty on the slopes (kept constant, not forgotten)
+      lam    : daily forgetting factor (1.0 = plain expanding ridge;
+               0.99 ~ 100-day memory)
+      target : "raw" / "rank" (per-date percentile rank of next_ret)
+    """
+
+    def __init__(self, params: dict | None = None):
+        default_params = {
+            "alpha": 1.0,
+            "lam": 0.995,
+            "target": "raw",
+        }
+        self.params = {**default_params, **(params or {})}
+        self.features_: list[str] | None = None
+        self.A_: np.ndarray | None = None
+        self.b_: np.ndarray | None = None
+        self.coef_: np.ndarray | None = None
+        self.last_date: pd.Timestamp | None = None
+        self.n_days = 0
+
+    def _reset(self, features: list[str]) -> None:
+        k = len(features) + 1
+        self.features_ = list(features)
+        self.A_ = np.zeros((k, k))
+        self.b_ = np.zeros(k)
+        self.coef_ = None
+        self.last_date = None
+        self.n_days = 0
+
+    def _solve(self) -> None:
+        pen = _penalty(len(self.features_), self.params["alpha"])
+        self.coef_ = np.linalg.solve(self.A_ + pen, self.b_)
+
+    # -------------------------------------------------
+    # Training
+    # -------------------------------------------------
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> None:
+        """Start from scratch and absorb every date in X (sorted by DATE)."""
+        self._reset(list(X.columns))
+        self.partial_fit(X, y)
+
+    def partial_fit(self, X: pd.DataFrame, y: pd.Series) -> int:
+        """
+        Absorb the labelled dates in X that are newer than `last_date`
+        (older ones are skipped, so re-running a day is a no-op).
+        Dates without a single valid label are not absorbed either — their
+        labels are usually just not known yet. Returns #dates absorbed.
+        """
+        if self.features_ is None:
+            self._reset(list(X.columns))
+        elif list(X.columns) != self.features_:
+            raise ValueError(f"Feature columns changed: {list(X.columns)} != {self.features_}")
+
+        if self.last_date is not None:
+            keep = X.index.get_level_values("DATE") > self.last_date
+            X, y = X.loc[keep], y.loc[keep]
+
+        if len(X) == 0:
+            return 0
+
+        if self.params["target"] == "rank":
+            y = cross_sectional_rank_target(y)
+
+        slicer = DateSlicer(X.index)
+        zz, zy = date_sufficient_stats(X.values, y.values, slicer.starts)
+
+        labelled = zz[:, 0, 0] > 0
+        if not labelled.any():
+            return 0
+
+        # Closed form of the per-day recursion: day d enters with weight
+        # lam ** (#labelled days after it)
+        lam = self.params["lam"]
+        n_new = int(labelled.sum())
+        age = n_new - np.cumsum(labelled)
+        w = np.where(labelled, lam ** age, 0.0)
+
+        decay = lam ** n_new
+        self.A_ = decay * self.A_ + np.einsum("t,tij->ij", w, zz)
+        self.b_ = decay * self.b_ + w @ zy
+
+        self.last_date = slicer.dates[labelled][-1]
+        self.n_days += n_new
+        self._solve()
+
+        return n_new
+
+    def predict(self, X: pd.DataFrame) -> pd.Series:
+        """Return scores as a Series aligned with X.index."""
+        if self.coef_ is None:
+            raise RuntimeError("Model not fitted yet")
+
+        preds = self.coef_[0] + X[self.features_].values @ self.coef_[1:]
+        return pd.Series(preds, index=X.index, name="ml_score")
+
+    # -------------------------------------------------
+    # Persistence (plain JSON, state included)
+    # -------------------------------------------------
+    def save(self, path: Path) -> None:
+        if self.coef_ is None:
+            raise RuntimeError("Model not fitted yet")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(
+                {
+                    "params": self.params,
+                    "features": self.features_,
+                    "A": self.A_.tolist(),
+                    "b": self.b_.tolist(),
+                    "last_date": str(self.last_date.date()),
+                    "n_days": self.n_days,
+                },
+                fh,
+                indent=2,
+            )
+
+    @classmethod
+    def load(cls, path: Path, params: dict | None = None) -> "OnlineRidge":
+        with open(path, encoding="utf-8") as fh:
+            payload = json.load(fh)
+
+        obj = cls(params=params or payload["params"])
+        obj.features_ = payload["features"]
+        obj.A_ = np.asarray(payload["A"])
+        obj.b_ = np.asarray(payload["b"])
+        obj.last_date = pd.Timestamp(payload["last_date"])
+        obj.n_days = payload["n_days"]
+        obj._solve()
+        return obj
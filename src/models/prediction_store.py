@@ -0,0 +1,158 @@
+# src/models/prediction_store.py
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config.paths import PREDICTIONS_DIR
+from src.config.settings import FEATURE_VERSION
+from src.data.date_slices import DateSlicer
+from src.models.base import SignalModel
+
+
+PRODUCTION_FILE = "production.json"
+
+
+def feature_version(columns) -> str:
+    """Short hash of the feature list + settings.FEATURE_VERSION."""
+    raw = json.dumps({"columns": list(columns), "version": FEATURE_VERSION})
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def _empty() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "DATE": pd.Series(dtype="datetime64[ns]"),
+            "SYMBOL": pd.Series(dtype=object),
+            "ml_score": pd.Series(dtype=float),
+        }
+    )
+
+
+class PredictionStore:
+    """
+    Cached ML scores keyed by (model version, feature version, DATE).
+
+    One CSV per (model, feature) key under data/processed/predictions:
+        <model_key>__<feature_key>.csv   DATE, SYMBOL, ml_score
+        production.json                  key + date of the last production run
+
+    `model_key` is the registry version (registry.model_version), which is
+    known before training, so callers can skip both training and `predict`
+    when every requested date is already cached. Files are append-only and
+    read once per store instance.
+
+    Walk-forward, batch and research runs write keys of their own; only
+    the daily production run calls `set_production`, so `production`
+    always returns the scores the production model gave.
+    """
+
+    def __init__(self, root: Path = PREDICTIONS_DIR):
+        self.root = root
+        self._frames: dict[tuple[str, str], pd.DataFrame] = {}
+
+    def _path(self, model_key: str, feature_key: str) -> Path:
+        return self.root / f"{model_key}__{feature_key}.csv"
+
+    def load(self, model_key: str, feature_key: str) -> pd.DataFrame:
+        """Every cached row for the key (empty frame if none)."""
+        key = (model_key, feature_key)
+        if key not in self._frames:
+            path = self._path(model_key, feature_key)
+            self._frames[key] = (
+                # round_trip: cached scores must equal what predict returned
+                pd.read_csv(path, parse_dates=["DATE"], float_precision="round_trip")
+                if path.exists()
+                else _empty()
+            )
+        return self._frames[key]
+
+    def cached_dates(self, model_key: str, feature_key: str) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self.load(model_key, feature_key)["DATE"].unique())
+
+    def has(self, model_key: str, feature_key: str, dates) -> bool:
+        """True when every date in `dates` is cached."""
+        return pd.DatetimeIndex(dates).isin(self.cached_dates(model_key, feature_key)).all()
+
+    def get(self, model_key: str, feature_key: str, dates) -> pd.Series:
+        """Cached ml_score for `dates`, indexed by (DATE, SYMBOL)."""
+        df = self.load(model_key, feature_key)
+        df = df.loc[df["DATE"].isin(pd.DatetimeIndex(dates))]
+        return df.set_index(["DATE", "SYMBOL"])["ml_score"]
+
+    def put(self, model_key: str, feature_key: str, scores: pd.Series) -> None:
+        """Append scores (indexed by DATE, SYMBOL) for dates not cached yet."""
+        # float64 so float32 booster output survives the CSV round trip exactly
+        new = scores.astype("float64").rename("ml_score").reset_index()
+        new = new.loc[~new["DATE"].isin(self.cached_dates(model_key, feature_key))]
+        if new.empty:
+            return
+
+        path = self._path(model_key, feature_key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        new.to_csv(path, mode="a", header=not path.exists(), index=False)
+
+        key = (model_key, feature_key)
+        self._frames[key] = pd.concat([self.load(*key), new], ignore_index=True)
+
+    def set_production(self, model_key: str, feature_key: str, date: pd.Timestamp) -> None:
+        """Record the key the daily production run scored `date` with."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / PRODUCTION_FILE, "w", encoding="utf-8") as fh:
+            json.dump(
+                {"model_key": model_key, "feature_key": feature_key, "date": str(pd.Timestamp(date).date())},
+                fh,
+                indent=2,
+            )
+
+    def get_or_predict(
+        self,
+        model: SignalModel,
+        model_key: str,
+        features: pd.DataFrame,
+        dates,
+        slicer: DateSlicer | None = None,
+    ) -> pd.Series:
+        """
+        ml_score for every row of `features` on `dates`: cached dates are
+        read back, the missing ones are scored with a single `predict`
+        call and stored. Rows with a missing feature are not scored.
+        """
+        dates = pd.DatetimeIndex(dates)
+        feature_key = feature_version(features.columns)
+
+        missing = dates[~dates.isin(self.cached_dates(model_key, feature_key))]
+        if len(missing) > 0:
+            slicer = slicer or DateSlicer(features.index)
+            rows = np.concatenate(
+                [np.arange(s.start, s.stop) for s in map(slicer.on, missing)]
+            )
+            X = features.iloc[rows]
+            X = X.loc[X.notna().all(axis=1)]
+
+            if len(X) > 0:
+                self.put(model_key, feature_key, model.predict(X))
+
+        return self.get(model_key, feature_key, dates)
+
+    def production(self, date: pd.Timestamp | None = None) -> pd.DataFrame:
+        """
+        Scores (DATE, SYMBOL, ml_score) of the date the last production run
+        scored, from the model version it used; empty frame if there is no
+        production run yet, or it scored a date other than `date`.
+        """
+        pointer = self.root / PRODUCTION_FILE
+        if not pointer.exists():
+            return _empty()
+
+        with open(pointer, encoding="utf-8") as fh:
+            ref = json.load(fh)
+
+        if date is not None and pd.Timestamp(ref["date"]) != pd.Timestamp(date):
+            return _empty()
+
+        return self.get(ref["model_key"], ref["feature_key"], [ref["date"]]).reset_index()
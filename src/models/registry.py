@@ -0,0 +1,170 @@
+# src/models/registry.py
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from src.config.paths import MODELS_DIR
+from src.models.ensemble import SignalEnsemble
+from src.models.linear_ranker import RidgeRanker
+from src.models.online import OnlineRidge
+from src.models.xgb_signal_model import RUNTIME_PARAMS, XGBSignalModel
+
+
+# -------------------------------------------------
+# Registry layout
+# -------------------------------------------------
+# data/models/<version>/
+#     model.json   model artifact (ensembles: manifest + model_member_<i>.json)
+#     meta.json    kind, feature list, training date range, params + hash
+#
+# version = <kind>_<train_end YYYYMMDD>_<params hash>
+
+META_FILE = "meta.json"
+ARTIFACT_FILE = "model.json"
+
+# Every kind implements models.base.SignalModel
+MODEL_KINDS = {
+    "xgb": XGBSignalModel,
+    "ridge": RidgeRanker,
+    "ensemble": SignalEnsemble,
+    "online": OnlineRidge,
+}
+
+
+def params_hash(params: dict, num_boost_round: int | None = None) -> str:
+    """
+    Stable short hash of model params (key order independent).
+    Hardware-only params (device, nthread) are ignored, so a model trained
+    on a GPU box stays compatible with CPU scoring.
+    """
+    params = {k: v for k, v in params.items() if k not in RUNTIME_PARAMS}
+    payload = {"params": params, "num_boost_round": num_boost_round}
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def model_kind(model) -> str:
+    for kind, cls in MODEL_KINDS.items():
+        if isinstance(model, cls):
+            return kind
+    raise TypeError(f"Unsupported model type: {type(model).__name__}")
+
+
+def model_version(model, train_end: pd.Timestamp) -> str:
+    """
+    Registry version of `model` trained up to `train_end`:
+        <kind>_<train_end YYYYMMDD>_<params hash>
+    Known before training, so it also keys cached predictions.
+    """
+    phash = params_hash(model.params, getattr(model, "num_boost_round", None))
+    return f"{model_kind(model)}_{pd.Timestamp(train_end):%Y%m%d}_{phash}"
+
+
+# -------------------------------------------------
+# Write
+# -------------------------------------------------
+def register_model(
+    model,
+    feature_cols: list[str],
+    train_start: pd.Timestamp,
+    train_end: pd.Timestamp,
+    registry_dir: Path = MODELS_DIR,
+) -> dict:
+    """
+    Persist a fitted model with its metadata and return the metadata.
+    Re-registering the same (kind, train_end, params) overwrites it.
+    """
+    kind = model_kind(model)
+    num_boost_round = getattr(model, "num_boost_round", None)
+    phash = params_hash(model.params, num_boost_round)
+    train_end = pd.Timestamp(train_end)
+
+    version = model_version(model, train_end)
+    out_dir = registry_dir / version
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    model.save(out_dir / ARTIFACT_FILE)
+
+    meta = {
+        "version": version,
+        "kind": kind,
+        "features": list(feature_cols),
+        "train_start": str(pd.Timestamp(train_start).date()),
+        "train_end": str(train_end.date()),
+        "params": model.params,
+        "num_boost_round": num_boost_round,
+        "params_hash": phash,
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+    with open(out_dir / META_FILE, "w", encoding="utf-8") as fh:
+        json.dump(meta, fh, indent=2, default=str)
+
+    return meta
+
+
+# -------------------------------------------------
+# Read
+# -------------------------------------------------
+def list_models(registry_dir: Path = MODELS_DIR) -> list[dict]:
+    """All registered model metadata, oldest training window first."""
+    metas: list[dict] = []
+
+    if not registry_dir.exists():
+        return metas
+
+    for meta_path in registry_dir.glob(f"*/{META_FILE}"):
+        with open(meta_path, encoding="utf-8") as fh:
+            metas.append(json.load(fh))
+
+    return sorted(metas, key=lambda m: (m["train_end"], m["created_at"]))
+
+
+def load_model(meta: dict, registry_dir: Path = MODELS_DIR):
+    """Load the artifact described by `meta`."""
+    cls = MODEL_KINDS[meta["kind"]]
+
+    kwargs = {"params": meta["params"]}
+    if meta.get("num_boost_round") is not None:
+        kwargs["num_boost_round"] = meta["num_boost_round"]
+
+    return cls.load(registry_dir / meta["version"] / ARTIFACT_FILE, **kwargs)
+
+
+def find_latest(
+    feature_cols: list[str],
+    as_of: pd.Timestamp | None = None,
+    params_hash_: str | None = None,
+    kind: str = "xgb",
+    registry_dir: Path = MODELS_DIR,
+) -> dict | None:
+    """
+    Metadata of the most recent compatible model, or None.
+
+    Compatible = same kind, same feature list (same order), same params
+    hash when given, and trained strictly before `as_of` (no look-ahead).
+    """
+    candidates = [
+        m for m in list_models(registry_dir)
+        if m["kind"] == kind
+        and m["features"] == list(feature_cols)
+        and (params_hash_ is None or m["params_hash"] == params_hash_)
+        and (as_of is None or pd.Timestamp(m["train_end"]) < pd.Timestamp(as_of))
+    ]
+
+    return candidates[-1] if candidates else None
+
+
+def is_stale(
+    meta: dict,
+    as_of: pd.Timestamp,
+    max_age_days: int = 7,
+) -> bool:
+    """True when the model's training window ended `max_age_days`+ before `as_of`."""
+    age = pd.Timestamp(as_of) - pd.Timestamp(meta["train_end"])
+    return age.days >= max_age_days
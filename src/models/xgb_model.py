@@ -1,22 +1,23 @@
-import xgboost as xgb
-from sklearn.metrics import roc_auc_score
+from src.config.settings import XGB_PARAMS
+from src.models.xgb_signal_model import XGBSignalModel as _XGBRegressor
 
-class XGBSignalModel:
-    def __init__(self, params=None):
-        self.params = params or {
-            "objective": "binary:logistic",
-            "max_depth": 4,
-            "eta": 0.03,
-            "subsample": 0.8,
-            "colsample_bytree": 0.8,
-            "eval_metric": "auc"
-        }
-        self.model = None
+
+class XGBSignalModel(_XGBRegressor):
+    """
+    Up / down classifier (binary:logistic, AUC) on the shared XGBoost
+    wrapper: same fit / predict / save / load (models.base.SignalModel),
+    with settings.XGB_PARAMS as defaults. `predict` returns P(up).
+    """
+
+    def __init__(self, params=None, num_boost_round=300, **kwargs):
+        super().__init__(
+            params={**XGB_PARAMS, **(params or {})},
+            num_boost_round=num_boost_round,
+            **kwargs,
+        )
 
     def train(self, X, y):
-        dtrain = xgb.DMatrix(X, label=y)
-        self.model = xgb.train(self.params, dtrain, num_boost_round=300)
+        self.fit(X, y)
 
     def predict_proba(self, X):
-        dtest = xgb.DMatrix(X)
-        return self.model.predict(dtest)
+        return self.predict(X).values
@@ -1,48 +1,289 @@
 # src/models/xgb_signal_model.py
 from __future__ import annotations
 
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
 import xgboost as xgb
 import pandas as pd
 
+from src.config.settings import XGB_PROFILE, XGB_PROFILES
+
+# Params that only pick hardware. They never change what the trees mean,
+# so they are excluded from compatibility hashes and re-applied from the
+# current profile when a saved model is loaded.
+RUNTIME_PARAMS = ("device", "nthread")
+
+
+@dataclass
+class FeatureMatrix:
+    """
+    Quantized XGBoost matrix built once from a feature frame.
+
+    Pass it to `fit` / `update` / `predict` instead of the DataFrame to
+    skip rebuilding (and re-quantizing) the same data on every call.
+    """
+    dmatrix: xgb.DMatrix
+    index: pd.Index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+def chronological_split(
+    index: pd.MultiIndex,
+    valid_days: int,
+    embargo_days: int = 1,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Split a (DATE, SYMBOL) index into train / validation row masks:
+    the last `valid_days` dates are validation, the `embargo_days` dates
+    before them are dropped so labels can't leak across the boundary.
+    """
+    dates = index.get_level_values("DATE")
+    unique_dates = np.sort(dates.unique())
+
+    if len(unique_dates) <= valid_days + embargo_days:
+        raise ValueError(
+            f"Need more than {valid_days + embargo_days} dates for a "
+            f"validation tail, got {len(unique_dates)}"
+        )
+
+    valid_start = unique_dates[-valid_days]
+    train_end = unique_dates[-(valid_days + embargo_days)]
+
+    return np.asarray(dates < train_end), np.asarray(dates >= valid_start)
+
 
 class XGBSignalModel:
     """
     XGBoost model for ranking symbols by expected next-day return.
 
     - Uses regression on clipped forward return (next_ret).
-    - GPU training via device="cuda" (change to "cpu" if ever needed).
+    - Hardware via `profile` from settings.XGB_PROFILES ("cpu" default,
+      "cuda" on a GPU box); `nthread` overrides the CPU thread count.
+    - Optional early stopping on a chronological validation tail
+      (`valid_days` dates, after an `embargo_days` gap). The fitted booster
+      is cut at the best iteration, so `predict` only uses those trees.
+    - Optional `eta_schedule`: a per-round learning-rate list (its length
+      caps the rounds) or a callable round -> eta.
     """
 
-    def __init__(self, params: dict | None = None, num_boost_round: int = 300):
+    def __init__(
+        self,
+        params: dict | None = None,
+        num_boost_round: int = 300,
+        profile: str = XGB_PROFILE,
+        nthread: int | None = None,
+        early_stopping_rounds: int | None = None,
+        valid_days: int = 60,
+        embargo_days: int = 1,
+        eta_schedule: list[float] | Callable[[int], float] | None = None,
+    ):
         default_params = {
             "objective": "reg:squarederror",
-    "max_depth": 5,
-    "eta": 0.03,
-    "subsample": 0.8,
-    "colsample_bytree": 0.8,
-    "tree_method": "hist",
-    "device": "cuda",
-    "max_bin": 512,
-    "eval_metric": "rmse",
+            "max_depth": 5,
+            "eta": 0.03,
+            "subsample": 0.8,
+            "colsample_bytree": 0.8,
+            "max_bin": 512,
+            "eval_metric": "rmse",
+            **XGB_PROFILES[profile],
         }
+        if nthread is not None:
+            default_params["nthread"] = nthread
+
         self.params = {**default_params, **(params or {})}
         self.num_boost_round = num_boost_round
+        self.early_stopping_rounds = early_stopping_rounds
+        self.valid_days = valid_days
+        self.embargo_days = embargo_days
+        self.eta_schedule = eta_schedule
+        self.best_iteration: int | None = None
         self.model: xgb.Booster | None = None
 
-    def fit(self, X: pd.DataFrame, y: pd.Series) -> None:
-        """Train the model on features X and target y."""
-        dtrain = xgb.DMatrix(X, label=y)
-        self.model = xgb.train(
+    # -------------------------------------------------
+    # Quantized matrices (build once, reuse)
+    # -------------------------------------------------
+    def build_matrix(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series | None = None,
+        ref: FeatureMatrix | None = None,
+    ) -> FeatureMatrix:
+        """
+        Build a QuantileDMatrix with this model's max_bin.
+
+        For validation / scoring data pass the training matrix as `ref`
+        so both share the same bin edges.
+        """
+        dmatrix = xgb.QuantileDMatrix(
+            X,
+            label=y,
+            max_bin=self.params.get("max_bin", 256),
+            ref=ref.dmatrix if ref is not None else None,
+            nthread=self.params.get("nthread", -1),
+        )
+        return FeatureMatrix(dmatrix=dmatrix, index=X.index)
+
+    def training_matrices(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+    ) -> tuple[FeatureMatrix, FeatureMatrix | None]:
+        """
+        (train, valid) matrices for `fit(train, valid=valid)`, built once
+        per training set. `valid` is the chronological validation tail when
+        early stopping is on (see `chronological_split`), else None.
+        """
+        if self.early_stopping_rounds is None:
+            return self.build_matrix(X, y), None
+
+        train_mask, valid_mask = chronological_split(X.index, self.valid_days, self.embargo_days)
+        train = self.build_matrix(X.loc[train_mask], y.loc[train_mask])
+        valid = self.build_matrix(X.loc[valid_mask], y.loc[valid_mask], ref=train)
+        return train, valid
+
+    def _train_matrix(
+        self,
+        X: pd.DataFrame | FeatureMatrix,
+        y: pd.Series | None,
+    ) -> xgb.DMatrix:
+        if isinstance(X, FeatureMatrix):
+            return X.dmatrix
+        if y is None:
+            raise ValueError("y is required when X is a DataFrame")
+        return self.build_matrix(X, y).dmatrix
+
+    # -------------------------------------------------
+    # Train / predict
+    # -------------------------------------------------
+    def _rounds_and_callbacks(self) -> tuple[int, list]:
+        if self.eta_schedule is None:
+            return self.num_boost_round, []
+
+        rounds = self.num_boost_round
+        if not callable(self.eta_schedule):
+            rounds = min(rounds, len(self.eta_schedule))
+
+        return rounds, [xgb.callback.LearningRateScheduler(self.eta_schedule)]
+
+    def fit(
+        self,
+        X: pd.DataFrame | FeatureMatrix,
+        y: pd.Series | None = None,
+        valid: FeatureMatrix | None = None,
+    ) -> None:
+        """
+        Train the model on features X and target y (or a prebuilt FeatureMatrix).
+
+        With early stopping enabled, a DataFrame X is split chronologically
+        (see `chronological_split`); a prebuilt FeatureMatrix needs its
+        validation matrix passed as `valid` (see `training_matrices`).
+        """
+        rounds, callbacks = self._rounds_and_callbacks()
+
+        if self.early_stopping_rounds is None:
+            self.best_iteration = None
+            self.model = xgb.train(
+                params=self.params,
+                dtrain=self._train_matrix(X, y),
+                num_boost_round=rounds,
+                callbacks=callbacks,
+            )
+            return
+
+        if valid is None:
+            if isinstance(X, FeatureMatrix):
+                raise ValueError("Pass `valid` when fitting a FeatureMatrix with early stopping")
+            if y is None:
+                raise ValueError("y is required when X is a DataFrame")
+
+            train, valid = self.training_matrices(X, y)
+            dtrain = train.dmatrix
+        else:
+            dtrain = self._train_matrix(X, y)
+
+        booster = xgb.train(
             params=self.params,
             dtrain=dtrain,
-            num_boost_round=self.num_boost_round,
+            num_boost_round=rounds,
+            evals=[(valid.dmatrix, "valid")],
+            early_stopping_rounds=self.early_stopping_rounds,
+            callbacks=callbacks,
+            verbose_eval=False,
         )
 
-    def predict(self, X: pd.DataFrame) -> pd.Series:
+        # Keep only the trees up to the best validation round
+        self.best_iteration = booster.best_iteration
+        self.model = booster[: self.best_iteration + 1]
+
+    def update(
+        self,
+        X: pd.DataFrame | FeatureMatrix,
+        y: pd.Series | None = None,
+        num_boost_round: int = 100,
+    ) -> None:
+        """
+        Continue boosting the fitted booster on new rows only (warm start).
+
+        Adds `num_boost_round` trees on top of the existing ones, so an
+        expanding-window walk-forward only pays for the rows added since
+        the previous fold.
+        """
+        if self.model is None:
+            raise RuntimeError("Model not fitted yet")
+
+        self.model = xgb.train(
+            params=self.params,
+            dtrain=self._train_matrix(X, y),
+            num_boost_round=num_boost_round,
+            xgb_model=self.model,
+        )
+
+    def predict(self, X: pd.DataFrame | FeatureMatrix) -> pd.Series:
         """Return scores as a Series aligned with X.index."""
         if self.model is None:
             raise RuntimeError("Model not fitted yet")
 
-        dtest = xgb.DMatrix(X)
-        preds = self.model.predict(dtest)
+        if isinstance(X, FeatureMatrix):
+            preds = self.model.predict(X.dmatrix)
+        else:
+            # No DMatrix round-trip for plain frames
+            preds = self.model.inplace_predict(X)
+
         return pd.Series(preds, index=X.index, name="ml_score")
+
+    @property
+    def n_trees(self) -> int:
+        return self.model.num_boosted_rounds() if self.model is not None else 0
+
+    # -------------------------------------------------
+    # Persistence
+    # -------------------------------------------------
+    def save(self, path: Path) -> None:
+        """Save the booster as XGBoost JSON."""
+        if self.model is None:
+            raise RuntimeError("Model not fitted yet")
+
+        self.model.save_model(str(path))
+
+    @classmethod
+    def load(
+        cls,
+        path: Path,
+        params: dict | None = None,
+        num_boost_round: int = 300,
+    ) -> "XGBSignalModel":
+        """Load a booster saved with `save`, ready for `predict`."""
+        params = {
+            k: v for k, v in (params or {}).items() if k not in RUNTIME_PARAMS
+        }
+        obj = cls(params=params, num_boost_round=num_boost_round)
+        obj.model = xgb.Booster()
+        obj.model.load_model(str(path))
+        obj.model.set_param({k: obj.params[k] for k in RUNTIME_PARAMS if k in obj.params})
+        return obj
+
@@ -1,13 +1,22 @@
 # scripts/run_walkforward_ml.py
 # -*- coding: utf-8 -*-
 
+import argparse
+
 import pandas as pd
 
-from src.backtest.walkforward_ml import main
+from src.backtest.walkforward_ml import (
+    MODEL_ENGINES,
+    TRAINING_MODES,
+    compare_engines,
+    compare_training_modes,
+    main,
+)
 from src.config.paths import CLEANED_HIST_DIR
 from src.data.loader import load_symbol_history
 from src.features.momentum import add_momentum_features
 from src.labels.forward_returns import build_forward_returns
+from src.models.prediction_store import PredictionStore
 
 
 def load_all_history() -> pd.DataFrame:
@@ -29,7 +38,16 @@ def load_all_history() -> pd.DataFrame:
     return df
 
 
-def run():
+def run(
+    mode: str = "full",
+    incremental_rounds: int = 100,
+    compare: bool = False,
+    n_jobs: int = 1,
+    early_stopping_rounds: int | None = None,
+    engine: str = "xgb",
+    compare_models: bool = False,
+    use_cache: bool = False,
+):
     print("🚀 Starting ML walk-forward")
 
     # -----------------------------
@@ -89,15 +107,98 @@ def run():
     # -----------------------------
     # RUN WALK-FORWARD
     # -----------------------------
-    main(
-        features=features,
-        labels=labels,
-        returns=returns,
-        top_n=5,
-    )
+    if compare_models:
+        compare_engines(
+            features=features,
+            labels=labels,
+            returns=returns,
+            top_n=5,
+        )
+    elif compare:
+        compare_training_modes(
+            features=features,
+            labels=labels,
+            returns=returns,
+            top_n=5,
+            incremental_rounds=incremental_rounds,
+        )
+    else:
+        main(
+            features=features,
+            labels=labels,
+            returns=returns,
+            top_n=5,
+            mode=mode,
+            incremental_rounds=incremental_rounds,
+            n_jobs=n_jobs,
+            model_kwargs=(
+                {"early_stopping_rounds": early_stopping_rounds}
+                if early_stopping_rounds
+                else None
+            ),
+            engine=engine,
+            store=PredictionStore() if use_cache else None,
+        )
 
     print("✅ ML walk-forward completed successfully")
 
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description="ML walk-forward by calendar year.")
+    parser.add_argument(
+        "--mode",
+        choices=TRAINING_MODES,
+        default="full",
+        help="full retrain, incremental boosting (xgb) or daily refits (ridge)",
+    )
+    parser.add_argument(
+        "--incremental-rounds",
+        type=int,
+        default=100,
+        help="Extra boosting rounds per fold in incremental mode (default: 100)",
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Run full and incremental modes and save a comparison report",
+    )
+    parser.add_argument(
+        "--n-jobs",
+        type=int,
+        default=1,
+        help="Worker processes for full-mode folds (default: 1)",
+    )
+    parser.add_argument(
+        "--early-stopping",
+        type=int,
+        default=None,
+        help="Stop boosting after this many rounds without validation gain",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=MODEL_ENGINES,
+        default="xgb",
+        help="Scoring model: XGBoost or the NumPy ridge baseline (default: xgb)",
+    )
+    parser.add_argument(
+        "--compare-engines",
+        action="store_true",
+        help="Run every engine and save a speed / accuracy comparison",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse / store full-mode fold predictions in the prediction store",
+    )
+    args = parser.parse_args()
+
+    run(
+        mode=args.mode,
+        incremental_rounds=args.incremental_rounds,
+        compare=args.compare,
+        n_jobs=args.n_jobs,
+        early_stopping_rounds=args.early_stopping,
+        engine=args.engine,
+        compare_models=args.compare_engines,
+        use_cache=args.cache,
+    )
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import argparse
+import time
+
 import pandas as pd
 from pathlib import Path
 import sys
@@ -9,12 +12,25 @@ import sys
 # =====================================================
 ROOT = Path(__file__).resolve().parents[2]
 
+# Run as a plain script by daily_run.ps1 -> make `src` importable
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.config.paths import RANK_HISTORY_DIR
+from src.signals.rank_store import upsert_date, write_history
+
 MASTER_DIR = ROOT / "data" / "master" / "symbols"
 OUT_DIR    = ROOT / "data" / "processed"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
 OUT_LATEST = OUT_DIR / "daily_ranking_latest.csv"
-OUT_HIST   = OUT_DIR / "daily_ranking_history.csv"
+
+# Closes at or below this are bad prints (e.g. -8.9e-16), not prices:
+# one of them turns a 1-day return into ~1e14
+MIN_CLOSE = 0.01
+
+# Closes per symbol the daily snapshot needs (VOL_10D = 10 daily returns)
+SNAPSHOT_BARS = 11
 
 print("\nSTEP 4 | BUILD FULL DAILY RANKINGS")
 print("-" * 60)
@@ -29,114 +45,173 @@ def detect_column(cols, candidates):
     return None
 
 
-def main() -> int:
-    rows = []
-    skipped = []
+def read_master_closes(file: Path) -> tuple[pd.DataFrame | None, str | None]:
+    """
+    (DATE, SYMBOL, CLOSE frame sorted by DATE, None) for one master symbol
+    file, or (None, skip reason). Closes at or below MIN_CLOSE are dropped
+    before any return is taken; one row per DATE, the last one wins.
+    """
+    try:
+        df = pd.read_csv(file)
+    except Exception:
+        return None, "read_error"
 
-    # =====================================================
-    # LOAD MASTER SYMBOL FILES
-    # =====================================================
-    for file in MASTER_DIR.glob("*.csv"):
-        symbol = file.stem.upper().strip()
+    if df.empty:
+        return None, "empty_file"
 
-        try:
-            df = pd.read_csv(file)
-        except Exception:
-            skipped.append((symbol, "read_error"))
-            continue
+    # ---- normalize columns
+    df.columns = [c.upper().strip() for c in df.columns]
 
-        if df.empty:
-            skipped.append((symbol, "empty_file"))
-            continue
+    # 🔥 HARD FIX: DROP DUPLICATE COLUMNS (CRITICAL)
+    df = df.loc[:, ~df.columns.duplicated()]
 
-        # ---- normalize columns
-        df.columns = [c.upper().strip() for c in df.columns]
+    date_col = detect_column(df.columns, ["DATE", "TRADE_DATE", "TIMESTAMP"])
+    close_col = detect_column(df.columns, ["CLOSE", "CLOSE_PRICE", "CLOSE_FUT"])
 
-        # 🔥 HARD FIX: DROP DUPLICATE COLUMNS (CRITICAL)
-        df = df.loc[:, ~df.columns.duplicated()]
+    if not date_col or not close_col:
+        return None, "missing_date_or_close"
 
-        date_col = detect_column(df.columns, ["DATE", "TRADE_DATE", "TIMESTAMP"])
-        close_col = detect_column(df.columns, ["CLOSE", "CLOSE_PRICE", "CLOSE_FUT"])
+    closes = pd.DataFrame({
+        "DATE": pd.to_datetime(df[date_col], errors="coerce"),
+        "SYMBOL": file.stem.upper().strip(),
+        "CLOSE": pd.to_numeric(df[close_col], errors="coerce"),
+    }).dropna(subset=["DATE", "CLOSE"])
 
-        if not date_col or not close_col:
-            skipped.append((symbol, "missing_date_or_close"))
-            continue
+    closes = closes.loc[closes["CLOSE"] > MIN_CLOSE]
 
-        df[date_col] = pd.to_datetime(df[date_col], errors="coerce")
-        df = df.dropna(subset=[date_col, close_col])
+    closes = (
+        closes.drop_duplicates(subset=["DATE"], keep="last")
+              .sort_values("DATE")
+              .reset_index(drop=True)
+    )
+    return closes, None
 
-        if len(df) < 6:
-            skipped.append((symbol, "insufficient_history"))
-            continue
 
-        df = df.sort_values(date_col)
+# =====================================================
+# BACKFILL: EVERY DATE IN ONE VECTORIZED PASS
+# =====================================================
+def load_master_closes() -> pd.DataFrame:
+    """
+    DATE, SYMBOL, CLOSE for every row of every master symbol file
+    (see `read_master_closes`), sorted by SYMBOL, DATE.
+    """
+    frames = [df for df, _ in map(read_master_closes, MASTER_DIR.glob("*.csv")) if df is not None]
+
+    if not frames:
+        return pd.DataFrame(columns=["DATE", "SYMBOL", "CLOSE"])
+
+    return (
+        pd.concat(frames, ignore_index=True)
+          .sort_values(["SYMBOL", "DATE"])
+          .reset_index(drop=True)
+    )
 
-        try:
-            latest = df.iloc[-1]
-            ret_1d = df[close_col].pct_change().iloc[-1]
-            ret_5d = df[close_col].pct_change(5).iloc[-1]
-            vol_10 = df[close_col].pct_change().rolling(10).std().iloc[-1]
-        except Exception:
-            skipped.append((symbol, "calc_error"))
-            continue
 
-        rows.append({
-            "DATE": latest[date_col],
-            "SYMBOL": symbol,
-            "CLOSE": float(latest[close_col]),
-            "RET_1D": ret_1d,
-            "RET_5D": ret_5d,
-            "VOL_10D": vol_10,
-        })
+def compute_rank_history(closes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Snapshot columns (RET_1D, RET_5D, VOL_10D, RANK_*, SCORE, TREND_BOOST,
+    RANK) for every date at once. Returns / vol come from per-symbol
+    shifted ops, ranks from one grouped per-DATE rank(pct=True).
+    Input must be sorted by SYMBOL, DATE.
+    """
+    g = closes.groupby("SYMBOL")["CLOSE"]
 
-    # =====================================================
-    # VALIDATION
-    # =====================================================
-    if not rows:
+    hist = closes.assign(
+        RET_1D=g.pct_change(),
+        RET_5D=g.pct_change(5),
+    )
+    hist["VOL_10D"] = (
+        hist.groupby("SYMBOL")["RET_1D"]
+            .rolling(10)
+            .std()
+            .reset_index(level=0, drop=True)
+    )
+
+    hist = hist.dropna(subset=["RET_1D", "RET_5D"])
+
+    ranks = hist.groupby("DATE")[["RET_5D", "RET_1D"]].rank(pct=True)
+    hist["RANK_RET_5D"] = ranks["RET_5D"]
+    hist["RANK_RET_1D"] = ranks["RET_1D"]
+
+    hist["SCORE"] = hist["RANK_RET_5D"] + hist["RANK_RET_1D"]
+    hist["TREND_BOOST"] = (hist["RET_5D"] > 0).astype(int)
+
+    # RANK 1 = best SCORE per date (ties keep SYMBOL order)
+    hist = hist.sort_values(
+        ["DATE", "SCORE", "SYMBOL"],
+        ascending=[True, False, True],
+    ).reset_index(drop=True)
+    hist["RANK"] = hist.groupby("DATE").cumcount() + 1
+
+    return hist
+
+
+def backfill() -> int:
+    t0 = time.perf_counter()
+
+    closes = load_master_closes()
+    if closes.empty:
         print(" No symbol data loaded")
         return 1
 
-    ranked = pd.DataFrame(rows)
+    hist = compute_rank_history(closes)
+    n_parts = write_history(hist)
 
-    # SECOND SAFETY NET (ABSOLUTE)
-    ranked = ranked.loc[:, ~ranked.columns.duplicated()]
+    print("Rank history backfilled")
+    print(f" Dates   : {hist['DATE'].nunique()} ({hist['DATE'].min().date()} -> {hist['DATE'].max().date()})")
+    print(f" Rows    : {len(hist)}")
+    print(f" Time    : {time.perf_counter() - t0:.1f}s")
+    print(f" Saved   : {RANK_HISTORY_DIR} ({n_parts} monthly partitions)")
 
-    ranked["DATE"] = pd.to_datetime(ranked["DATE"], errors="coerce")
+    return 0
 
-    # Deduplicate symbols (latest only)
-    ranked = (
-        ranked.sort_values("DATE")
-              .drop_duplicates(subset=["SYMBOL"], keep="last")
-              .reset_index(drop=True)
-    )
 
-    ranked = ranked.dropna(subset=["RET_1D", "RET_5D"])
+def main() -> int:
+    frames = []
+    skipped = []
+
+    # =====================================================
+    # LOAD MASTER SYMBOL FILES (last SNAPSHOT_BARS closes)
+    # =====================================================
+    for file in MASTER_DIR.glob("*.csv"):
+        closes, reason = read_master_closes(file)
+
+        if closes is None:
+            skipped.append((file.stem.upper().strip(), reason))
+            continue
+
+        if len(closes) < 6:
+            skipped.append((file.stem.upper().strip(), "insufficient_history"))
+            continue
+
+        frames.append(closes.tail(SNAPSHOT_BARS))
 
     # =====================================================
-    # SCORING
+    # VALIDATION
     # =====================================================
-    ranked["RANK_RET_5D"] = ranked["RET_5D"].rank(pct=True)
-    ranked["RANK_RET_1D"] = ranked["RET_1D"].rank(pct=True)
+    if not frames:
+        print(" No symbol data loaded")
+        return 1
+
+    closes = pd.concat(frames, ignore_index=True).sort_values(["SYMBOL", "DATE"])
 
-    ranked["SCORE"] = ranked["RANK_RET_5D"] + ranked["RANK_RET_1D"]
-    ranked["TREND_BOOST"] = (ranked["RET_5D"] > 0).astype(int)
+    # =====================================================
+    # SCORING: same as the backfill, ranked among the symbols
+    # that trade on the latest date only (stale symbols would
+    # leave gaps in RANK and shift every percentile)
+    # =====================================================
+    hist = compute_rank_history(closes)
+    today = hist["DATE"].max()
 
-    ranked = ranked.sort_values("SCORE", ascending=False).reset_index(drop=True)
-    ranked["RANK"] = ranked.index + 1
+    ranked = hist.loc[hist["DATE"] == today].reset_index(drop=True)
 
     # =====================================================
     # SAVE
     # =====================================================
     ranked.to_csv(OUT_LATEST, index=False)
 
-    if OUT_HIST.exists():
-        hist = pd.read_csv(OUT_HIST)
-        hist = hist.loc[:, ~hist.columns.duplicated()]
-        hist = pd.concat([hist, ranked], ignore_index=True)
-    else:
-        hist = ranked.copy()
-
-    hist.to_csv(OUT_HIST, index=False)
+    # History: upsert today's date into its month partition only
+    upsert_date(ranked)
 
     # =====================================================
     # SUMMARY
@@ -144,7 +219,7 @@ def main() -> int:
     print("Daily ranking built successfully")
     print(f" Symbols ranked : {len(ranked)}")
     print(f" Latest saved   : {OUT_LATEST}")
-    print(f" History saved  : {OUT_HIST}")
+    print(f" History saved  : {RANK_HISTORY_DIR} ({today.date()})")
 
     print("\nTop 10 Preview:")
     print(ranked[["SYMBOL", "RANK", "SCORE"]].head(10))
@@ -157,8 +232,16 @@ def main() -> int:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build daily rankings.")
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="Rebuild the rank history for every date in the master data",
+    )
+    args = parser.parse_args()
+
     try:
-        sys.exit(main())
+        sys.exit(backfill() if args.backfill else main())
     except Exception as e:
         print(f"Ranking failed: {e}")
         sys.exit(1)
@@ -10,6 +10,13 @@ import sys
 # =====================================================
 ROOT = Path(__file__).resolve().parents[2]
 
+# Run as a plain script by daily_run.ps1 -> make `src` importable
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.models.prediction_store import PredictionStore
+from src.utils.topk import topk_indices
+
 RANK_FILE = ROOT / "data" / "processed" / "daily_ranking_latest.csv"
 ML_FILE   = ROOT / "data" / "processed" / "daily_ranking_latest_ml.csv"
 
@@ -51,12 +58,22 @@ def main() -> int:
     })
 
     # -------------------------------------------------
-    # Try ML (optional)
+    # Try ML (optional): the production model's scores for
+    # the ranking date from the prediction store, else the
+    # fresh daily CSV
     # -------------------------------------------------
-    use_ml = ML_FILE.exists()
+    rank_date = pd.to_datetime(rank["DATE"], errors="coerce").max() if "DATE" in rank.columns else pd.NaT
+
+    ml = PredictionStore().production(rank_date) if pd.notna(rank_date) else pd.DataFrame()
+    use_ml = not ml.empty
 
     if use_ml:
+        print(" ML scores from prediction store:", rank_date.date())
+    elif ML_FILE.exists():
         ml = pd.read_csv(ML_FILE)
+        use_ml = True
+
+    if use_ml:
         ml.columns = [c.upper().strip() for c in ml.columns]
 
         if {"SYMBOL", "ML_SCORE"}.issubset(ml.columns):
@@ -64,7 +81,7 @@ def main() -> int:
                 "SYMBOL": "symbol",
                 "ML_SCORE": "ml_score"
             })
-            ml = ml.sort_values("ml_score", ascending=False).head(TOP_ML)
+            ml = ml.iloc[topk_indices(ml["ml_score"].to_numpy(), TOP_ML)]
         else:
             print("⚠ML file missing required columns — skipping ML")
             use_ml = False
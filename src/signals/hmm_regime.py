@@ -0,0 +1,380 @@
+# src/signals/hmm_regime.py
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config.paths import MODELS_DIR
+
+
+HMM_STATE = MODELS_DIR / "hmm_regime_state.json"
+
+
+def _logsumexp(a: np.ndarray, axis: int | None = None) -> np.ndarray:
+    m = np.max(a, axis=axis, keepdims=True)
+    m = np.where(np.isfinite(m), m, 0.0)
+    out = np.log(np.sum(np.exp(a - m), axis=axis, keepdims=True)) + m
+    return out.squeeze(axis) if axis is not None else out.item()
+
+
+def index_returns(prices: pd.Series) -> pd.Series:
+    """Daily returns of the regime index (DATE-indexed closes)."""
+    return prices.sort_index().pct_change().dropna()
+
+
+class HMMRegime:
+    """
+    Gaussian hidden-Markov model on daily regime-index returns.
+
+    - Baum-Welch in log space: emissions, posteriors, transition counts
+      and the M-step are whole-array NumPy ops; only the scaled forward /
+      backward recursions step through time (one K x K product per day)
+    - states are ordered by variance after fitting: 0 = calmest
+    - the forward-filter state (log P(state | returns up to last_date)) is
+      kept and persisted, so `update` absorbs a new day in O(1) without
+      refitting
+    - `exposure` maps filtered probabilities to a 0..1 scaler: state k
+      weighs 1 - k / (K - 1), i.e. P(calm) for two states
+
+    params:
+      n_states : hidden states (2 = risk on / risk off)
+      n_iter   : max EM iterations
+      tol      : stop when the log-likelihood gains less than this
+      min_var  : variance floor, keeps a state from collapsing on one day
+    """
+
+    def __init__(self, params: dict | None = None):
+        default_params = {
+            "n_states": 2,
+            "n_iter": 100,
+            "tol": 1e-6,
+            "min_var": 1e-8,
+        }
+        self.params = {**default_params, **(params or {})}
+        self.log_start_: np.ndarray | None = None
+        self.log_trans_: np.ndarray | None = None
+        self.means_: np.ndarray | None = None
+        self.vars_: np.ndarray | None = None
+        self.log_alpha_: np.ndarray | None = None
+        self.last_date: pd.Timestamp | None = None
+        self.last_price: float | None = None
+        self.loglik_: float | None = None
+
+    # -------------------------------------------------
+    # Building blocks (log space)
+    # -------------------------------------------------
+    def _log_emission(self, r: np.ndarray) -> np.ndarray:
+        """(T, K) log N(r_t | mean_k, var_k)."""
+        r = np.asarray(r, dtype=np.float64)[:, None]
+        return -0.5 * (np.log(2 * np.pi * self.vars_) + (r - self.means_) ** 2 / self.vars_)
+
+    def _forward(self, log_b: np.ndarray, log_alpha0: np.ndarray | None = None):
+        """
+        Normalized forward pass: log_alpha[t] = log P(state_t | r_1..t) and
+        log_c[t] = log P(r_t | r_1..t-1) (sum = log-likelihood). Starts from
+        `log_alpha0` (a previous filter state) when given.
+
+        Emissions are shifted by their per-day log max before leaving log
+        space, and every step is renormalized, so the per-day recursion is
+        a K x K product with no underflow.
+        """
+        T, K = log_b.shape
+        shift = log_b.max(axis=1)
+        b = np.exp(log_b - shift[:, None])
+        trans = np.exp(self.log_trans_)
+
+        alpha = np.empty((T, K))
+        c = np.empty(T)
+
+        prior = (
+            np.exp(self.log_start_)
+            if log_alpha0 is None
+            else np.exp(log_alpha0) @ trans
+        )
+        a = prior * b[0]
+        c[0] = a.sum()
+        alpha[0] = a / c[0]
+
+        for t in range(1, T):
+            a = (alpha[t - 1] @ trans) * b[t]
+            c[t] = a.sum()
+            alpha[t] = a / c[t]
+
+        with np.errstate(divide="ignore"):
+            return np.log(alpha), np.log(c) + shift
+
+    def _backward(self, log_b: np.ndarray, log_c: np.ndarray) -> np.ndarray:
+        """Scaled backward pass matching `_forward` (same per-day shift)."""
+        T, K = log_b.shape
+        shift = log_b.max(axis=1)
+        b = np.exp(log_b - shift[:, None])
+        c = np.exp(log_c - shift)
+        trans = np.exp(self.log_trans_)
+
+        beta = np.ones((T, K))
+        for t in range(T - 2, -1, -1):
+            beta[t] = trans @ (b[t + 1] * beta[t + 1]) / c[t + 1]
+
+        with np.errstate(divide="ignore"):
+            return np.log(beta)
+
+    def _init_params(self, r: np.ndarray) -> None:
+        """Deterministic start: states split by |return| quantiles."""
+        K = self.params["n_states"]
+        order = np.argsort(np.abs(r - r.mean()), kind="stable")
+        groups = np.array_split(order, K)
+
+        self.means_ = np.array([r[g].mean() for g in groups])
+        self.vars_ = np.maximum(np.array([r[g].var() for g in groups]), self.params["min_var"])
+        self.log_start_ = np.full(K, -np.log(K))
+
+        trans = np.full((K, K), 0.05 / max(K - 1, 1))
+        np.fill_diagonal(trans, 0.95)
+        self.log_trans_ = np.log(trans)
+
+    def _sort_states(self) -> None:
+        order = np.argsort(self.vars_, kind="stable")
+        self.means_ = self.means_[order]
+        self.vars_ = self.vars_[order]
+        self.log_start_ = self.log_start_[order]
+        self.log_trans_ = self.log_trans_[np.ix_(order, order)]
+
+    # -------------------------------------------------
+    # Training
+    # -------------------------------------------------
+    def fit(self, prices: pd.Series) -> None:
+        """
+        Baum-Welch on the returns of `prices` (DATE-indexed index closes),
+        then run the filter over the whole series to set the live state.
+        """
+        rets = index_returns(prices)
+        r = rets.to_numpy(dtype=np.float64)
+        self._init_params(r)
+
+        prev = -np.inf
+        for _ in range(self.params["n_iter"]):
+            # E-step
+            log_b = self._log_emission(r)
+            log_alpha, log_c = self._forward(log_b)
+            log_beta = self._backward(log_b, log_c)
+            loglik = log_c.sum()
+
+            log_gamma = log_alpha + log_beta
+            log_gamma -= _logsumexp(log_gamma, axis=1)[:, None]
+            gamma = np.exp(log_gamma)
+
+            # xi[t, i, j] = P(s_t = i, s_t+1 = j | r), all t at once
+            log_xi = (
+                log_alpha[:-1, :, None]
+                + self.log_trans_[None, :, :]
+                + (log_b[1:] + log_beta[1:])[:, None, :]
+                - log_c[1:, None, None]
+            )
+
+            # M-step
+            self.log_start_ = log_gamma[0]
+            log_trans = _logsumexp(log_xi, axis=0)
+            self.log_trans_ = log_trans - _logsumexp(log_trans, axis=1)[:, None]
+
+            w = gamma.sum(axis=0)
+            self.means_ = gamma.T @ r / w
+            self.vars_ = np.maximum(
+                (gamma * (r[:, None] - self.means_) ** 2).sum(axis=0) / w,
+                self.params["min_var"],
+            )
+
+            if loglik - prev < self.params["tol"]:
+                break
+            prev = loglik
+
+        self.loglik_ = float(loglik)
+        self._sort_states()
+
+        # Live filter state at the last date
+        self.log_alpha_ = None
+        self.last_date = None
+        self.update(prices)
+
+    # -------------------------------------------------
+    # Filtering
+    # -------------------------------------------------
+    def filter_proba(self, prices: pd.Series) -> pd.DataFrame:
+        """
+        Causal P(state | returns up to DATE) for every date of `prices`
+        (the first date has no return and is dropped). Uses the fitted
+        parameters, so only the day-by-day probabilities are out-of-sample.
+        """
+        if self.means_ is None:
+            raise RuntimeError("Model not fitted yet")
+
+        rets = index_returns(prices)
+        log_alpha, _ = self._forward(self._log_emission(rets.to_numpy()))
+
+        return pd.DataFrame(
+            np.exp(log_alpha),
+            index=rets.index,
+            columns=[f"state_{k}" for k in range(self.params["n_states"])],
+        )
+
+    def exposure_weights(self) -> np.ndarray:
+        K = self.params["n_states"]
+        return 1.0 - np.arange(K) / max(K - 1, 1)
+
+    def exposure(self, prices: pd.Series) -> pd.Series:
+        """Continuous 0..1 exposure scaler per DATE (1 = fully risk on)."""
+        return (self.filter_proba(prices) @ self.exposure_weights()).rename("hmm_exposure")
+
+    def update(self, prices: pd.Series) -> int:
+        """
+        Advance the filter state over the dates of `prices` newer than
+        `last_date` — one K x K step per day, no refit. Returns #days absorbed.
+        """
+        prices = prices.sort_index()
+        if self.last_date is not None:
+            new = prices.loc[prices.index > self.last_date]
+            if new.empty:
+                return 0
+            prev = np.concatenate([[self.last_price], new.to_numpy()[:-1]])
+            rets = new.to_numpy() / prev - 1.0
+            log_alpha0 = self.log_alpha_
+        else:
+            new = prices.iloc[1:]
+            rets = index_returns(prices).to_numpy()
+            log_alpha0 = None
+
+        log_alpha, _ = self._forward(self._log_emission(rets), log_alpha0)
+
+        self.log_alpha_ = log_alpha[-1]
+        self.last_date = pd.Timestamp(new.index[-1])
+        self.last_price = float(new.iloc[-1])
+        return len(new)
+
+    @property
+    def current_exposure(self) -> float:
+        return float(np.exp(self.log_alpha_) @ self.exposure_weights())
+
+    # -------------------------------------------------
+    # Persistence (plain JSON, filter state included)
+    # -------------------------------------------------
+    def save(self, path: Path = HMM_STATE) -> None:
+        if self.log_alpha_ is None:
+            raise RuntimeError("Model not fitted yet")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(
+                {
+                    "params": self.params,
+                    "log_start": self.log_start_.tolist(),
+                    "log_trans": self.log_trans_.tolist(),
+                    "means": self.means_.tolist(),
+                    "vars": self.vars_.tolist(),
+                    "log_alpha": self.log_alpha_.tolist(),
+                    "last_date": str(self.last_date.date()),
+                    "last_price": self.last_price,
+                    "loglik": self.loglik_,
+                },
+                fh,
+                indent=2,
+            )
+
+    @classmethod
+    def load(cls, path: Path = HMM_STATE) -> "HMMRegime":
+        with open(path, encoding="utf-8") as fh:
+            payload = json.load(fh)
+
+        obj = cls(params=payload["params"])
+        obj.log_start_ = np.asarray(payload["log_start"])
+        obj.log_trans_ = np.asarray(payload["log_trans"])
+        obj.means_ = np.asarray(payload["means"])
+        obj.vars_ = np.asarray(payload["vars"])
+        obj.log_alpha_ = np.asarray(payload["log_alpha"])
+        obj.last_date = pd.Timestamp(payload["last_date"])
+        obj.last_price = payload["last_price"]
+        obj.loglik_ = payload["loglik"]
+        return obj
+
+
+def get_hmm_regime(
+    prices: pd.Series,
+    refit: bool = False,
+    state_path: Path = HMM_STATE,
+) -> HMMRegime:
+    """
+    Persisted HMM advanced to the last date of `prices`: loaded and
+    updated day by day when a state file exists, fitted from scratch
+    otherwise (or with refit=True).
+    """
+    if state_path.exists() and not refit:
+        model = HMMRegime.load(state_path)
+        n_new = model.update(prices)
+        print(f"🔁 HMM state advanced by {n_new} day(s) -> {model.last_date.date()}")
+    else:
+        model = HMMRegime()
+        model.fit(prices)
+        print(f"🚀 HMM fitted (loglik {model.loglik_:.1f}) -> {model.last_date.date()}")
+
+    model.save(state_path)
+    return model
+
+
+def walkforward_exposure(
+    prices: pd.Series,
+    min_train: int = 252,
+    refit_every: int = 63,
+    params: dict | None = None,
+) -> pd.Series:
+    """
+    Out-of-sample exposure for backtests: the HMM is refitted every
+    `refit_every` dates on the expanding history up to that date (first
+    fit after `min_train` dates), and the block until the next refit is
+    filtered forward from that fit's state. Each date's exposure uses only
+    parameters and returns known on that date. Dates before the first fit
+    are left out (align_regime treats them as risk off). Nothing is
+    persisted; the live state is `get_hmm_regime`'s.
+    """
+    prices = prices.sort_index().dropna()
+    rets = index_returns(prices)
+    r = rets.to_numpy(dtype=np.float64)
+
+    blocks = []
+    for start in range(min_train, len(prices), refit_every):
+        model = HMMRegime(params)
+        model.fit(prices.iloc[: start + 1])
+
+        # returns of dates start+1 .. start+refit_every (rets[i] = date i+1)
+        block = slice(start, min(start + refit_every, len(r)))
+        if block.start >= block.stop:
+            break
+        log_alpha, _ = model._forward(model._log_emission(r[block]), model.log_alpha_)
+        blocks.append(pd.Series(np.exp(log_alpha) @ model.exposure_weights(), index=rets.index[block]))
+
+    if not blocks:
+        return pd.Series(dtype=np.float64, name="hmm_exposure")
+    return pd.concat(blocks).rename("hmm_exposure")
+
+
+def main() -> None:
+    from src.signals.regime import load_regime_frame
+
+    parser = argparse.ArgumentParser(description="Gaussian HMM market regime.")
+    parser.add_argument("--refit", action="store_true", help="Re-run Baum-Welch instead of updating the state")
+    args = parser.parse_args()
+
+    prices = load_regime_frame()["index_close"]
+    model = get_hmm_regime(prices, refit=args.refit)
+
+    for k in range(model.params["n_states"]):
+        print(
+            f"state_{k}: mean {model.means_[k]:+.5f}  vol {np.sqrt(model.vars_[k]):.5f}  "
+            f"P(stay) {np.exp(model.log_trans_[k, k]):.3f}"
+        )
+    print(f"📊 Exposure on {model.last_date.date()}: {model.current_exposure:.3f}")
+
+
+if __name__ == "__main__":
+    main()
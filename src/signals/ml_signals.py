@@ -3,13 +3,28 @@ from __future__ import annotations
 
 import argparse
 from datetime import datetime
+from pathlib import Path
 
 import pandas as pd
 
 from src.config.paths import CLEANED_HIST_DIR, PROCESSED_DIR
+from src.data.date_slices import DateSlicer
 from src.data.loader import load_symbol_history
 from src.features.momentum import add_momentum_features
 from src.labels.forward_returns import build_forward_returns
+from src.models.base import SignalModel, fit_model
+from src.models.ensemble import SignalEnsemble, seed_members
+from src.models.registry import (
+    find_latest,
+    is_stale,
+    load_model,
+    model_kind,
+    model_version,
+    params_hash,
+    register_model,
+)
+from src.models.online import ONLINE_STATE, OnlineRidge
+from src.models.prediction_store import PredictionStore, feature_version
 from src.models.xgb_signal_model import XGBSignalModel
 
 
@@ -96,46 +111,93 @@ def build_features_and_labels(df: pd.DataFrame):
 
 
 # -------------------------------------------------
-# Train model up to a given date, score that date
+# Train model on all history before a given date
 # -------------------------------------------------
-def train_and_score_for_date(
+def training_set(
     as_of: pd.Timestamp,
     features: pd.DataFrame,
     labels: pd.Series,
-    top_n: int = 200,
-) -> pd.DataFrame:
-    idx_dates = features.index.get_level_values("DATE")
+    slicer: DateSlicer | None = None,
+) -> tuple[pd.DataFrame, pd.Series]:
+    """Complete (features + label) rows strictly before `as_of`."""
+    slicer = slicer or DateSlicer(features.index)
+    rows = slicer.before(as_of)
+
+    # Contiguous views, no mask over the full index
+    X_train = features.iloc[rows]
+    y_train = labels.iloc[rows]
+
+    # Safety cleaning (copies only if something is missing)
+    train_ok = y_train.notna() & X_train.notna().all(axis=1)
+    if not train_ok.all():
+        X_train = X_train.loc[train_ok]
+        y_train = y_train.loc[train_ok]
+
+    if len(y_train) == 0:
+        raise RuntimeError(f"No valid training samples before {as_of.date()}")
+
+    return X_train, y_train
+
+
+def train_model_for_date(
+    as_of: pd.Timestamp,
+    features: pd.DataFrame,
+    labels: pd.Series,
+    slicer: DateSlicer | None = None,
+    model: SignalModel | None = None,
+) -> tuple[SignalModel, pd.Timestamp, pd.Timestamp]:
+    """
+    Fit `model` (default: a fresh XGBSignalModel) on every labelled row
+    strictly before `as_of`. Returns (model, train_start, train_end).
+
+    `features` / `labels` must be sorted by DATE; pass a prebuilt
+    `slicer` when calling this for many dates.
+    """
+    X_train, y_train = training_set(as_of, features, labels, slicer)
+
+    print(f"✅ Train samples: {len(y_train)}")
+
+    model = model or XGBSignalModel()
+    fit_model(model, X_train, y_train)
 
-    train_mask = idx_dates < as_of
-    score_mask = idx_dates == as_of
+    train_dates = X_train.index.get_level_values("DATE")
+    return model, train_dates.min(), train_dates.max()
 
-    X_train = features.loc[train_mask]
-    y_train = labels.loc[train_mask]
 
-    X_score = features.loc[score_mask]
+# -------------------------------------------------
+# Score one date with a fitted model (predict only)
+# -------------------------------------------------
+def score_date(
+    model: SignalModel,
+    as_of: pd.Timestamp,
+    features: pd.DataFrame,
+    slicer: DateSlicer | None = None,
+    store: PredictionStore | None = None,
+    model_key: str | None = None,
+) -> pd.DataFrame:
+    """
+    Score `as_of` and rank it (RANK 1 = best). With a `store` and the
+    model's registry `model_key`, scores are read from / written to the
+    prediction cache instead of calling `predict` again.
+    """
+    slicer = slicer or DateSlicer(features.index)
+    X_score = features.iloc[slicer.on(as_of)]
 
     if X_score.empty:
         raise RuntimeError(f"No feature rows for date {as_of.date()}")
 
-    # Safety cleaning
-    train_ok = y_train.notna() & X_train.notna().all(axis=1)
-    X_train = X_train.loc[train_ok]
-    y_train = y_train.loc[train_ok]
-
     score_ok = X_score.notna().all(axis=1)
-    X_score = X_score.loc[score_ok]
-
-    if len(y_train) == 0:
-        raise RuntimeError(f"No valid training samples before {as_of.date()}")
+    if not score_ok.all():
+        X_score = X_score.loc[score_ok]
 
-    print(f"✅ Train samples: {len(y_train)}")
     print(f"✅ Score samples: {len(X_score)}")
 
-    # Model
-    model = XGBSignalModel()
-    model.fit(X_train, y_train)
-
-    scores = model.predict(X_score)
+    if store is not None and model_key is not None:
+        scores = store.get_or_predict(
+            model, model_key, features, [as_of], slicer=slicer
+        ).reindex(X_score.index)
+    else:
+        scores = model.predict(X_score)
 
     df_scores = (
         pd.Series(scores, index=X_score.index, name="ml_score")
@@ -149,6 +211,215 @@ def train_and_score_for_date(
     return df_scores
 
 
+# -------------------------------------------------
+# Train model up to a given date, score that date
+# -------------------------------------------------
+def train_and_score_for_date(
+    as_of: pd.Timestamp,
+    features: pd.DataFrame,
+    labels: pd.Series,
+    top_n: int = 200,
+    slicer: DateSlicer | None = None,
+) -> pd.DataFrame:
+    slicer = slicer or DateSlicer(features.index)
+    model, _, _ = train_model_for_date(as_of, features, labels, slicer=slicer)
+    return score_date(model, as_of, features, slicer=slicer)
+
+
+# -------------------------------------------------
+# Registry-backed model: load latest, retrain on schedule
+# -------------------------------------------------
+def get_model_for_date(
+    as_of: pd.Timestamp,
+    features: pd.DataFrame,
+    labels: pd.Series,
+    retrain_every_days: int = 7,
+    force_retrain: bool = False,
+    slicer: DateSlicer | None = None,
+    template: SignalModel | None = None,
+) -> tuple[SignalModel, dict]:
+    """
+    Load the latest compatible registered model, or train + register a
+    new one when none exists, it is older than `retrain_every_days`, or
+    `force_retrain` is set.
+
+    `template` is an unfitted model (default: XGBSignalModel()); its kind
+    and params pick the compatible registry entries and it is what gets
+    trained on a retrain (e.g. a SignalEnsemble).
+    """
+    feature_cols = list(features.columns)
+    template = template or XGBSignalModel()
+    phash = params_hash(template.params, getattr(template, "num_boost_round", None))
+
+    meta = find_latest(
+        feature_cols, as_of=as_of, params_hash_=phash, kind=model_kind(template)
+    )
+
+    if meta is not None and not force_retrain and not is_stale(
+        meta, as_of, max_age_days=retrain_every_days
+    ):
+        print(f"📦 Using registered model {meta['version']}")
+        return load_model(meta), meta
+
+    reason = (
+        "forced" if force_retrain
+        else "no compatible model" if meta is None
+        else f"model older than {retrain_every_days} days"
+    )
+    print(f"🔁 Retraining ({reason})")
+
+    model, train_start, train_end = train_model_for_date(
+        as_of, features, labels, slicer=slicer, model=template
+    )
+    meta = register_model(model, feature_cols, train_start, train_end)
+    print(f"📦 Registered model {meta['version']}")
+
+    return model, meta
+
+
+# -------------------------------------------------
+# Online model: persisted state, updated with the new labelled days only
+# -------------------------------------------------
+ENGINES = ("xgb", "online", "ensemble")
+
+
+def get_online_model_for_date(
+    as_of: pd.Timestamp,
+    features: pd.DataFrame,
+    labels: pd.Series,
+    reset: bool = False,
+    slicer: DateSlicer | None = None,
+    state_path: Path = ONLINE_STATE,
+) -> OnlineRidge:
+    """
+    Load the persisted OnlineRidge state, absorb the labelled days between
+    its `last_date` and `as_of` (usually one cross-section), save it back.
+
+    Daily cost depends on the rows added since the last run, not on the
+    history length. A fresh model is built on every row before `as_of`
+    when there is no state, `reset` is set, or the feature set changed.
+    Scoring a date the state has already moved past cannot un-learn those
+    days, so that case trains a throwaway model and leaves the state alone.
+    """
+    slicer = slicer or DateSlicer(features.index)
+    before = slicer.before(as_of)
+
+    model = None
+    if state_path.exists() and not reset:
+        model = OnlineRidge.load(state_path)
+        if model.features_ != list(features.columns):
+            print("⚠️ Online state has different features — rebuilding")
+            model = None
+
+    if model is not None and model.last_date >= as_of:
+        print(f"⚠️ Online state is at {model.last_date.date()} — fitting a throwaway model")
+        model = OnlineRidge(params=model.params)
+        model.fit(features.iloc[before], labels.iloc[before])
+        return model
+
+    if model is None:
+        print("🔁 Building online model from full history")
+        model = OnlineRidge()
+        model.fit(features.iloc[before], labels.iloc[before])
+    else:
+        new_rows = slice(slicer.before(model.last_date + pd.Timedelta(days=1)).stop, before.stop)
+        n_new = model.partial_fit(features.iloc[new_rows], labels.iloc[new_rows])
+        print(f"📈 Online model updated with {n_new} new day(s)")
+
+    if model.coef_ is None:
+        raise RuntimeError(f"No valid training samples before {as_of.date()}")
+
+    model.save(state_path)
+    print(f"📦 Online state at {model.last_date.date()} ({model.n_days} days) -> {state_path}")
+
+    return model
+
+
+# -------------------------------------------------
+# Batch historical scoring -> ml_score panel
+# -------------------------------------------------
+ML_SCORE_PANEL = PROCESSED_DIR / "ml_score_panel.csv"
+
+CADENCES = ("W", "M", "Q")   # weekly / monthly / quarterly retrain (pandas period codes)
+
+
+def rank_within_dates(df_scores: pd.DataFrame) -> pd.DataFrame:
+    """Add RANK (1 = best ml_score) within each DATE; ties keep SYMBOL order."""
+    df_scores = df_scores.sort_values(
+        ["DATE", "ml_score", "SYMBOL"],
+        ascending=[True, False, True],
+    ).reset_index(drop=True)
+    df_scores["RANK"] = df_scores.groupby("DATE").cumcount() + 1
+    return df_scores
+
+
+def score_date_range(
+    features: pd.DataFrame,
+    labels: pd.Series,
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    cadence: str = "M",
+    slicer: DateSlicer | None = None,
+    store: PredictionStore | None = None,
+) -> pd.DataFrame:
+    """
+    Historical ML scores for every date in [start, end].
+
+    One model per cadence window (week / month / quarter), trained on all
+    rows before the window's first date, then a single `predict` call for
+    every row in the window. Returns the panel:
+        DATE, SYMBOL, ml_score, RANK, TRAIN_END
+
+    With a `store`, windows whose scores are already cached (same model
+    version + feature version) are read back without training.
+    """
+    if cadence not in CADENCES:
+        raise ValueError(f"cadence must be one of {list(CADENCES)}, got {cadence!r}")
+
+    slicer = slicer or DateSlicer(features.index)
+    dates = slicer.dates[(slicer.dates >= start) & (slicer.dates <= end)]
+
+    if len(dates) == 0:
+        raise RuntimeError(f"No feature rows between {start.date()} and {end.date()}")
+
+    windows = pd.Series(dates, index=dates).groupby(dates.to_period(cadence))
+    feature_key = feature_version(features.columns)
+    panels: list[pd.DataFrame] = []
+
+    for period, window_dates in windows:
+        first, last = window_dates.iloc[0], window_dates.iloc[-1]
+        print(f"\n🗓️ Window {period}: {first.date()} -> {last.date()}")
+
+        # Key on the cleaned training set's last date, as train_model_for_date does
+        X_train, y_train = training_set(first, features, labels, slicer)
+        train_end = X_train.index.get_level_values("DATE").max()
+
+        model = XGBSignalModel()
+        model_key = model_version(model, train_end)
+        if store is not None and store.has(model_key, feature_key, window_dates):
+            print(f"📦 Cached predictions {model_key}")
+            scores = store.get(model_key, feature_key, window_dates)
+            panels.append(scores.reset_index().assign(TRAIN_END=train_end))
+            continue
+
+        print(f"✅ Train samples: {len(y_train)}")
+        fit_model(model, X_train, y_train)
+
+        X_score = features.iloc[slicer.between(first, last)]
+        X_score = X_score.loc[X_score.notna().all(axis=1)]
+
+        scores = model.predict(X_score)
+        panels.append(scores.reset_index().assign(TRAIN_END=train_end))
+
+        if store is not None:
+            store.put(model_key, feature_key, scores)
+
+    panel = rank_within_dates(pd.concat(panels, ignore_index=True))
+    print(f"\n✅ Scored {panel['DATE'].nunique()} dates with {len(panels)} models")
+
+    return panel[["DATE", "SYMBOL", "ml_score", "RANK", "TRAIN_END"]]
+
+
 # -------------------------------------------------
 # MAIN CLI
 # -------------------------------------------------
@@ -167,6 +438,51 @@ def main():
         default=200,
         help="How many symbols to keep in ranking (default: 200)",
     )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="xgb",
+        help="xgb: registry-backed XGBoost; online: incrementally updated ridge (default: xgb)",
+    )
+    parser.add_argument(
+        "--retrain",
+        action="store_true",
+        help="Force a retrain (online engine: rebuild the state from full history)",
+    )
+    parser.add_argument(
+        "--ensemble-size",
+        type=int,
+        default=5,
+        help="Ensemble engine: number of seed-varied XGBoost members (default: 5)",
+    )
+    parser.add_argument(
+        "--n-jobs",
+        type=int,
+        default=1,
+        help="Ensemble engine: members trained in parallel (default: 1)",
+    )
+    parser.add_argument(
+        "--retrain-every",
+        type=int,
+        default=7,
+        help="Retrain when the registered model is this many days old (default: 7)",
+    )
+    parser.add_argument(
+        "--start",
+        type=str,
+        help="Batch mode: first date to score (YYYY-MM-DD)",
+    )
+    parser.add_argument(
+        "--end",
+        type=str,
+        help="Batch mode: last date to score (default: last date in history)",
+    )
+    parser.add_argument(
+        "--cadence",
+        choices=list(CADENCES),
+        default="M",
+        help="Batch mode retrain cadence: W / M / Q (default: M)",
+    )
 
     args = parser.parse_args()
 
@@ -177,6 +493,23 @@ def main():
     last_date = df["DATE"].max().normalize()
     print(f"✅ History loaded: {df.shape}, last DATE = {last_date.date()}")
 
+    if args.start:
+        features, labels = build_features_and_labels(df)
+        print(f"✅ Feature matrix: {features.shape}")
+
+        start = pd.to_datetime(args.start).normalize()
+        end = pd.to_datetime(args.end).normalize() if args.end else last_date
+
+        panel = score_date_range(
+            features, labels, start, end, cadence=args.cadence, store=PredictionStore()
+        )
+
+        PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+        panel.to_csv(ML_SCORE_PANEL, index=False)
+
+        print(f"💾 Saved ML score panel -> {ML_SCORE_PANEL} ({len(panel)} rows)")
+        return
+
     if args.date:
         as_of = pd.to_datetime(args.date).normalize()
     else:
@@ -189,14 +522,43 @@ def main():
     print(f"✅ Feature matrix: {features.shape}")
     print(f"✅ Labels length : {len(labels)}")
 
-    # 3) Train + score
-    df_scores = train_and_score_for_date(
-        as_of=as_of,
-        features=features,
-        labels=labels,
-        top_n=args.top_n,
+    # 3) Load (or retrain on schedule) + score
+    slicer = DateSlicer(features.index)
+
+    if args.engine == "online":
+        model = get_online_model_for_date(
+            as_of=as_of,
+            features=features,
+            labels=labels,
+            reset=args.retrain,
+            slicer=slicer,
+        )
+        model_key = model_version(model, model.last_date)
+    else:
+        template = (
+            SignalEnsemble(members=seed_members(args.ensemble_size), n_jobs=args.n_jobs)
+            if args.engine == "ensemble"
+            else None
+        )
+        model, meta = get_model_for_date(
+            as_of=as_of,
+            features=features,
+            labels=labels,
+            retrain_every_days=args.retrain_every,
+            force_retrain=args.retrain,
+            slicer=slicer,
+            template=template,
+        )
+        model_key = meta["version"]
+
+    store = PredictionStore()
+    df_scores = score_date(
+        model, as_of, features, slicer=slicer, store=store, model_key=model_key
     )
 
+    # Confluence reads today's scores by this production model version
+    store.set_production(model_key, feature_version(features.columns), as_of)
+
     # Keep top-N
     df_scores = df_scores.head(args.top_n)
 
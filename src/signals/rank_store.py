@@ -0,0 +1,156 @@
+# src/signals/rank_store.py
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+from src.config.paths import PROCESSED_DIR, RANK_HISTORY_DIR
+
+
+LEGACY_HISTORY = PROCESSED_DIR / "daily_ranking_history.csv"
+
+
+# -------------------------------------------------
+# Layout: one CSV per calendar month
+# -------------------------------------------------
+# data/processed/ranking_history/
+#     2025-11.csv
+#     2025-12.csv
+#     ...
+def partition_path(month: pd.Period) -> Path:
+    return RANK_HISTORY_DIR / f"{month}.csv"
+
+
+def _read_partition(month: pd.Period) -> pd.DataFrame:
+    path = partition_path(month)
+    if not path.exists():
+        return pd.DataFrame()
+    return pd.read_csv(path, parse_dates=["DATE"])
+
+
+def _write_partition(month: pd.Period, df: pd.DataFrame) -> None:
+    RANK_HISTORY_DIR.mkdir(parents=True, exist_ok=True)
+    df = df.sort_values(["DATE", "RANK"], kind="mergesort")
+    df.to_csv(partition_path(month), index=False)
+
+
+def list_partitions() -> list[pd.Period]:
+    if not RANK_HISTORY_DIR.exists():
+        return []
+    return sorted(pd.Period(p.stem, freq="M") for p in RANK_HISTORY_DIR.glob("*.csv"))
+
+
+# -------------------------------------------------
+# Write
+# -------------------------------------------------
+def upsert_date(day_df: pd.DataFrame) -> None:
+    """
+    Insert or replace one date's ranking. Only that date's month file is
+    read and rewritten, so the daily cost does not grow with history, and
+    re-running the same day leaves exactly one copy of it.
+    """
+    dates = pd.to_datetime(day_df["DATE"]).unique()
+    if len(dates) != 1:
+        raise ValueError(f"upsert_date expects a single DATE, got {len(dates)}")
+
+    date = pd.Timestamp(dates[0])
+    month = date.to_period("M")
+
+    part = _read_partition(month)
+    if not part.empty:
+        part = part.loc[part["DATE"] != date]
+
+    day_df = day_df.assign(DATE=date)
+    _write_partition(month, pd.concat([part, day_df], ignore_index=True))
+
+
+def write_history(hist: pd.DataFrame) -> int:
+    """
+    Replace the partitions covered by `hist` (e.g. a full backfill),
+    deduplicated on (DATE, SYMBOL). Returns the number of partitions written.
+    """
+    hist = hist.assign(DATE=pd.to_datetime(hist["DATE"]))
+    hist = hist.drop_duplicates(subset=["DATE", "SYMBOL"], keep="last")
+
+    months = hist["DATE"].dt.to_period("M")
+    for month, part in hist.groupby(months):
+        _write_partition(month, part)
+
+    return months.nunique()
+
+
+# -------------------------------------------------
+# Read
+# -------------------------------------------------
+def load_rank_history(
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+) -> pd.DataFrame:
+    """
+    Rank history for start <= DATE <= end (either bound optional), reading
+    only the month files that overlap the range.
+    """
+    months = list_partitions()
+    if not months:
+        raise FileNotFoundError(
+            f"No rank history in {RANK_HISTORY_DIR} "
+            "(run build_daily_rankings --backfill or rank_store --migrate)"
+        )
+
+    if start is not None:
+        start = pd.Timestamp(start)
+        months = [m for m in months if m >= start.to_period("M")]
+    if end is not None:
+        end = pd.Timestamp(end)
+        months = [m for m in months if m <= end.to_period("M")]
+
+    if not months:
+        return pd.DataFrame(columns=["DATE", "SYMBOL", "RANK"])
+
+    df = pd.concat([_read_partition(m) for m in months], ignore_index=True)
+
+    if start is not None:
+        df = df.loc[df["DATE"] >= start]
+    if end is not None:
+        df = df.loc[df["DATE"] <= end]
+
+    return df.reset_index(drop=True)
+
+
+# -------------------------------------------------
+# One-off migration of the legacy single CSV
+# -------------------------------------------------
+def migrate_legacy() -> int:
+    if not LEGACY_HISTORY.exists():
+        raise FileNotFoundError(LEGACY_HISTORY)
+
+    hist = pd.read_csv(LEGACY_HISTORY)
+    hist = hist.loc[:, ~hist.columns.duplicated()]
+    hist["DATE"] = pd.to_datetime(hist["DATE"], errors="coerce")
+    hist = hist.dropna(subset=["DATE"])
+
+    n = write_history(hist)
+    print(f"✅ Migrated {LEGACY_HISTORY.name} -> {n} partitions in {RANK_HISTORY_DIR}")
+    return n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Partitioned ranking history.")
+    parser.add_argument(
+        "--migrate",
+        action="store_true",
+        help="Split the legacy daily_ranking_history.csv into monthly partitions",
+    )
+    args = parser.parse_args()
+
+    if args.migrate:
+        migrate_legacy()
+
+    months = list_partitions()
+    print(f"📦 {len(months)} partitions" + (f": {months[0]} -> {months[-1]}" if months else ""))
+
+
+if __name__ == "__main__":
+    main()
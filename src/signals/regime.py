@@ -1,10 +1,36 @@
 from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import asdict
+
+import numpy as np
 import pandas as pd
 
+from src.config.paths import CLEANED_HIST_DIR, PROCESSED_DIR
+from src.config.settings import REGIME_SETTINGS, RegimeSettings
+from src.data.loader import load_regime_index, load_universe_closes
+from src.features.breadth import ema_panel, universe_panels
+from src.signals.hmm_regime import walkforward_exposure
+
+
+REGIME_MODELS = ("ema_trend", "ema_cross", "vol", "breadth")
+COMBINERS = ("all", "any", "majority")
+EXPOSURE_MODELS = ("hmm", "breadth_pct")
+
+# Bump when the frame's columns change so stale caches are rebuilt
+REGIME_FRAME_VERSION = 3
+
+REGIME_FILE = PROCESSED_DIR / "regime_frame.csv"
+REGIME_KEY_FILE = PROCESSED_DIR / "regime_frame.json"
+HMM_EXPOSURE_FILE = PROCESSED_DIR / "regime_hmm_exposure.csv"
+HMM_EXPOSURE_KEY_FILE = PROCESSED_DIR / "regime_hmm_exposure.json"
+
 
 def detect_market_regime(
     index_df: pd.DataFrame,
-    price_col: str = "adj_close"
+    price_col: str = "adj_close",
+    span: int = REGIME_SETTINGS.ema_span,
 ) -> pd.Series:
     """
     Simple, robust market regime filter.
@@ -19,8 +45,211 @@ def detect_market_regime(
     df = index_df.copy()
 
     # Long-term trend filter (CTA-style)
-    df["ema_100"] = df[price_col].ewm(span=100, adjust=False).mean()
+    df["ema_100"] = df[price_col].ewm(span=span, adjust=False).mean()
 
     df["RISK_ON"] = df[price_col] > df["ema_100"]
 
     return df.set_index("DATE")["RISK_ON"]
+
+
+# -------------------------------------------------
+# All regime models in one pass
+# -------------------------------------------------
+def breadth_above_ema(
+    universe: pd.DataFrame,
+    span: int,
+    price_col: str = "adj_close",
+) -> pd.Series:
+    """
+    Share of symbols trading above their own EMA, per DATE (same
+    definition as features.breadth pct_above_ema_<span>).
+    """
+    close, _ = universe_panels(universe, price_col)
+    return (close > ema_panel(close, span)).sum(axis=1) / close.notna().sum(axis=1)
+
+
+def build_regime_frame(
+    index_df: pd.DataFrame,
+    universe: pd.DataFrame | None = None,
+    settings: RegimeSettings = REGIME_SETTINGS,
+    price_col: str = "adj_close",
+) -> pd.DataFrame:
+    """
+    Date-aligned regime flags (True = risk on), one column per model:
+
+      ema_trend : index above its `ema_span` EMA (= detect_market_regime)
+      ema_cross : index fast EMA above slow EMA
+      vol       : index vol_10d / vol_20d <= vol_ratio_max
+      breadth   : share of symbols above their EMA >= breadth_min
+                  (only when `universe` is given)
+
+    plus the raw vol_ratio / breadth_pct, `votes` (models risk on) and
+    the index itself (index_close, input of the HMM regime).
+    """
+    px = index_df.sort_values("DATE").set_index("DATE")[price_col]
+
+    frame = pd.DataFrame({"index_close": px})
+    frame["ema_trend"] = detect_market_regime(
+        index_df.sort_values("DATE"), price_col, settings.ema_span
+    )
+
+    fast = px.ewm(span=settings.fast_span, adjust=False).mean()
+    slow = px.ewm(span=settings.slow_span, adjust=False).mean()
+    frame["ema_cross"] = fast > slow
+
+    ret = px.pct_change()
+    frame["vol_ratio"] = ret.rolling(10).std() / ret.rolling(20).std()
+    frame["vol"] = frame["vol_ratio"] <= settings.vol_ratio_max
+
+    models = ["ema_trend", "ema_cross", "vol"]
+
+    if universe is not None:
+        frame["breadth_pct"] = breadth_above_ema(universe, settings.breadth_span, price_col)
+        frame["breadth"] = frame["breadth_pct"] >= settings.breadth_min
+        models.append("breadth")
+
+    frame["votes"] = frame[models].sum(axis=1).astype(int)
+    return frame
+
+
+def regime_mask(frame: pd.DataFrame, model: str = "ema_trend") -> pd.Series:
+    """
+    Boolean risk-on Series for one model, or a combination of every
+    model in the frame: "all", "any" or "majority".
+    """
+    if model in REGIME_MODELS:
+        if model not in frame.columns:
+            raise KeyError(f"Regime model {model!r} not in frame (breadth needs a universe)")
+        return frame[model].astype(bool)
+
+    if model not in COMBINERS:
+        raise ValueError(f"model must be one of {REGIME_MODELS + COMBINERS}, got {model!r}")
+
+    flags = frame[[m for m in REGIME_MODELS if m in frame.columns]]
+    if model == "all":
+        return flags.all(axis=1)
+    if model == "any":
+        return flags.any(axis=1)
+    return frame["votes"] * 2 > flags.shape[1]
+
+
+def regime_exposure(
+    frame: pd.DataFrame,
+    model: str = "ema_trend",
+    settings: RegimeSettings = REGIME_SETTINGS,
+) -> pd.Series:
+    """
+    Exposure scaler per DATE: 0/1 for the boolean models and combiners,
+    continuous 0..1 for "hmm" (filtered calm-state probability from
+    periodic out-of-sample refits, see hmm_regime.walkforward_exposure)
+    and "breadth_pct" (share of symbols above their EMA).
+    """
+    if model == "hmm":
+        return walkforward_exposure(
+            frame["index_close"],
+            min_train=settings.hmm_min_train,
+            refit_every=settings.hmm_refit_days,
+        )
+
+    if model == "breadth_pct":
+        return frame["breadth_pct"].fillna(0.0)
+
+    return regime_mask(frame, model).astype(float)
+
+
+def align_regime(mask: pd.Series, dates) -> np.ndarray:
+    """Regime value for every entry of `dates`; unknown dates are risk off (0)."""
+    dates = pd.DatetimeIndex(dates)
+    if mask.dtype == bool:
+        return mask.reindex(dates, fill_value=False).to_numpy(dtype=bool)
+    return mask.reindex(dates, fill_value=0.0).to_numpy(dtype=np.float64)
+
+
+# -------------------------------------------------
+# Cache: rebuilt only when the source files or settings change
+# -------------------------------------------------
+def _source_key(settings: RegimeSettings) -> str:
+    files = sorted(
+        (p.name, p.stat().st_mtime_ns, p.stat().st_size)
+        for p in CLEANED_HIST_DIR.glob("*_CONT.csv")
+    )
+    raw = json.dumps(
+        {"files": files, "settings": asdict(settings), "version": REGIME_FRAME_VERSION}
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+_MEMO: dict[str, pd.DataFrame] = {}
+_HMM_MEMO: dict[str, pd.Series] = {}
+
+
+def _read_cache(path, key_path, key: str) -> pd.DataFrame | None:
+    """DATE-indexed frame at `path` if `key_path` records `key`, else None."""
+    if not (path.exists() and key_path.exists()):
+        return None
+    with open(key_path, encoding="utf-8") as fh:
+        if json.load(fh).get("key") != key:
+            return None
+    return pd.read_csv(path, parse_dates=["DATE"], index_col="DATE", float_precision="round_trip")
+
+
+def _write_cache(data: pd.DataFrame | pd.Series, path, key_path, key: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data.to_csv(path)
+    with open(key_path, "w", encoding="utf-8") as fh:
+        json.dump({"key": key}, fh, indent=2)
+
+
+def load_regime_frame(
+    settings: RegimeSettings = REGIME_SETTINGS,
+    refresh: bool = False,
+) -> pd.DataFrame:
+    """
+    Regime frame for the continuous futures universe, cached in memory and
+    in data/processed/regime_frame.csv; the universe is only re-read when a
+    *_CONT.csv file or the regime settings change.
+    """
+    key = _source_key(settings)
+
+    if not refresh and key in _MEMO:
+        return _MEMO[key]
+
+    frame = None if refresh else _read_cache(REGIME_FILE, REGIME_KEY_FILE, key)
+    if frame is None:
+        universe = load_universe_closes()
+        frame = build_regime_frame(load_regime_index(universe), universe, settings)
+        _write_cache(frame, REGIME_FILE, REGIME_KEY_FILE, key)
+
+    _MEMO[key] = frame
+    return frame
+
+
+def load_regime_exposure(
+    model: str = "ema_trend",
+    settings: RegimeSettings = REGIME_SETTINGS,
+    refresh: bool = False,
+) -> pd.Series:
+    """
+    `regime_exposure` on the cached regime frame. The walk-forward HMM
+    refits are the slow part, so "hmm" is cached too (memory and
+    data/processed/regime_hmm_exposure.csv) under the frame's source key:
+    it is recomputed exactly when the frame is rebuilt.
+    """
+    frame = load_regime_frame(settings, refresh)
+    if model != "hmm":
+        return regime_exposure(frame, model, settings)
+
+    key = _source_key(settings)
+
+    if not refresh and key in _HMM_MEMO:
+        return _HMM_MEMO[key]
+
+    cached = None if refresh else _read_cache(HMM_EXPOSURE_FILE, HMM_EXPOSURE_KEY_FILE, key)
+    if cached is not None:
+        exposure = cached["hmm_exposure"]
+    else:
+        exposure = regime_exposure(frame, "hmm", settings)
+        _write_cache(exposure.rename_axis("DATE"), HMM_EXPOSURE_FILE, HMM_EXPOSURE_KEY_FILE, key)
+
+    _HMM_MEMO[key] = exposure
+    return exposure
@@ -2,6 +2,11 @@ from __future__ import annotations
 import pandas as pd
 
 from src.config.settings import SIGNAL_SETTINGS
+from src.utils.topk import topk_by_group, topk_indices
+
+# A date whose momentum std is at or below this has no dispersion: a
+# constant column gives ~1e-18 of float noise, not an exact 0
+MIN_STD = 1e-12
 
 
 def build_cross_sectional_score(df_last: pd.DataFrame) -> pd.DataFrame:
@@ -30,7 +35,7 @@ def build_cross_sectional_score(df_last: pd.DataFrame) -> pd.DataFrame:
     # -------------------------
     for col in ["mom_3d", "mom_5d", "mom_10d"]:
         std = df[col].std()
-        if std == 0:
+        if std <= MIN_STD:
             df[col + "_z"] = 0.0
         else:
             df[col + "_z"] = (df[col] - df[col].mean()) / std
@@ -65,10 +70,104 @@ def build_cross_sectional_score(df_last: pd.DataFrame) -> pd.DataFrame:
     # -------------------------
     # 6️⃣ Ranking
     # -------------------------
-    df = df.sort_values("SCORE", ascending=False).reset_index(drop=True)
+    # Top-N by partial sort: ties keep input order, NaN scores never picked
+    df = df.iloc[topk_indices(df["SCORE"].to_numpy(), SIGNAL_SETTINGS.top_n)]
+    df = df.reset_index(drop=True)
     df["RANK"] = df.index + 1
 
-    return df.head(SIGNAL_SETTINGS.top_n)
+    return df
+
+
+MOM_COLS = ["mom_3d", "mom_5d", "mom_10d"]
+MOM_WEIGHTS = {"mom_3d": 0.4, "mom_5d": 0.3, "mom_10d": 0.3}
+
+
+def build_cross_sectional_score_panel(
+    panel: pd.DataFrame,
+    top_n: int | None = SIGNAL_SETTINGS.top_n,
+) -> pd.DataFrame:
+    """
+    `build_cross_sectional_score` for every DATE at once.
+
+    `panel` holds many snapshots stacked (DATE column, or a DATE index
+    level). Each date goes through the same steps as the snapshot function
+    on that date's rows in the same order — per-date z-scores (ddof=1, 0
+    when the date's std is at most MIN_STD), the same row-order EMA50 trend
+    boost, liquidity filter and RANK / top_n cut — but with grouped ops
+    instead of a Python loop over dates.
+
+    The guarantee is on rank order, not bit-identical scores: grouped
+    mean / std sum in a different order, so z-scores and SCORE can differ
+    from the snapshot's in the last bits (~1e-15 relative). Only SCOREs
+    tied to that precision could swap RANK.
+
+    Returns the stacked per-date outputs sorted by DATE, RANK
+    (top_n=None keeps every ranked row).
+    """
+    # Fresh RangeIndex: the row-aligned EMA below needs unique labels
+    df = panel.reset_index() if "DATE" not in panel.columns else panel.reset_index(drop=True)
+
+    # -------------------------
+    # 1️⃣ Sanitize inputs
+    # -------------------------
+    for col in MOM_COLS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+        else:
+            df[col] = 0.0
+
+    if "oi_breakout" in df.columns:
+        df["oi_breakout"] = pd.to_numeric(df["oi_breakout"], errors="coerce").fillna(1.0)
+    else:
+        df["oi_breakout"] = 1.0
+
+    # -------------------------
+    # 2️⃣ Per-date z-scores
+    # -------------------------
+    g = df.groupby("DATE", sort=False)
+    means = g[MOM_COLS].transform("mean")
+    stds = g[MOM_COLS].transform("std")
+
+    for col in MOM_COLS:
+        z = (df[col] - means[col]) / stds[col]
+        df[col + "_z"] = z.mask(stds[col] <= MIN_STD, 0.0)
+
+    df["score_mom"] = sum(w * df[col + "_z"] for col, w in MOM_WEIGHTS.items())
+    df["score_oi"] = df["oi_breakout"]
+
+    # -------------------------
+    # 3️⃣ Base SCORE + trend boost (EMA over each date's rows, in row order)
+    # -------------------------
+    df["SCORE"] = df["score_mom"] * df["score_oi"]
+
+    ema50 = (
+        g["adj_close"]
+        .ewm(span=50, adjust=False)
+        .mean()
+        .reset_index(level=0, drop=True)
+    )
+    df["trend_boost"] = (df["adj_close"] > ema50.reindex(df.index)).astype(int)
+
+    df["SCORE"] *= (1.0 + 0.30 * df["trend_boost"])
+
+    # -------------------------
+    # 4️⃣ Liquidity filter
+    # -------------------------
+    if "TRDVAL" in df.columns:
+        df = df[df["TRDVAL"] >= SIGNAL_SETTINGS.min_liquidity]
+
+    # -------------------------
+    # 5️⃣ Per-date ranking (ties keep row order)
+    # -------------------------
+    if top_n is not None:
+        df = df.iloc[topk_by_group(df, "SCORE", top_n)]
+    else:
+        df = df.sort_values(["DATE", "SCORE"], ascending=[True, False], kind="mergesort")
+
+    df = df.reset_index(drop=True)
+    df["RANK"] = df.groupby("DATE").cumcount() + 1
+
+    return df
 
 
 def explain_score(df: pd.DataFrame, top_n: int = 5) -> pd.DataFrame:
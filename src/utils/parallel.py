@@ -0,0 +1,131 @@
+# src/utils/parallel.py
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
+from threadpoolctl import threadpool_limits
+
+from src.config.settings import XGB_NTHREAD
+
+
+# -------------------------------------------------
+# Thread budget
+# -------------------------------------------------
+def threads_per_worker(n_jobs: int, total_threads: int = XGB_NTHREAD) -> int:
+    """Split the machine's thread budget evenly across worker processes."""
+    return max(1, total_threads // max(1, n_jobs))
+
+
+_LIMITS: list = []
+
+
+def _init_worker(
+    nthread: int,
+    initializer: Callable | None,
+    initargs: tuple,
+) -> None:
+    # BLAS / OpenMP pools are already loaded (inherited from the parent at
+    # fork), so thread env vars would be ignored here; cap the live pools
+    # instead and keep the limit for the worker's lifetime. XGBoost takes
+    # its thread count from the `nthread` param the task passes explicitly.
+    _LIMITS.append(threadpool_limits(limits=nthread))
+
+    if initializer is not None:
+        initializer(*initargs)
+
+
+# -------------------------------------------------
+# Read-only shared inputs (memmapped .npy files)
+# -------------------------------------------------
+def share_arrays(arrays: dict[str, np.ndarray], out_dir: Path) -> dict[str, Path]:
+    """
+    Write arrays once as .npy files so every worker can memory-map them
+    read-only instead of receiving a pickled copy.
+    Object arrays (e.g. symbols) are stored as fixed-width strings.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths: dict[str, Path] = {}
+
+    for name, arr in arrays.items():
+        arr = np.asarray(arr)
+        if arr.dtype == object:
+            arr = arr.astype(str)
+
+        path = out_dir / f"{name}.npy"
+        np.save(path, np.ascontiguousarray(arr))
+        paths[name] = path
+
+    return paths
+
+
+def attach_arrays(paths: dict[str, Path]) -> dict[str, np.ndarray]:
+    """Memory-map arrays written by `share_arrays` (read-only, zero copy)."""
+    return {name: np.load(path, mmap_mode="r") for name, path in paths.items()}
+
+
+# -------------------------------------------------
+# Ordered process-pool map
+# -------------------------------------------------
+def run_in_pool(
+    fn: Callable,
+    tasks: Iterable,
+    n_jobs: int,
+    nthread: int | None = None,
+    initializer: Callable | None = None,
+    initargs: tuple = (),
+) -> list:
+    """
+    Run `fn(task)` for every task across `n_jobs` processes and return the
+    results in task order. `fn` and `initializer` must be module-level
+    functions (picklable). Each worker gets `nthread` threads
+    (default: an even share of settings.XGB_NTHREAD).
+    """
+    tasks = list(tasks)
+    nthread = nthread or threads_per_worker(n_jobs)
+
+    if n_jobs <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        return [fn(task) for task in tasks]
+
+    with ProcessPoolExecutor(
+        max_workers=min(n_jobs, len(tasks)) or 1,
+        initializer=_init_worker,
+        initargs=(nthread, initializer, initargs),
+    ) as pool:
+        return list(pool.map(fn, tasks))
+
+
+def iter_in_pool(
+    fn: Callable,
+    tasks: Iterable,
+    n_jobs: int,
+    nthread: int | None = None,
+    initializer: Callable | None = None,
+    initargs: tuple = (),
+) -> Iterator:
+    """
+    Like `run_in_pool`, but yields each result as soon as it is ready
+    (completion order), so callers can persist progress incrementally.
+    """
+    tasks = list(tasks)
+    nthread = nthread or threads_per_worker(n_jobs)
+
+    if n_jobs <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for task in tasks:
+            yield fn(task)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=min(n_jobs, len(tasks)) or 1,
+        initializer=_init_worker,
+        initargs=(nthread, initializer, initargs),
+    ) as pool:
+        futures = [pool.submit(fn, task) for task in tasks]
+        for fut in as_completed(futures):
+            yield fut.result()
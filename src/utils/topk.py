@@ -0,0 +1,108 @@
+# src/utils/topk.py
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+def topk_panel(values: np.ndarray, k: int, largest: bool = True) -> np.ndarray:
+    """
+    Column indices of the top-k entries of every row of a 2-D panel
+    (rows = dates, columns = symbols), best first.
+
+    - argpartition, so each row costs O(N) + O(k log k), not a full sort
+    - NaNs are never picked; rows with fewer than k valid entries are
+      padded with -1
+    - ties are deterministic: equal values are taken, and ordered, by
+      lower column index first (same as a stable sort)
+
+    Returns an int array of shape (n_rows, k).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim != 2:
+        raise ValueError(f"values must be 2-D, got shape {values.shape}")
+
+    n_rows, n_cols = values.shape
+    k = min(k, n_cols)
+    if k <= 0:
+        return np.empty((n_rows, 0), dtype=np.int64)
+
+    # Work on "bigger is better" keys with NaN pushed to the bottom
+    valid = ~np.isnan(values)
+    key = np.where(valid, values if largest else -values, -np.inf)
+
+    # Unordered top-k per row; k-th best key = tie threshold
+    out = np.argpartition(-key, k - 1, axis=1)[:, :k]
+    picked = np.take_along_axis(key, out, axis=1)
+    kth = picked.min(axis=1)
+
+    # argpartition picks arbitrary members of a tie straddling the cut.
+    # Redo those rows (and rows short of valid entries) exactly: all keys
+    # strictly better, then the first `need` tied ones by column.
+    n_tied = (key == kth[:, None]).sum(axis=1)
+    redo = (n_tied > (picked == kth[:, None]).sum(axis=1)) | (kth == -np.inf)
+
+    if redo.any():
+        k_r, v_r, t_r = key[redo], valid[redo], kth[redo][:, None]
+        better = (k_r > t_r) & v_r
+        tied = (k_r == t_r) & v_r
+        need = k - better.sum(axis=1)
+        take = better | (tied & (np.cumsum(tied, axis=1) <= need[:, None]))
+
+        # Scatter the selected columns into (rows, k), -1 padded
+        rows, cols = np.nonzero(take)
+        counts = take.sum(axis=1)
+        slot = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        fixed = np.full((len(k_r), k), -1, dtype=np.int64)
+        fixed[rows, slot] = cols
+        out[redo] = fixed
+
+    # Order the k picks: key desc, then column asc; padding last
+    picked = np.where(out >= 0, np.take_along_axis(key, np.maximum(out, 0), axis=1), -np.inf)
+    pad_last = np.where(out >= 0, out, n_cols)
+    order = np.lexsort((pad_last, -picked), axis=1)
+
+    return np.take_along_axis(out, order, axis=1)
+
+
+def topk_indices(values, k: int, largest: bool = True) -> np.ndarray:
+    """Positions of the top-k non-NaN entries of a 1-D array, best first."""
+    idx = topk_panel(np.asarray(values, dtype=np.float64)[None, :], k, largest)[0]
+    return idx[idx >= 0]
+
+
+def topk_by_group(
+    df: pd.DataFrame,
+    score_col: str,
+    k: int,
+    group_col: str = "DATE",
+    largest: bool = True,
+) -> np.ndarray:
+    """
+    Row positions (for `df.iloc`) of the top-k `score_col` rows within
+    each `group_col` group: groups in sorted order, best row first inside
+    each group. Ties go to the earlier row; NaN scores and rows with a
+    null `group_col` are skipped.
+
+    The long frame is laid out as a (groups x max group size) panel and
+    handed to `topk_panel`, so there is no per-group sort or Python loop.
+    """
+    codes, _ = pd.factorize(df[group_col], sort=True)
+    n_groups = codes.max() + 1 if len(codes) else 0
+
+    # Stable order by group keeps the original row order within a group;
+    # null groups (code -1) sort first and are dropped
+    order = np.argsort(codes, kind="stable")
+    order = order[codes[order] >= 0]
+    sizes = np.bincount(codes[order], minlength=n_groups)
+    starts = np.cumsum(sizes) - sizes
+    within = np.arange(len(order)) - np.repeat(starts, sizes)
+
+    panel = np.full((n_groups, sizes.max() if n_groups else 0), np.nan)
+    panel[codes[order], within] = df[score_col].to_numpy(dtype=np.float64)[order]
+
+    picks = topk_panel(panel, k, largest)
+    g, j = np.nonzero(picks >= 0)
+
+    return order[starts[g] + picks[g, j]]
@@ -0,0 +1,452 @@
+# tests/test_backtest.py
+from __future__ import annotations
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pytest
+from threadpoolctl import threadpool_info
+
+from src.backtest.costs import apply_costs, no_trade_band, transaction_costs
+from src.backtest.cv import combinatorial_purged_splits, purged_kfold
+from src.backtest.grid import evaluate_combo, prepare_inputs, result_columns, run_grid
+from src.backtest.ic import daily_ic, forward_returns, ic_panel, ic_summary
+from src.backtest.matrix import (
+    holding_returns,
+    portfolio_returns,
+    staggered_weights,
+    topk_weight_panel,
+)
+from src.backtest.risk import liquidity_slippage
+from src.backtest.sweep import config_key, prepare_folds, run_sweep
+from src.config.settings import BACKTEST_SETTINGS
+from src.utils.parallel import run_in_pool
+
+
+# -------------------------------------------------
+# Fixtures / references
+# -------------------------------------------------
+def _random_book(T: int = 40, N: int = 8, k: int = 3, seed: int = 0):
+    """Equal-weight top-k book and next-day returns with NaN holes."""
+    rng = np.random.default_rng(seed)
+    scores = rng.normal(size=(T, N))
+    scores[rng.random((T, N)) < 0.1] = np.nan
+    scores[5] = np.nan                       # a day without picks
+
+    R = rng.normal(0.0, 0.02, size=(T, N))
+    R[rng.random((T, N)) < 0.15] = np.nan
+    R[7] = np.nan                            # a day without valid returns
+
+    return topk_weight_panel(scores, k), R
+
+
+def _long_frame(W: np.ndarray, R: np.ndarray) -> pd.DataFrame:
+    """Held positions as the long (DATE, SYMBOL, weight, next_ret) frame."""
+    t, n = np.nonzero(W)
+    return pd.DataFrame({"DATE": t, "SYMBOL": n, "weight": W[t, n], "next_ret": R[t, n]})
+
+
+def _loop_pnl(W: np.ndarray, R: np.ndarray, cost_bps: float = 0.0) -> dict[str, np.ndarray]:
+    """Per-day reference: NaN positions dropped, the rest rescaled to the book."""
+    T, N = W.shape
+    gross = np.zeros(T)
+    turnover = np.zeros(T)
+    prev = np.zeros(N)
+
+    for t in range(T):
+        held = np.zeros(N)
+        ok = (W[t] != 0) & ~np.isnan(R[t])
+        if W[t].any():
+            if ok.any():
+                held[ok] = W[t, ok] * np.abs(W[t]).sum() / np.abs(W[t, ok]).sum()
+                gross[t] = (held[ok] * R[t, ok]).sum()
+            else:
+                gross[t] = np.nan
+        turnover[t] = np.abs(held - prev).sum()
+        prev = held
+
+    cost = turnover * cost_bps / 10000.0
+    return {"gross": gross, "turnover": turnover, "cost": cost, "net": gross - cost}
+
+
+# -------------------------------------------------
+# matrix.portfolio_returns
+# -------------------------------------------------
+def test_portfolio_returns_matches_groupby_pnl():
+    W, R = _random_book()
+    T = len(W)
+    leverage = np.linspace(0.5, 1.0, T)
+    fixed = np.full(T, 0.002)
+
+    res = portfolio_returns(W, R, fixed_cost=fixed, leverage=leverage)
+
+    # Old run_backtest loop: mean of the day's valid pick returns, scaled
+    # by leverage, minus the flat cost; days without a valid pick skipped
+    day_ret = _long_frame(W, R).groupby("DATE")["next_ret"].mean()
+    expected = day_ret * leverage[day_ret.index] - 0.002
+
+    has_book = W.any(axis=1)
+    assert np.array_equal(~np.isnan(res["net"][has_book]), day_ret.notna().to_numpy())
+    assert np.allclose(res["net"][expected.dropna().index], expected.dropna())
+
+    # a day with no book is flat and pays only the fixed cost
+    assert res["gross"][5] == 0.0
+    assert np.isclose(res["net"][5], -0.002)
+    assert np.isnan(res["net"][7])
+
+
+def test_portfolio_returns_turnover_cost_matches_loop():
+    W, R = _random_book(seed=1)
+    res = portfolio_returns(W, R, cost_bps=3.5)
+    ref = _loop_pnl(W, R, cost_bps=3.5)
+
+    for key in ("gross", "turnover", "cost", "net"):
+        assert np.allclose(res[key], ref[key], equal_nan=True), key
+
+
+# -------------------------------------------------
+# matrix.staggered_weights / holding_returns
+# -------------------------------------------------
+@pytest.mark.parametrize("horizon", [1, 3, 5])
+def test_staggered_weights_match_loop(horizon):
+    W, _ = _random_book(T=23, seed=2)
+    books = staggered_weights(W, horizon)
+
+    for j in range(horizon):
+        cur = np.zeros(W.shape[1])
+        for t in range(len(W)):
+            if t % horizon == j:
+                cur = W[t]
+            assert np.array_equal(books[j, t], cur)
+
+
+@pytest.mark.parametrize("horizon", [1, 3, 5])
+def test_holding_returns_match_loop(horizon):
+    W, R = _random_book(T=30, seed=3)
+    res = holding_returns(W, R, horizon, cost_bps=3.5)
+
+    subs = [_loop_pnl(book, R, cost_bps=3.5) for book in staggered_weights(W, horizon)]
+    net = np.array([s["net"] for s in subs])
+    n_live = (~np.isnan(net)).sum(axis=0)
+
+    with np.errstate(invalid="ignore"):
+        expected_net = np.where(n_live > 0, np.nansum(net, axis=0) / n_live, np.nan)
+
+    assert np.allclose(res["net"], expected_net, equal_nan=True)
+    assert np.allclose(res["turnover"], np.mean([s["turnover"] for s in subs], axis=0))
+
+
+def test_holding_one_day_equals_daily():
+    W, R = _random_book(seed=4)
+    daily = portfolio_returns(W, R, cost_bps=2.0)
+    held = holding_returns(W, R, 1, cost_bps=2.0)
+
+    assert np.allclose(held["net"], daily["net"], equal_nan=True)
+    assert np.allclose(held["turnover"], daily["turnover"])
+
+
+# -------------------------------------------------
+# utils.parallel.run_in_pool
+# -------------------------------------------------
+def _pool_threads(task: int) -> tuple[int, int]:
+    return task, max((p["num_threads"] for p in threadpool_info()), default=1)
+
+
+def test_run_in_pool_keeps_task_order_and_caps_worker_threads():
+    out = run_in_pool(_pool_threads, range(6), n_jobs=2, nthread=1)
+
+    assert [task for task, _ in out] == list(range(6))
+    assert all(threads == 1 for _, threads in out)
+
+
+# -------------------------------------------------
+# sweep.run_sweep
+# -------------------------------------------------
+def _weekly_features(years: int = 3, n_symbols: int = 6, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2020-01-03", periods=52 * years, freq="W-FRI")
+    index = pd.MultiIndex.from_product([dates, [f"S{i}" for i in range(n_symbols)]], names=["DATE", "SYMBOL"])
+    X = pd.DataFrame(rng.normal(size=(len(index), 3)), index=index, columns=["f0", "f1", "f2"])
+    y = pd.Series(0.01 * X["f0"].to_numpy() + rng.normal(0.0, 0.01, len(index)), index=index, name="next_ret")
+    return X, y, y.reset_index()
+
+
+def test_sweep_fold_matrices_reused_per_thread():
+    X, y, returns = _weekly_features()
+    fold = prepare_folds(X, y, returns, first_year=2022)[0]
+
+    assert fold.matrices(32) is fold.matrices(32)
+    assert fold.matrices(32) is not fold.matrices(16)
+
+
+def test_run_sweep_fixed_columns_and_resume(tmp_path):
+    X, y, returns = _weekly_features()
+    folds = prepare_folds(X, y, returns, first_year=2021)
+    out = tmp_path / "sweep.csv"
+
+    small = {"max_bin": 16, "nthread": 1}
+    configs = [
+        {**small, "max_depth": 2},
+        {**small, "max_depth": 2, "num_boost_round": 5},    # extra key
+        {**small, "max_depth": 3},
+    ]
+
+    first = run_sweep(folds, configs[:2], n_jobs=2, top_n=2, out_path=out)
+    assert len(first) == 2
+
+    # rows with and without num_boost_round share one header
+    raw = pd.read_csv(out)
+    assert list(raw.columns)[:5] == ["config_key", "max_bin", "nthread", "max_depth", "num_boost_round"]
+    assert raw["num_boost_round"].isna().sum() == 1
+
+    # resume: only the new config is evaluated
+    results = run_sweep(folds, configs, n_jobs=2, top_n=2, out_path=out)
+    assert sorted(results["config_key"]) == sorted(config_key(c) for c in configs)
+    assert len(pd.read_csv(out)) == 3
+
+
+# -------------------------------------------------
+# grid.run_grid
+# -------------------------------------------------
+def _rank_frame(n_dates: int = 60, n_symbols: int = 8, seed: int = 0) -> pd.DataFrame:
+    """Long DATE, SYMBOL, RANK, next_ret frame with missing rows."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-01", periods=n_dates)
+    df = pd.DataFrame({
+        "DATE": np.repeat(dates, n_symbols),
+        "SYMBOL": np.tile([f"S{i}" for i in range(n_symbols)], n_dates),
+        "RANK": np.tile(np.arange(1, n_symbols + 1), n_dates).astype(float),
+        "next_ret": rng.normal(0.0, 0.02, n_dates * n_symbols),
+    })
+    return df.drop(index=df.sample(frac=0.1, random_state=seed).index).reset_index(drop=True)
+
+
+def test_run_grid_resumes_against_fixed_columns(tmp_path):
+    df = _rank_frame()
+    out = tmp_path / "grid.csv"
+    configs = [
+        {"top_n": 2, "cost_bps": 3.5, "regime": "none", "hold": 1},
+        {"top_n": 3, "cost_bps": 0.0, "regime": "none", "hold": 3, "vol_target": 0.15},   # extra key
+        {"top_n": 5, "cost_bps": 10.0, "regime": "none", "hold": 5},
+    ]
+
+    run_grid(df, configs[:2], n_jobs=2, out_path=out)
+    raw = pd.read_csv(out)
+    assert list(raw.columns) == result_columns(configs[:2])
+    assert raw["vol_target"].isna().sum() == 1
+
+    # resume: only the new config is evaluated, rows are never duplicated
+    results = run_grid(df, configs, n_jobs=2, out_path=out)
+    assert sorted(results["config_key"]) == sorted(config_key(c) for c in configs)
+    assert len(pd.read_csv(out)) == 3
+    pd.testing.assert_frame_equal(pd.read_csv(out).iloc[:2], raw)
+
+    # pool rows equal an in-process evaluation on the same panels
+    inputs = prepare_inputs(df, ["none"])
+    expected = evaluate_combo(configs[2], inputs["scores"], inputs["returns"], inputs["exposure"][0])
+    row = results.set_index("config_key").loc[config_key(configs[2])]
+    assert np.isclose(row["Sharpe"], expected["Sharpe"])
+    assert row["n_days"] == expected["n_days"]
+
+
+# -------------------------------------------------
+# cv: purged / embargoed splits
+# -------------------------------------------------
+def _panel_index(n_dates: int = 60, n_symbols: int = 3) -> pd.MultiIndex:
+    dates = pd.bdate_range("2024-01-01", periods=n_dates)
+    return pd.MultiIndex.from_product([dates, [f"S{i}" for i in range(n_symbols)]], names=["DATE", "SYMBOL"])
+
+
+def _split_dates(index: pd.MultiIndex, rows: np.ndarray) -> set[int]:
+    pos = pd.Index(index.get_level_values("DATE").unique())
+    return set(pos.get_indexer(index.get_level_values("DATE")[np.asarray(rows)]))
+
+
+@pytest.mark.parametrize("horizon,embargo", [(1, 0), (1, 5), (5, 3)])
+def test_purged_kfold_purge_and_embargo(horizon, embargo):
+    index = _panel_index()
+    splits = purged_kfold(index, n_splits=5, label_horizon=horizon, embargo_days=embargo)
+
+    # test folds partition every row exactly once
+    all_test = np.sort(np.concatenate([s.test for s in splits]))
+    assert np.array_equal(all_test, np.arange(len(index)))
+
+    for s in splits:
+        test = sorted(_split_dates(index, s.test))
+        lo, hi = test[0], test[-1]
+        train = _split_dates(index, s.train)
+
+        # brute force: every date outside [lo - h, hi + h + embargo]
+        expected = {p for p in range(60) if p < lo - horizon or p > hi + horizon + embargo}
+        assert train == expected
+
+
+def test_combinatorial_splits_cover_groups():
+    index = _panel_index()
+    splits = combinatorial_purged_splits(index, n_groups=6, n_test_groups=2, label_horizon=1, embargo_days=2)
+
+    assert [s.test_groups for s in splits] == list(combinations(range(6), 2))
+
+    counts = np.zeros(len(index), dtype=int)
+    for s in splits:
+        counts[s.test] += 1
+        assert not set(s.train) & set(s.test)
+    assert (counts == 5).all()        # each block tested C(5, 1) times
+
+
+# -------------------------------------------------
+# ic: daily cross-sectional IC
+# -------------------------------------------------
+def _ic_frame(n_dates: int = 30, n_symbols: int = 9, seed: int = 0) -> pd.DataFrame:
+    """Long DATE, SYMBOL, adj_close frame with tied / missing signals."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-01", periods=n_dates)
+    df = pd.DataFrame({
+        "DATE": np.repeat(dates, n_symbols),
+        "SYMBOL": np.tile([f"S{i}" for i in range(n_symbols)], n_dates),
+        "adj_close": 100 * np.exp(rng.normal(0.0, 0.02, n_dates * n_symbols).cumsum()),
+        "sig_a": rng.normal(size=n_dates * n_symbols),
+        "sig_b": rng.integers(0, 3, n_dates * n_symbols).astype(float),   # many ties
+    })
+    df.loc[rng.random(len(df)) < 0.15, "sig_a"] = np.nan
+    df.loc[df["DATE"] == dates[3], "sig_b"] = np.nan                        # no signal that day
+    df = df.drop(index=df.sample(frac=0.05, random_state=seed).index)       # missing rows
+    return df.sort_values(["SYMBOL", "DATE"]).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("method", ["spearman", "pearson"])
+def test_daily_ic_matches_groupby_corr(method):
+    df = _ic_frame()
+    fwd = forward_returns(df, horizons=(1, 5))
+    ic = daily_ic(df, ["sig_a", "sig_b"], fwd, method=method)
+
+    for s in ("sig_a", "sig_b"):
+        for h in (1, 5):
+            pair = pd.DataFrame({"DATE": df["DATE"], "x": df[s], "y": fwd[h]}).dropna()
+            expected = pair.groupby("DATE").apply(
+                lambda g: g["x"].corr(g["y"], method=method) if len(g) >= 2 else np.nan
+            )
+            got = ic[(s, h)].reindex(expected.index)
+            assert np.allclose(got, expected, equal_nan=True), (s, h)
+
+    assert ic[("sig_b", 1)].isna().iloc[3]
+
+
+def test_daily_ic_rejects_unknown_method():
+    df = _ic_frame()
+    with pytest.raises(ValueError):
+        daily_ic(df, ["sig_a"], forward_returns(df, horizons=(1,)), method="kendall")
+
+
+def test_ic_summary_scales_t_stat_by_horizon():
+    df = _ic_frame()
+    ic = ic_panel(df, ["sig_a"], horizons=(1, 5))
+    summary = ic_summary(ic)
+
+    for h in (1, 5):
+        col = ic[("sig_a", h)].dropna()
+        row = summary.loc[("sig_a", h)]
+        assert row["n_days"] == len(col)
+        assert np.isclose(row["t_stat"], col.mean() / col.std() * np.sqrt(len(col) / h))
+
+
+# -------------------------------------------------
+# costs.transaction_costs / no_trade_band
+# -------------------------------------------------
+def test_bps_costs_match_portfolio_returns():
+    W, _ = _random_book(seed=5)
+    R = np.zeros_like(W)              # no NaN -> no book rescaling
+
+    tc = transaction_costs(W, "bps", cost_bps=3.5)
+    res = portfolio_returns(W, R, cost_bps=3.5)
+
+    assert np.allclose(tc["total"], res["cost"])
+    assert np.allclose(tc["turnover"].sum(axis=1), res["turnover"])
+
+
+def test_no_trade_band_matches_loop():
+    rng = np.random.default_rng(6)
+    W = rng.uniform(0.0, 0.3, size=(50, 6))
+    W[rng.random(W.shape) < 0.2] = 0.0
+    band = 0.05
+
+    held = no_trade_band(W, band)
+
+    expected = np.zeros_like(W)
+    for n in range(W.shape[1]):
+        prev = 0.0
+        for t in range(len(W)):
+            if W[t, n] == 0 or abs(W[t, n] - prev) >= band:
+                prev = W[t, n]
+            expected[t, n] = prev
+
+    assert np.array_equal(held, expected)
+    assert (np.abs(held - W) < band).all()
+    assert (
+        transaction_costs(W, "bps", band=band)["turnover"].sum()
+        < transaction_costs(W, "bps")["turnover"].sum()
+    )
+
+
+def test_tiered_and_sqrt_rates():
+    W = np.array([[0.5, 0.5], [0.2, 0.5]])
+    trdval = np.array([[1e7, 3e8], [1e8, np.nan]])
+
+    tiered = transaction_costs(W, "tiered", trdval=trdval)
+    assert np.allclose(tiered["rate"], [[liquidity_slippage(v) for v in row] for row in trdval])
+    assert np.allclose(tiered["cost"], tiered["turnover"] * tiered["rate"])
+
+    adv = np.array([[1e8, np.nan], [1e8, 1e8]])
+    vol = np.array([[0.02, 0.02], [0.03, 0.03]])
+    sq = transaction_costs(W, "sqrt", adv=adv, vol=vol, capital=1e7, impact_coef=0.5)
+
+    slip = BACKTEST_SETTINGS.slippage_bps / 10000.0
+    assert np.isclose(sq["rate"][0, 0], slip + 0.5 * 0.02 * np.sqrt(0.5 * 1e7 / 1e8))
+    assert np.isclose(sq["rate"][1, 0], slip + 0.5 * 0.03 * np.sqrt(0.3 * 1e7 / 1e8))
+    assert sq["rate"][0, 1] == 0.0025          # no ADV -> widest tier
+    assert sq["cost"][1, 1] == 0.0             # no trade, no cost
+
+
+def test_transaction_costs_rejects_unknown_model():
+    with pytest.raises(ValueError):
+        transaction_costs(np.zeros((2, 2)), "flat")
+
+
+# -------------------------------------------------
+# costs.apply_costs
+# -------------------------------------------------
+def test_apply_costs_charges_exit_without_row():
+    # A held on day 1, B on day 2, no row for A on day 2
+    df = pd.DataFrame(
+        {
+            "DATE": pd.to_datetime(["2024-01-01", "2024-01-02"]),
+            "SYMBOL": ["A", "B"],
+            "weight": [1.0, 1.0],
+            "gross_pnl": [0.01, 0.02],
+        }
+    )
+    out = apply_costs(df)
+
+    # entry A, exit A, entry B at 3.5 bps each
+    assert np.isclose(out["trading_cost"].sum(), 3 * 0.00035)
+
+    exit_a = out.loc[(out["DATE"] == "2024-01-02") & (out["SYMBOL"] == "A")].iloc[0]
+    assert exit_a["weight"] == 0.0
+    assert exit_a["turnover"] == 1.0
+    assert np.isclose(exit_a["net_pnl"], -0.00035)
+
+
+def test_apply_costs_charges_weight_changes_not_holdings():
+    df = pd.DataFrame(
+        {
+            "DATE": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"]),
+            "SYMBOL": ["A", "A", "A"],
+            "weight": [0.5, 0.5, 0.2],
+            "gross_pnl": [0.0, 0.0, 0.0],
+        }
+    )
+    out = apply_costs(df)
+
+    assert np.allclose(out["turnover"], [0.5, 0.0, 0.3])
+    assert np.allclose(out["trading_cost"], np.array([0.5, 0.0, 0.3]) * 0.00035)
@@ -0,0 +1,95 @@
+# tests/test_features.py
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.date_slices import DateSlicer
+from src.features.breadth import compute_breadth, ema_panel
+
+
+# -------------------------------------------------
+# data.date_slices
+# -------------------------------------------------
+def _slicer_index() -> pd.MultiIndex:
+    rng = np.random.default_rng(1)
+    dates = pd.bdate_range("2023-12-20", periods=30)
+    rows = [(d, s) for d in dates for s in "ABCD" if rng.random() > 0.3]
+    return pd.MultiIndex.from_tuples(rows, names=["DATE", "SYMBOL"])
+
+
+def test_date_slicer_matches_masks():
+    index = _slicer_index()
+    slicer = DateSlicer(index)
+    dates = index.get_level_values("DATE")
+    pos = np.arange(len(index))
+
+    for d in [dates[0], dates[17], pd.Timestamp("2024-01-01"), pd.Timestamp("2030-01-01")]:
+        assert pos[slicer.before(d)].tolist() == pos[dates < d].tolist()
+        assert pos[slicer.on(d)].tolist() == pos[dates == d].tolist()
+
+    lo, hi = pd.Timestamp("2023-12-27"), pd.Timestamp("2024-01-10")
+    assert pos[slicer.between(lo, hi)].tolist() == pos[(dates >= lo) & (dates <= hi)].tolist()
+    assert pos[slicer.year(2024)].tolist() == pos[dates.year == 2024].tolist()
+    assert pos[slicer.years_before(2024)].tolist() == pos[dates.year < 2024].tolist()
+
+
+def test_date_slicer_requires_sorted_dates():
+    with pytest.raises(ValueError):
+        DateSlicer(_slicer_index()[::-1])
+
+
+# -------------------------------------------------
+# features.breadth
+# -------------------------------------------------
+def _universe(n_dates: int = 320, n_symbols: int = 12, seed: int = 0):
+    """Close / OI panels with gaps and a symbol listed mid-history."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2022-01-03", periods=n_dates)
+    symbols = [f"S{i:02d}" for i in range(n_symbols)]
+
+    close = pd.DataFrame(
+        100 * np.cumprod(1 + rng.normal(0.0, 0.02, size=(n_dates, n_symbols)), axis=0),
+        index=dates,
+        columns=symbols,
+    )
+    close = close.mask(rng.random(close.shape) < 0.05)
+    close.iloc[:150, -1] = np.nan                     # listed later
+
+    oi = pd.DataFrame(rng.uniform(1e3, 1e5, size=close.shape), index=dates, columns=symbols)
+    return close, oi.where(close.notna())
+
+
+@pytest.mark.parametrize("cuts", [[300], [260, 261, 300], [100, 200]])
+def test_compute_breadth_incremental_equals_full(cuts):
+    close, oi = _universe()
+    full, _ = compute_breadth(close, oi)
+
+    parts, state = [], None
+    for lo, hi in zip([0, *cuts], [*cuts, len(close)]):
+        part, state = compute_breadth(close.iloc[lo:hi], oi.iloc[lo:hi], state)
+        parts.append(part)
+
+    pd.testing.assert_frame_equal(pd.concat(parts), full, check_exact=True)
+
+
+def test_compute_breadth_symbol_added_in_increment():
+    close, oi = _universe()
+    close.iloc[:200, -1] = np.nan
+    oi = oi.where(close.notna())
+    full, _ = compute_breadth(close, oi)
+
+    # the head files don't know the new symbol at all
+    first, state = compute_breadth(close.iloc[:200, :-1], oi.iloc[:200, :-1])
+    rest, _ = compute_breadth(close.iloc[200:], oi.iloc[200:], state)
+
+    pd.testing.assert_frame_equal(pd.concat([first, rest]), full, check_exact=True)
+
+
+def test_ema_panel_seed_continues_recursion():
+    close, _ = _universe()
+    full = ema_panel(close, 20)
+    seeded = ema_panel(close.iloc[100:], 20, seed=full.iloc[99])
+
+    pd.testing.assert_frame_equal(seeded, full.iloc[100:], check_exact=True, check_freq=False)
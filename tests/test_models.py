@@ -0,0 +1,501 @@
+# tests/test_models.py
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.walkforward_ml import run_folds, run_full_fold, score_accuracy
+from src.models.base import fit_model
+from src.models.ensemble import SignalEnsemble, seed_members
+from src.models.linear_ranker import RidgeRanker, rolling_ridge_scores
+from src.models.online import OnlineRidge
+from src.models.prediction_store import PredictionStore, feature_version
+from src.models.registry import (
+    find_latest,
+    is_stale,
+    load_model,
+    model_version,
+    params_hash,
+    register_model,
+)
+from src.models.xgb_signal_model import FeatureMatrix, XGBSignalModel, chronological_split
+
+
+# -------------------------------------------------
+# Fixtures
+# -------------------------------------------------
+def _panel(
+    start: str = "2020-01-01",
+    periods: int = 120,
+    freq: str = "B",
+    n_symbols: int = 6,
+    n_features: int = 3,
+    seed: int = 0,
+) -> tuple[pd.DataFrame, pd.Series]:
+    """DATE-sorted (DATE, SYMBOL) features and a noisy linear next_ret label."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=periods, freq=freq)
+    symbols = [f"S{i}" for i in range(n_symbols)]
+    index = pd.MultiIndex.from_product([dates, symbols], names=["DATE", "SYMBOL"])
+
+    X = pd.DataFrame(
+        rng.normal(size=(len(index), n_features)),
+        index=index,
+        columns=[f"f{j}" for j in range(n_features)],
+    )
+    beta = np.linspace(0.01, -0.01, n_features)
+    y = pd.Series(X.to_numpy() @ beta + rng.normal(0.0, 0.005, len(index)), index=index, name="next_ret")
+    return X, y
+
+
+def _returns(y: pd.Series) -> pd.DataFrame:
+    return y.rename("next_ret").reset_index()
+
+
+_SMALL = {"max_depth": 2, "max_bin": 32, "nthread": 1}
+
+
+# -------------------------------------------------
+# Warm start (XGBSignalModel.update / incremental folds)
+# -------------------------------------------------
+def test_update_appends_trees_and_keeps_existing_ones():
+    X, y = _panel()
+    old, new = slice(0, 360), slice(360, None)
+
+    model = XGBSignalModel(params=_SMALL, num_boost_round=10)
+    model.fit(X.iloc[old], y.iloc[old])
+    before = model.predict(X.iloc[new])
+
+    model.update(X.iloc[new], y.iloc[new], num_boost_round=5)
+
+    assert model.n_trees == 15
+    first = model.model[:10].inplace_predict(X.iloc[new])
+    assert np.allclose(first, before.to_numpy())
+    assert not np.allclose(model.predict(X.iloc[new]), before)
+
+
+def test_update_needs_a_fitted_model():
+    X, y = _panel(periods=10)
+    with pytest.raises(RuntimeError):
+        XGBSignalModel(params=_SMALL).update(X, y)
+
+
+def test_incremental_folds_grow_the_same_booster():
+    X, y = _panel(start="2020-01-01", periods=4 * 52, freq="W-FRI")
+
+    folds = run_folds(
+        X, y, _returns(y),
+        top_n=2,
+        mode="incremental",
+        incremental_rounds=4,
+        first_year=2021,
+        model_kwargs={"params": _SMALL, "num_boost_round": 10},
+    )
+
+    assert [f["YEAR"] for f in folds] == [2021, 2022, 2023]
+    assert [f["n_trees"] for f in folds] == [10, 14, 18]
+
+    # later folds train on the year added since the previous fold only
+    rows_per_year = X.groupby(level="DATE").size().groupby(lambda d: d.year).sum()
+    assert [f["train_rows"] for f in folds[1:]] == [rows_per_year[2021], rows_per_year[2022]]
+
+
+def test_incremental_mode_rejects_other_engines():
+    X, y = _panel(periods=10)
+    with pytest.raises(ValueError):
+        run_folds(X, y, _returns(y), mode="incremental", engine="ridge")
+
+
+# -------------------------------------------------
+# Registry
+# -------------------------------------------------
+def test_model_version_ignores_runtime_params():
+    cpu = XGBSignalModel(params={**_SMALL, "nthread": 1}, num_boost_round=10)
+    gpu = XGBSignalModel(params={**_SMALL, "nthread": 8, "device": "cuda"}, num_boost_round=10)
+    deeper = XGBSignalModel(params={**_SMALL, "max_depth": 3}, num_boost_round=10)
+
+    version = model_version(cpu, pd.Timestamp("2024-03-28"))
+    assert version == f"xgb_20240328_{params_hash(cpu.params, 10)}"
+    assert model_version(gpu, "2024-03-28") == version
+    assert model_version(deeper, "2024-03-28") != version
+
+
+def test_register_find_latest_and_load(tmp_path):
+    X, y = _panel()
+    cols = list(X.columns)
+    metas = {}
+
+    for end in ("2020-03-31", "2020-04-30"):
+        rows = X.index.get_level_values("DATE") <= end
+        model = XGBSignalModel(params=_SMALL, num_boost_round=10)
+        model.fit(X.loc[rows], y.loc[rows])
+        metas[end] = register_model(model, cols, X.index[0][0], end, registry_dir=tmp_path)
+
+    # newest model trained strictly before as_of
+    assert find_latest(cols, registry_dir=tmp_path)["version"] == metas["2020-04-30"]["version"]
+    assert find_latest(cols, "2020-04-30", registry_dir=tmp_path)["version"] == metas["2020-03-31"]["version"]
+    assert find_latest(cols, "2020-03-31", registry_dir=tmp_path) is None
+
+    # incompatible feature list / params / kind
+    assert find_latest(cols[::-1], registry_dir=tmp_path) is None
+    assert find_latest(cols, params_hash_="0" * 12, registry_dir=tmp_path) is None
+    assert find_latest(cols, kind="ridge", registry_dir=tmp_path) is None
+
+    meta = metas["2020-04-30"]
+    loaded = load_model(meta, registry_dir=tmp_path)
+    assert loaded.n_trees == 10
+    assert np.allclose(loaded.predict(X), model.predict(X))
+
+
+def test_is_stale():
+    meta = {"train_end": "2024-03-28"}
+    assert not is_stale(meta, "2024-04-03")
+    assert is_stale(meta, "2024-04-04")
+    assert is_stale(meta, "2024-03-30", max_age_days=2)
+
+
+# -------------------------------------------------
+# Quantized matrices built once per training set
+# -------------------------------------------------
+def _count_matrix_builds(monkeypatch) -> list[FeatureMatrix]:
+    built: list[FeatureMatrix] = []
+    original = XGBSignalModel.build_matrix
+
+    def build_matrix(self, X, y=None, ref=None):
+        built.append(original(self, X, y, ref))
+        return built[-1]
+
+    monkeypatch.setattr(XGBSignalModel, "build_matrix", build_matrix)
+    return built
+
+
+@pytest.mark.parametrize("early_stopping_rounds", [None, 3])
+def test_fit_model_matches_dataframe_fit(early_stopping_rounds):
+    X, y = _panel()
+    kwargs = {"params": _SMALL, "num_boost_round": 20, "early_stopping_rounds": early_stopping_rounds, "valid_days": 20}
+
+    from_frame = XGBSignalModel(**kwargs)
+    from_frame.fit(X, y)
+
+    prebuilt = XGBSignalModel(**kwargs)
+    fit_model(prebuilt, X, y)
+
+    assert prebuilt.n_trees == from_frame.n_trees
+    assert np.array_equal(prebuilt.predict(X), from_frame.predict(X))
+
+
+def test_full_fold_trains_on_one_prebuilt_matrix(monkeypatch):
+    X, y = _panel(start="2020-01-01", periods=2 * 52, freq="W-FRI")
+    built = _count_matrix_builds(monkeypatch)
+    fitted_on = []
+    original_fit = XGBSignalModel.fit
+
+    def fit(self, X, y=None, valid=None):
+        fitted_on.append((X, valid))
+        original_fit(self, X, y, valid)
+
+    monkeypatch.setattr(XGBSignalModel, "fit", fit)
+
+    fold = run_full_fold(
+        2021, X, y, _returns(y), top_n=2,
+        model_kwargs={"params": _SMALL, "num_boost_round": 10, "early_stopping_rounds": 3, "valid_days": 10},
+    )
+
+    # one train + one validation matrix, both handed to fit
+    assert fold is not None
+    assert len(built) == 2
+    assert len(fitted_on) == 1
+    assert fitted_on[0][0] is built[0] and fitted_on[0][1] is built[1]
+
+
+# -------------------------------------------------
+# Early stopping / eta schedule
+# -------------------------------------------------
+def test_chronological_split_embargo():
+    X, _ = _panel(periods=30)
+    train, valid = chronological_split(X.index, valid_days=5, embargo_days=2)
+
+    dates = X.index.get_level_values("DATE").unique()
+    assert set(X.index[valid].get_level_values("DATE")) == set(dates[-5:])
+    assert set(X.index[train].get_level_values("DATE")) == set(dates[:-7])
+
+    with pytest.raises(ValueError):
+        chronological_split(X.index, valid_days=28, embargo_days=2)
+
+
+def test_early_stopping_keeps_trees_up_to_best_iteration():
+    X, y = _panel(periods=200)
+    model = XGBSignalModel(
+        params={**_SMALL, "eta": 0.3}, num_boost_round=200,
+        early_stopping_rounds=5, valid_days=40,
+    )
+    model.fit(X, y)
+
+    assert model.best_iteration is not None
+    assert model.best_iteration + 1 < 200
+    assert model.n_trees == model.best_iteration + 1
+
+    # Same trees as a plain fit on the pre-validation rows cut at the best round
+    train, _ = chronological_split(X.index, 40, 1)
+    full = XGBSignalModel(params={**_SMALL, "eta": 0.3}, num_boost_round=model.n_trees)
+    full.fit(X.loc[train], y.loc[train])
+    assert np.allclose(model.predict(X), full.predict(X))
+
+
+def test_eta_schedule_caps_rounds():
+    X, y = _panel(periods=40)
+    model = XGBSignalModel(params=_SMALL, num_boost_round=50, eta_schedule=[0.3] * 4 + [0.1] * 4)
+    model.fit(X, y)
+    assert model.n_trees == 8
+
+
+# -------------------------------------------------
+# RidgeRanker / rolling_ridge_scores
+# -------------------------------------------------
+@pytest.mark.parametrize("target", ["raw", "rank"])
+@pytest.mark.parametrize("window_days", [None, 15])
+def test_rolling_ridge_scores_match_per_date_fit(target, window_days):
+    X, y = _panel(periods=50, seed=3)
+    X.iloc[[5, 40, 77], 1] = np.nan
+    y.iloc[[3, 90]] = np.nan
+
+    rolling = rolling_ridge_scores(X, y, alpha=0.5, target=target, window_days=window_days, min_train_days=10)
+
+    dates = X.index.get_level_values("DATE")
+    unique = dates.unique()
+    for i, d in enumerate(unique):
+        rows = dates == d
+        if i < 10:
+            assert rolling[rows].isna().all()
+            continue
+
+        lo = unique[0] if window_days is None else unique[max(i - window_days, 0)]
+        train = (dates >= lo) & (dates < d)
+        model = RidgeRanker(params={"alpha": 0.5, "target": target})
+        model.fit(X.loc[train], y.loc[train])
+
+        expected = model.predict(X.loc[rows])
+        assert np.allclose(rolling[rows], expected, rtol=1e-9, atol=1e-12, equal_nan=True), d
+
+
+def test_daily_ridge_folds_score_with_rolling_refits():
+    X, y = _panel(start="2020-01-01", periods=3 * 52, freq="W-FRI")
+    params = {"alpha": 2.0, "target": "rank"}
+
+    folds = run_folds(X, y, _returns(y), top_n=2, mode="daily", first_year=2021, engine="ridge", model_kwargs=params)
+    assert [f["YEAR"] for f in folds] == [2021, 2022]
+
+    # 2022 is scored date by date with ridges fitted on every earlier date
+    dates = X.index.get_level_values("DATE")
+    scores = []
+    for d in dates[dates.year == 2022].unique():
+        model = RidgeRanker(params=params)
+        model.fit(X.loc[dates < d], y.loc[dates < d])
+        scores.append(model.predict(X.loc[dates == d]))
+
+    scores = pd.concat(scores)
+    assert folds[1]["accuracy"] == pytest.approx(score_accuracy(scores, y.loc[scores.index]))
+
+    with pytest.raises(ValueError):
+        run_folds(X, y, _returns(y), mode="daily", engine="xgb")
+
+
+# -------------------------------------------------
+# OnlineRidge
+# -------------------------------------------------
+def _rls_loop(X: pd.DataFrame, y: pd.Series, lam: float, alpha: float) -> np.ndarray:
+    """Day-by-day information-form recursion over labelled days."""
+    k = X.shape[1] + 1
+    A, b = np.zeros((k, k)), np.zeros(k)
+    for _, day in X.groupby(level="DATE"):
+        ok = y.loc[day.index].notna() & day.notna().all(axis=1)
+        if not ok.any():
+            continue
+        Z = np.column_stack([np.ones(ok.sum()), day.loc[ok].to_numpy()])
+        A = lam * A + Z.T @ Z
+        b = lam * b + Z.T @ y.loc[day.index][ok].to_numpy()
+    pen = np.eye(k) * alpha
+    pen[0, 0] = 0.0
+    return np.linalg.solve(A + pen, b)
+
+
+def test_online_partial_fit_chunks_match_recursion():
+    X, y = _panel(periods=60, seed=4)
+    y.iloc[42:48] = np.nan                    # one day without labels
+    params = {"alpha": 0.5, "lam": 0.97}
+
+    model = OnlineRidge(params=params)
+    absorbed = [
+        model.partial_fit(X.iloc[lo:hi], y.iloc[lo:hi])
+        for lo, hi in [(0, 96), (96, 102), (102, 252), (252, None)]   # whole dates
+    ]
+
+    assert sum(absorbed) == 59
+    assert model.n_days == 59
+    assert np.allclose(model.coef_, _rls_loop(X, y, 0.97, 0.5))
+
+    one_shot = OnlineRidge(params=params)
+    one_shot.fit(X, y)
+    assert np.allclose(one_shot.coef_, model.coef_)
+
+
+def test_online_without_forgetting_is_expanding_ridge():
+    X, y = _panel(periods=40, seed=5)
+    model = OnlineRidge(params={"alpha": 1.0, "lam": 1.0})
+    model.fit(X, y)
+
+    ridge = RidgeRanker(params={"alpha": 1.0})
+    ridge.fit(X, y)
+    assert np.allclose(model.predict(X), ridge.predict(X))
+
+
+def test_online_partial_fit_skips_seen_and_unlabelled_days(tmp_path):
+    X, y = _panel(periods=30, seed=6)
+    dates = X.index.get_level_values("DATE").unique()
+    y.loc[dates[-1]] = np.nan                 # today's label not known yet
+
+    model = OnlineRidge()
+    model.fit(X, y)
+    assert model.last_date == dates[-2]
+    assert model.partial_fit(X, y) == 0
+
+    # saved state continues exactly like the in-memory model
+    model.save(tmp_path / "state.json")
+    loaded = OnlineRidge.load(tmp_path / "state.json")
+
+    X_new, y_new = _panel(start=str(dates[-1].date()), periods=5, seed=7)
+    assert model.partial_fit(X_new, y_new) == loaded.partial_fit(X_new, y_new) == 5
+    assert np.allclose(model.coef_, loaded.coef_)
+
+    with pytest.raises(ValueError):
+        model.partial_fit(X_new.iloc[:, ::-1], y_new)
+
+
+# -------------------------------------------------
+# SignalEnsemble
+# -------------------------------------------------
+def _members() -> list[dict]:
+    return [
+        *seed_members(2, params=_SMALL, num_boost_round=10, subsamples=(0.7, 0.9)),
+        {"kind": "ridge", "params": {"alpha": 1.0}},
+    ]
+
+
+def test_ensemble_blends_member_scores():
+    X, y = _panel(periods=40)
+
+    mean = SignalEnsemble(members=_members(), blend="mean")
+    mean.fit(X, y)
+    members = mean.predict_members(X)
+
+    assert list(members.columns) == ["member_0", "member_1", "member_2"]
+    assert np.allclose(mean.predict(X), members.mean(axis=1))
+
+    # rank blend: average of per-date percentile ranks of the same members
+    rank = SignalEnsemble(members=_members(), blend="rank")
+    rank.models = mean.models
+    expected = members.groupby(level="DATE").rank(pct=True).mean(axis=1)
+    assert np.allclose(rank.predict(X), expected)
+
+    # each member is the standalone model it describes
+    alone = XGBSignalModel(params={**_SMALL, "seed": 1, "subsample": 0.9}, num_boost_round=10)
+    alone.fit(X, y)
+    assert np.allclose(members["member_1"], alone.predict(X))
+
+
+def test_ensemble_in_process_shares_one_matrix_per_max_bin(monkeypatch):
+    X, y = _panel(periods=40)
+    built = _count_matrix_builds(monkeypatch)
+
+    members = [*_members(), {"kind": "xgb", "params": {**_SMALL, "max_bin": 16}, "num_boost_round": 5}]
+    model = SignalEnsemble(members=members, n_jobs=1)
+    model.fit(X, y)
+
+    assert len(built) == 2                     # max_bin 32 and 16
+    assert [m.n_trees for m in model.models if isinstance(m, XGBSignalModel)] == [10, 10, 5]
+
+
+def test_ensemble_process_pool_matches_in_process(tmp_path):
+    X, y = _panel(periods=40)
+
+    local = SignalEnsemble(members=_members(), n_jobs=1)
+    local.fit(X, y)
+    pooled = SignalEnsemble(members=_members(), n_jobs=2, nthread=2)
+    pooled.fit(X, y)
+    assert np.allclose(pooled.predict(X), local.predict(X))
+
+    local.save(tmp_path / "ensemble.json")
+    loaded = SignalEnsemble.load(tmp_path / "ensemble.json")
+    assert np.allclose(loaded.predict(X), local.predict(X))
+
+
+# -------------------------------------------------
+# PredictionStore
+# -------------------------------------------------
+def test_prediction_store_put_get_roundtrip(tmp_path):
+    X, y = _panel(periods=10)
+    model = XGBSignalModel(params=_SMALL, num_boost_round=5)
+    model.fit(X, y)
+    scores = model.predict(X)                 # float32 booster output
+
+    store = PredictionStore(tmp_path)
+    store.put("m1", "f1", scores)
+
+    dates = X.index.get_level_values("DATE").unique()
+    fresh = PredictionStore(tmp_path)         # re-read from disk
+    assert fresh.has("m1", "f1", dates)
+    assert not fresh.has("m2", "f1", dates[:1])
+    assert fresh.get("m1", "f1", dates).to_numpy().tolist() == scores.astype("float64").tolist()
+
+    # dates already cached are not appended twice
+    fresh.put("m1", "f1", scores * 2)
+    assert len(PredictionStore(tmp_path).load("m1", "f1")) == len(scores)
+
+
+def test_get_or_predict_scores_only_missing_dates(tmp_path):
+    X, y = _panel(periods=10)
+    X.iloc[0, 0] = np.nan
+    dates = X.index.get_level_values("DATE").unique()
+
+    model = RidgeRanker()
+    model.fit(X.dropna(), y.loc[X.dropna().index])
+    calls = []
+    predict = model.predict
+
+    def counting_predict(frame):
+        calls.append(frame.index)
+        return predict(frame)
+
+    model.predict = counting_predict
+
+    store = PredictionStore(tmp_path)
+    first = store.get_or_predict(model, "ridge_v1", X, dates[:4])
+    again = store.get_or_predict(model, "ridge_v1", X, dates[2:6])
+
+    assert len(calls) == 2
+    assert set(calls[1].get_level_values("DATE")) == set(dates[4:6])
+    assert len(first) == 4 * 6 - 1            # row with a missing feature not scored
+    assert np.allclose(again, predict(X.loc[again.index]))
+
+
+def test_production_pointer_moves_only_on_set_production(tmp_path):
+    X, y = _panel(periods=3)
+    dates = X.index.get_level_values("DATE").unique()
+    store = PredictionStore(tmp_path)
+    fkey = feature_version(X.columns)
+
+    assert store.production().empty
+
+    store.put("prod", fkey, pd.Series(1.0, index=X.index))
+    store.set_production("prod", fkey, dates[-1])
+
+    # research runs storing newer or other scores don't move it
+    later = X.rename(index=lambda d: d + pd.Timedelta(days=30), level="DATE")
+    store.put("online", fkey, pd.Series(2.0, index=later.index))
+    store.put("walkforward", fkey, pd.Series(3.0, index=X.index))
+
+    prod = PredictionStore(tmp_path).production(dates[-1])
+    assert (prod["DATE"] == dates[-1]).all()
+    assert (prod["ml_score"] == 1.0).all() and len(prod) == 6
+    assert PredictionStore(tmp_path).production(dates[0]).empty
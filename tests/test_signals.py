@@ -0,0 +1,518 @@
+# tests/test_signals.py
+from __future__ import annotations
+
+from dataclasses import asdict
+from itertools import product
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.data.loader as loader
+import src.signals.build_daily_rankings as rankings
+import src.signals.combine_ml_rankings as confluence
+import src.signals.rank_store as rank_store
+import src.signals.regime as rg
+from src.config.settings import RegimeSettings
+from src.models.prediction_store import PredictionStore
+from src.signals.hmm_regime import HMMRegime, walkforward_exposure
+from src.signals.ml_signals import score_date_range, train_model_for_date
+from src.signals.rules import build_cross_sectional_score, build_cross_sectional_score_panel
+from src.utils.topk import topk_by_group, topk_indices, topk_panel
+
+
+# -------------------------------------------------
+# Fixtures
+# -------------------------------------------------
+def _features(periods: int = 120, n_symbols: int = 6, seed: int = 0) -> tuple[pd.DataFrame, pd.Series]:
+    """DATE-sorted (DATE, SYMBOL) features with a few missing rows and labels."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2020-01-01", periods=periods)
+    index = pd.MultiIndex.from_product([dates, [f"S{i}" for i in range(n_symbols)]], names=["DATE", "SYMBOL"])
+
+    X = pd.DataFrame(rng.normal(size=(len(index), 3)), index=index, columns=["f0", "f1", "f2"])
+    X.iloc[rng.choice(len(X), 10, replace=False), 1] = np.nan
+    y = pd.Series(0.01 * X["f0"].to_numpy() + rng.normal(0.0, 0.01, len(index)), index=index, name="next_ret")
+    return X, y
+
+
+# -------------------------------------------------
+# ml_signals.score_date_range
+# -------------------------------------------------
+def test_score_date_range_one_model_per_window():
+    X, y = _features()
+    start, end = pd.Timestamp("2020-04-01"), pd.Timestamp("2020-05-29")
+
+    panel = score_date_range(X, y, start, end, cadence="M")
+
+    dates = X.index.get_level_values("DATE")
+    in_range = (dates >= start) & (dates <= end) & X.notna().all(axis=1).to_numpy()
+    assert len(panel) == in_range.sum()
+    assert panel["TRAIN_END"].nunique() == 2
+    assert (panel["TRAIN_END"] < panel["DATE"]).all()
+    assert (panel["DATE"].dt.to_period("M") == (panel["TRAIN_END"] + pd.offsets.BDay()).dt.to_period("M")).all()
+
+    # RANK 1..n within each date, best score first
+    ranks = panel.groupby("DATE")["RANK"].apply(list)
+    assert all(r == list(range(1, len(r) + 1)) for r in ranks)
+    assert (panel.groupby("DATE")["ml_score"].diff().dropna() <= 0).all()
+
+    # The May window is the model train_model_for_date fits for its first day
+    may = panel.loc[panel["DATE"].dt.month == 5].set_index(["DATE", "SYMBOL"])["ml_score"]
+    model, _, train_end = train_model_for_date(pd.Timestamp("2020-05-01"), X, y)
+    expected = model.predict(X.loc[may.index])
+
+    assert train_end == panel.loc[panel["DATE"].dt.month == 5, "TRAIN_END"].iloc[0]
+    assert np.array_equal(may.to_numpy(), expected.to_numpy())
+
+
+def test_score_date_range_rejects_unknown_cadence():
+    X, y = _features(periods=10)
+    with pytest.raises(ValueError):
+        score_date_range(X, y, X.index[0][0], X.index[-1][0], cadence="D")
+
+
+# -------------------------------------------------
+# combine_ml_rankings: production scores for the ranking date
+# -------------------------------------------------
+def _confluence_inputs(tmp_path, monkeypatch) -> PredictionStore:
+    store = PredictionStore(tmp_path / "predictions")
+    monkeypatch.setattr(confluence, "PredictionStore", lambda: store)
+    monkeypatch.setattr(confluence, "RANK_FILE", tmp_path / "rank.csv")
+    monkeypatch.setattr(confluence, "ML_FILE", tmp_path / "ml.csv")
+    monkeypatch.setattr(confluence, "OUT_DIR", tmp_path)
+
+    pd.DataFrame(
+        {"DATE": "2024-01-05", "SYMBOL": list("ABC"), "RANK": [1, 2, 3], "SCORE": [0.9, 0.8, 0.7]}
+    ).to_csv(confluence.RANK_FILE, index=False)
+    pd.DataFrame({"SYMBOL": list("ABC"), "ML_SCORE": [0.1, 0.2, 0.3]}).to_csv(confluence.ML_FILE, index=False)
+    return store
+
+
+def _confluence_scores(tmp_path) -> dict[str, float]:
+    out = pd.read_csv(next(tmp_path.glob("confluence_trades_*.csv")))
+    return dict(zip(out["symbol"], out["ml_score"]))
+
+
+def _scores(date: str, values: list[float]) -> pd.Series:
+    index = pd.MultiIndex.from_product([[pd.Timestamp(date)], list("ABC")], names=["DATE", "SYMBOL"])
+    return pd.Series(values, index=index)
+
+
+def test_confluence_uses_production_model_scores(tmp_path, monkeypatch):
+    store = _confluence_inputs(tmp_path, monkeypatch)
+    store.put("xgb_prod", "f", _scores("2024-01-05", [0.7, 0.6, 0.5]))
+    store.set_production("xgb_prod", "f", pd.Timestamp("2024-01-05"))
+
+    # a later research / online run on the same date doesn't take over
+    store.put("online_x", "f", _scores("2024-01-05", [-1.0, -2.0, -3.0]))
+
+    assert confluence.main() == 0
+    assert _confluence_scores(tmp_path) == {"A": 0.7, "B": 0.6, "C": 0.5}
+
+
+def test_confluence_falls_back_to_daily_csv(tmp_path, monkeypatch):
+    store = _confluence_inputs(tmp_path, monkeypatch)
+    store.put("xgb_prod", "f", _scores("2024-01-04", [0.7, 0.6, 0.5]))
+    store.set_production("xgb_prod", "f", pd.Timestamp("2024-01-04"))    # stale day
+
+    assert confluence.main() == 0
+    assert _confluence_scores(tmp_path) == {"A": 0.1, "B": 0.2, "C": 0.3}
+
+
+# -------------------------------------------------
+# build_daily_rankings: full-history backfill
+# -------------------------------------------------
+def _master_files(tmp_path, monkeypatch, n_dates: int = 30) -> dict[str, pd.DataFrame]:
+    """Master symbol CSVs (mixed column names, one stale symbol) + temp history dir."""
+    rng = np.random.default_rng(2)
+    dates = pd.bdate_range("2024-01-01", periods=n_dates)
+    master = tmp_path / "master"
+    master.mkdir()
+
+    files = {}
+    for i, sym in enumerate(["AAA", "BBB", "CCC", "DDD", "IDEA"]):
+        close = 100 * np.cumprod(1 + rng.normal(0.0, 0.02, n_dates))
+        df = pd.DataFrame({"DATE": dates, "CLOSE": close})
+        if sym == "DDD":
+            df = df.iloc[:-3]                     # stopped trading
+        files[sym] = df
+
+    # bad prints: a negative epsilon and a zero close
+    files["IDEA"].loc[12, "CLOSE"] = -8.9e-16
+    files["IDEA"].loc[20, "CLOSE"] = 0.0
+
+    for sym, df in files.items():
+        out = df.rename(columns={"DATE": "TRADE_DATE"}) if sym == "BBB" else df
+        out.to_csv(master / f"{sym}.csv", index=False)
+
+    monkeypatch.setattr(rankings, "MASTER_DIR", master)
+    monkeypatch.setattr(rankings, "OUT_LATEST", tmp_path / "latest.csv")
+    monkeypatch.setattr(rankings, "RANK_HISTORY_DIR", tmp_path / "history")
+    monkeypatch.setattr(rank_store, "RANK_HISTORY_DIR", tmp_path / "history")
+    return files
+
+
+def test_load_master_closes_drops_non_positive_closes(tmp_path, monkeypatch):
+    files = _master_files(tmp_path, monkeypatch)
+    closes = rankings.load_master_closes()
+
+    idea = closes.loc[closes["SYMBOL"] == "IDEA"]
+    assert len(idea) == len(files["IDEA"]) - 2
+    assert (closes["CLOSE"] > rankings.MIN_CLOSE).all()
+
+    hist = rankings.compute_rank_history(closes)
+    assert hist["RET_1D"].abs().max() < 1.0
+    assert hist["RET_5D"].abs().max() < 1.0
+
+
+def test_backfill_matches_per_date_snapshot(tmp_path, monkeypatch):
+    files = _master_files(tmp_path, monkeypatch)
+    assert rankings.backfill() == 0
+
+    hist = rank_store.load_rank_history()
+    assert not hist.duplicated(["DATE", "SYMBOL"]).any()
+
+    # one date recomputed by hand from the raw closes
+    d = pd.Timestamp("2024-01-25")
+    ret = {}
+    for sym, df in files.items():
+        close = df.set_index("DATE")["CLOSE"]
+        close = close.loc[close > rankings.MIN_CLOSE]
+        if d in close.index:
+            ret[sym] = (close.pct_change().loc[d], close.pct_change(5).loc[d])
+    ret = pd.DataFrame(ret, index=["RET_1D", "RET_5D"]).T.dropna()
+    score = ret["RET_5D"].rank(pct=True) + ret["RET_1D"].rank(pct=True)
+
+    day = hist.loc[hist["DATE"] == d].set_index("SYMBOL")
+    assert np.allclose(day["SCORE"], score.reindex(day.index))
+    assert day["RANK"].tolist() == list(range(1, len(day) + 1))
+
+
+# -------------------------------------------------
+# build_daily_rankings.main / rank_store
+# -------------------------------------------------
+def test_daily_upsert_equals_backfill_last_date(tmp_path, monkeypatch):
+    _master_files(tmp_path, monkeypatch)
+    assert rankings.main() == 0
+
+    # DDD stopped trading 3 days ago: not in today's ranking
+    daily = rank_store.load_rank_history()
+    assert daily["DATE"].nunique() == 1
+    assert "DDD" not in set(daily["SYMBOL"])
+
+    hist = rankings.compute_rank_history(rankings.load_master_closes())
+    expected = hist.loc[hist["DATE"] == hist["DATE"].max()].reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(daily, expected, check_dtype=False)
+    pd.testing.assert_frame_equal(pd.read_csv(rankings.OUT_LATEST, parse_dates=["DATE"]), daily)
+
+
+def test_upsert_date_replaces_the_day(tmp_path, monkeypatch):
+    monkeypatch.setattr(rank_store, "RANK_HISTORY_DIR", tmp_path)
+
+    def day(date: str, ranks: list[int]) -> pd.DataFrame:
+        return pd.DataFrame({"DATE": pd.Timestamp(date), "SYMBOL": list("ABC")[: len(ranks)], "RANK": ranks})
+
+    rank_store.upsert_date(day("2024-01-30", [1, 2, 3]))
+    rank_store.upsert_date(day("2024-02-01", [2, 1, 3]))
+    rank_store.upsert_date(day("2024-01-31", [1, 2]))
+    rank_store.upsert_date(day("2024-01-31", [2, 1, 3]))     # rerun of the same day
+
+    hist = rank_store.load_rank_history()
+    assert hist.groupby("DATE").size().tolist() == [3, 3, 3]
+    assert sorted(p.name for p in tmp_path.glob("*.csv")) == ["2024-01.csv", "2024-02.csv"]
+
+    jan31 = hist.loc[hist["DATE"] == "2024-01-31"].set_index("SYMBOL")["RANK"]
+    assert jan31.to_dict() == {"B": 1, "A": 2, "C": 3}
+
+    # range reads only return the requested dates
+    assert rank_store.load_rank_history("2024-01-31", "2024-01-31")["DATE"].nunique() == 1
+
+    with pytest.raises(ValueError):
+        rank_store.upsert_date(pd.concat([day("2024-01-30", [1]), day("2024-01-31", [1])]))
+
+
+def test_write_history_dedups_and_replaces_partitions(tmp_path, monkeypatch):
+    monkeypatch.setattr(rank_store, "RANK_HISTORY_DIR", tmp_path)
+
+    hist = pd.DataFrame({
+        "DATE": pd.to_datetime(["2024-01-02", "2024-01-02", "2024-01-02", "2024-02-01"]),
+        "SYMBOL": ["A", "B", "A", "A"],
+        "RANK": [1, 2, 3, 1],
+    })
+    assert rank_store.write_history(hist) == 2
+
+    out = rank_store.load_rank_history()
+    assert len(out) == 3
+    assert out.loc[(out["DATE"] == "2024-01-02") & (out["SYMBOL"] == "A"), "RANK"].item() == 3
+
+
+# -------------------------------------------------
+# rules: panel vs per-date snapshot scoring
+# -------------------------------------------------
+def _snapshots(n_dates: int = 25, n_symbols: int = 12, seed: int = 3) -> pd.DataFrame:
+    """Stacked daily snapshots with NaN / missing inputs and illiquid rows."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-03-01", periods=n_dates)
+
+    df = pd.DataFrame({
+        "DATE": np.repeat(dates, n_symbols),
+        "SYMBOL": np.tile([f"S{i:02d}" for i in range(n_symbols)], n_dates),
+        "adj_close": 100 * np.exp(rng.normal(0.0, 0.05, n_dates * n_symbols)),
+        "mom_3d": rng.normal(0.0, 0.02, n_dates * n_symbols),
+        "mom_5d": rng.normal(0.0, 0.03, n_dates * n_symbols),
+        "mom_10d": rng.normal(0.0, 0.05, n_dates * n_symbols),
+        "oi_breakout": rng.choice([0.5, 1.0, 1.5, np.nan], n_dates * n_symbols),
+        "TRDVAL": rng.uniform(1e6, 1e8, n_dates * n_symbols),
+    })
+    df.loc[rng.random(len(df)) < 0.05, "mom_5d"] = np.nan
+    df.loc[rng.random(len(df)) < 0.05, "TRDVAL"] = np.nan     # fails the liquidity filter
+    df.loc[df["DATE"] == dates[4], "mom_10d"] = 0.01          # zero dispersion day
+
+    # rows not in SYMBOL order within a date
+    return df.sample(frac=1.0, random_state=seed).sort_values("DATE", kind="stable").reset_index(drop=True)
+
+
+def test_panel_score_matches_snapshot_loop():
+    panel = _snapshots()
+
+    looped = pd.concat(
+        [build_cross_sectional_score(day) for _, day in panel.groupby("DATE", sort=True)],
+        ignore_index=True,
+    )
+    scored = build_cross_sectional_score_panel(panel)
+
+    pd.testing.assert_frame_equal(scored, looped, check_exact=False, rtol=1e-12)
+
+
+def test_zero_dispersion_day_scores_zero_momentum():
+    panel = _snapshots()
+    day = panel.loc[panel["DATE"] == panel["DATE"].unique()[4]]
+
+    assert (build_cross_sectional_score(day)["mom_10d_z"] == 0.0).all()
+    assert (build_cross_sectional_score_panel(day)["mom_10d_z"] == 0.0).all()
+
+
+# -------------------------------------------------
+# utils.topk
+# -------------------------------------------------
+def _stable_topk(row: np.ndarray, k: int, largest: bool) -> np.ndarray:
+    """Reference: stable sort of the valid entries, first k, -1 padded."""
+    valid = np.flatnonzero(~np.isnan(row))
+    keys = -row[valid] if largest else row[valid]
+    picks = valid[np.argsort(keys, kind="stable")][:k]
+    return np.concatenate([picks, np.full(k - len(picks), -1)])
+
+
+@pytest.mark.parametrize("k,largest", list(product([1, 3, 7, 12], [True, False])))
+def test_topk_panel_matches_stable_sort(k, largest):
+    rng = np.random.default_rng(k)
+    values = rng.integers(0, 5, size=(60, 10)).astype(float)   # many ties
+    values[rng.random(values.shape) < 0.3] = np.nan
+    values[0] = np.nan
+
+    out = topk_panel(values, k, largest)
+    expected = np.array([_stable_topk(row, min(k, 10), largest) for row in values])
+
+    assert np.array_equal(out, expected)
+
+
+def test_topk_indices_skips_nan():
+    assert topk_indices([3.0, np.nan, 5.0, 3.0], 3).tolist() == [2, 0, 3]
+    assert topk_indices([np.nan, np.nan], 2).tolist() == []
+
+
+def test_topk_by_group_matches_groupby_sort():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "DATE": rng.choice(pd.bdate_range("2024-01-01", periods=8), size=200),
+            "SCORE": rng.integers(0, 6, size=200).astype(float),
+        }
+    )
+    df.loc[rng.random(200) < 0.1, "SCORE"] = np.nan
+
+    out = df.iloc[topk_by_group(df, "SCORE", 4)]
+    expected = (
+        df.dropna(subset=["SCORE"])
+        .sort_values(["DATE", "SCORE"], ascending=[True, False], kind="stable")
+        .groupby("DATE")
+        .head(4)
+    )
+
+    assert out.index.tolist() == expected.index.tolist()
+
+
+def test_topk_by_group_skips_null_groups():
+    df = pd.DataFrame(
+        {
+            "DATE": pd.to_datetime([None, "2024-01-02", "2024-01-01", None, "2024-01-02"]),
+            "SCORE": [9.0, 1.0, 2.0, 8.0, 3.0],
+        }
+    )
+
+    assert topk_by_group(df, "SCORE", 1).tolist() == [2, 4]
+    assert topk_by_group(df.iloc[[0, 3]], "SCORE", 2).tolist() == []
+
+
+# -------------------------------------------------
+# regime: cached frame / exposure
+# -------------------------------------------------
+_REGIME = RegimeSettings(ema_span=20, slow_span=20, fast_span=5, breadth_span=10, hmm_min_train=80, hmm_refit_days=40)
+
+
+def _regime_cache(tmp_path, monkeypatch, n_dates: int = 160) -> dict[str, int]:
+    """*_CONT.csv files and cache paths under tmp_path; counts rebuilds."""
+    hist = tmp_path / "hist"
+    hist.mkdir()
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2023-01-02", periods=n_dates)
+    for sym in ("AAA", "BBB", "CCC"):
+        close = 100 * np.exp(rng.normal(0.0, 0.01, n_dates).cumsum())
+        pd.DataFrame({"date": dates, "adj_close": close}).to_csv(hist / f"{sym}_CONT.csv", index=False)
+
+    monkeypatch.setattr(rg, "CLEANED_HIST_DIR", hist)
+    monkeypatch.setattr(loader, "CLEANED_HIST_DIR", hist)
+    monkeypatch.setattr(rg, "REGIME_FILE", tmp_path / "regime_frame.csv")
+    monkeypatch.setattr(rg, "REGIME_KEY_FILE", tmp_path / "regime_frame.json")
+    monkeypatch.setattr(rg, "HMM_EXPOSURE_FILE", tmp_path / "regime_hmm_exposure.csv")
+    monkeypatch.setattr(rg, "HMM_EXPOSURE_KEY_FILE", tmp_path / "regime_hmm_exposure.json")
+    monkeypatch.setattr(rg, "_MEMO", {})
+    monkeypatch.setattr(rg, "_HMM_MEMO", {})
+
+    calls = {"frame": 0, "hmm": 0}
+
+    def counted(name, fn):
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(rg, "build_regime_frame", counted("frame", rg.build_regime_frame))
+    monkeypatch.setattr(rg, "walkforward_exposure", counted("hmm", rg.walkforward_exposure))
+    return calls
+
+
+def _touch_source(hist) -> None:
+    path = hist / "AAA_CONT.csv"
+    df = pd.read_csv(path)
+    df.loc[len(df) - 1, "adj_close"] *= 1.01
+    df.to_csv(path, index=False)
+
+
+def test_regime_frame_cached_until_source_changes(tmp_path, monkeypatch):
+    calls = _regime_cache(tmp_path, monkeypatch)
+
+    frame = rg.load_regime_frame(_REGIME)
+    assert rg.load_regime_frame(_REGIME) is frame
+
+    # a new process reads the CSV instead of rebuilding
+    monkeypatch.setattr(rg, "_MEMO", {})
+    pd.testing.assert_frame_equal(rg.load_regime_frame(_REGIME), frame, check_freq=False)
+    assert calls["frame"] == 1
+
+    # other settings or a changed source file rebuild
+    rg.load_regime_frame(RegimeSettings(**{**asdict(_REGIME), "breadth_min": 0.6}))
+    _touch_source(rg.CLEANED_HIST_DIR)
+    rg.load_regime_frame(_REGIME)
+    assert calls["frame"] == 3
+
+
+def test_hmm_exposure_cached_with_regime_frame(tmp_path, monkeypatch):
+    calls = _regime_cache(tmp_path, monkeypatch)
+
+    exposure = rg.load_regime_exposure("hmm", _REGIME)
+    assert len(exposure) == 160 - 81
+    assert rg.load_regime_exposure("hmm", _REGIME) is exposure
+
+    monkeypatch.setattr(rg, "_HMM_MEMO", {})
+    reread = rg.load_regime_exposure("hmm", _REGIME)
+    pd.testing.assert_series_equal(reread, exposure, check_freq=False)
+    assert calls["hmm"] == 1
+
+    _touch_source(rg.CLEANED_HIST_DIR)
+    rg.load_regime_exposure("hmm", _REGIME)
+    assert calls == {"frame": 2, "hmm": 2}
+
+
+# -------------------------------------------------
+# signals.hmm_regime
+# -------------------------------------------------
+def _index_prices(n: int = 400, seed: int = 0) -> pd.Series:
+    """Calm / turbulent regimes switching every 50 days."""
+    rng = np.random.default_rng(seed)
+    vol = np.where((np.arange(n) // 50) % 2 == 0, 0.005, 0.02)
+    rets = rng.normal(0.0003, vol)
+    dates = pd.bdate_range("2020-01-01", periods=n)
+    return pd.Series(100 * np.cumprod(1 + rets), index=dates)
+
+
+def test_hmm_forward_loglik_matches_brute_force():
+    model = HMMRegime()
+    model.log_start_ = np.log([0.6, 0.4])
+    model.log_trans_ = np.log([[0.9, 0.1], [0.2, 0.8]])
+    model.means_ = np.array([0.001, -0.002])
+    model.vars_ = np.array([0.01, 0.03]) ** 2
+
+    r = np.array([0.004, -0.02, 0.01, 0.0, -0.035, 0.012])
+    log_b = model._log_emission(r)
+    _, log_c = model._forward(log_b)
+
+    start, trans, b = np.exp(model.log_start_), np.exp(model.log_trans_), np.exp(log_b)
+    total = 0.0
+    for path in product(range(2), repeat=len(r)):
+        p = start[path[0]] * b[0, path[0]]
+        for t in range(1, len(r)):
+            p *= trans[path[t - 1], path[t]] * b[t, path[t]]
+        total += p
+
+    assert np.isclose(log_c.sum(), np.log(total))
+
+
+def test_hmm_fit_orders_states_by_variance():
+    model = HMMRegime()
+    model.fit(_index_prices())
+
+    assert model.vars_[0] < model.vars_[1]
+    assert np.allclose(np.exp(model.log_trans_).sum(axis=1), 1.0)
+
+
+def test_hmm_update_equals_full_filter():
+    prices = _index_prices()
+    model = HMMRegime()
+    model.fit(prices.iloc[:250])
+
+    assert model.update(prices) == len(prices) - 250
+    assert model.last_date == prices.index[-1]
+
+    full = model.filter_proba(prices).iloc[-1].to_numpy()
+    assert np.allclose(np.exp(model.log_alpha_), full)
+
+
+def test_hmm_save_load_roundtrip(tmp_path):
+    prices = _index_prices()
+    model = HMMRegime()
+    model.fit(prices.iloc[:300])
+    model.save(tmp_path / "hmm.json")
+
+    loaded = HMMRegime.load(tmp_path / "hmm.json")
+    model.update(prices)
+    loaded.update(prices)
+
+    assert np.isclose(loaded.current_exposure, model.current_exposure)
+
+
+def test_walkforward_exposure_is_causal():
+    prices = _index_prices()
+    exposure = walkforward_exposure(prices, min_train=200, refit_every=50)
+
+    # first exposure the day after the first fit, none before
+    assert exposure.index[0] == prices.index[201]
+    assert exposure.between(0.0, 1.0).all()
+
+    # dropping future prices leaves every past exposure unchanged
+    cut = prices.index[320]
+    truncated = walkforward_exposure(prices.loc[:cut], min_train=200, refit_every=50)
+    assert np.allclose(exposure.loc[:cut], truncated)
+    assert len(truncated) == len(exposure.loc[:cut])